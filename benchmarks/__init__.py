@@ -0,0 +1 @@
+# Benchmarks (run from the repo root, e.g. python -m benchmarks.bench_detection)
@@ -0,0 +1,53 @@
+"""Compares the blob extraction paths of BlobDetector on synthetic frames.
+
+python -m benchmarks.bench_detection --blobs 50 500 2000 --size 1920x1080
+"""
+import argparse
+import time
+
+import cv2
+
+from benchmarks.synthetic import SyntheticScene
+from src.core.tracking import BlobDetector
+from src.core.enums import DetectionMode, DetectionBackend
+
+
+def time_call(fn, repeat):
+    fn() # Warm-up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000.0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--blobs", type=int, nargs="+", default=[50, 500, 2000])
+    parser.add_argument("--size", default="1920x1080")
+    parser.add_argument("--radius", type=int, default=6, help="Blob radius in px.")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args(argv)
+    width, height = (int(v) for v in args.size.split("x"))
+
+    detector = BlobDetector()
+    detector.update_params({"mode": DetectionMode.GRAYSCALE.value, "min_area": 10})
+
+    print(f"{'blobs':>6} {'contours+kp':>12} {'contours':>10} {'components':>11}  (ms/frame, {args.size})")
+    for count in args.blobs:
+        frame = SyntheticScene(width, height, blobs=count, radius=args.radius).frame(0)
+        thresh, _ = detector.mask(frame)
+
+        detector.backend = DetectionBackend.CONTOURS.value
+        legacy = time_call(lambda: detector.detect(frame, keypoints=True), args.repeat)
+        contours = time_call(lambda: detector.detect(frame, keypoints=False), args.repeat)
+        detector.backend = DetectionBackend.COMPONENTS.value
+        components = time_call(lambda: detector.detect(frame, keypoints=False), args.repeat)
+        mask_only = time_call(lambda: detector.mask(frame), args.repeat)
+
+        found = int(cv2.connectedComponents(thresh)[0]) - 1
+        print(f"{count:>6} {legacy:>12.2f} {contours:>10.2f} {components:>11.2f}  "
+              f"(mask {mask_only:.2f} ms, {found} regions)")
+
+
+if __name__ == "__main__":
+    main()
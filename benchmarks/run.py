@@ -0,0 +1,309 @@
+"""Benchmark suite: detection per mode, tracker scaling, draw toggles and end-to-end export.
+
+python -m benchmarks.run --out results.json
+python -m benchmarks.run --quick --compare baseline.json
+
+Every case reports frames/sec, per-frame mean/p95 (ms) and peak traced memory
+(NumPy/OpenCV arrays and Python objects, measured in a separate pass so tracing
+does not skew the timings). Scenes are seeded, so runs are comparable across commits.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+from benchmarks.synthetic import SyntheticScene, write_video, COLOR_PARAMS
+from src.core.tracking import BlobDetector, CentroidTracker, DEFAULT_PARAMS
+from src.core.pipeline import PipelineEngine, VideoFileSource, VideoFileSink
+from src.core.profiler import FrameTrace
+from src.core.buffers import BufferPool
+from src.core.enums import DetectionMode, DetectionBackend, AssignmentMode, VisualStyle
+from src.visuals import VisualStateManager, Visualizer
+from src.visuals.strategies import NoTextStrategy
+
+GROUPS = ("detection", "tracker", "draw", "pipeline")
+
+DRAW_TOGGLES = {
+    "plain": {},
+    "traces": {"show_traces": True},
+    "glow": {"glow_enabled": True},
+    "fill": {"fill_shape": True, "fill_opacity": 0.5},
+    "text": {"text": True},
+    "text_large": {"text": True, "text_size": 32}, # thick enough for stamped labels
+    "all": {"show_traces": True, "glow_enabled": True, "fill_shape": True, "fill_opacity": 0.5, "text": True},
+}
+
+
+# Config keys that shape the scenes: results are only compared when these match
+SCENE_KEYS = ("size", "frames", "blobs", "radius", "speed", "noise")
+
+
+def make_scene(config, blobs=None, noise=0.0, seed=0):
+    return SyntheticScene(*config["size"], blobs=config["blobs"] if blobs is None else blobs,
+                          radius=config["radius"], speed=config["speed"], noise=noise, seed=seed)
+
+
+# --- MEASUREMENT ---
+def measure(step, count, warmup=2, memory_frames=5, prepare=None):
+    """Calls step(i) for i in range(count) and returns timing/memory figures.
+
+    prepare(i), if given, runs before every step(i) call, outside the timings
+    (e.g. to reset a frame that step draws on).
+    """
+    def run(i):
+        if prepare:
+            prepare(i)
+        step(i)
+
+    for i in range(min(warmup, count)):
+        run(i)
+    times = np.empty(count)
+    for i in range(count):
+        if prepare:
+            prepare(i)
+        start = time.perf_counter()
+        step(i)
+        times[i] = time.perf_counter() - start
+
+    tracemalloc.start()
+    for i in range(min(memory_frames, count)):
+        run(i)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    total = times.sum()
+    return {
+        "frames": count,
+        "fps": round(count / total, 2) if total > 0 else 0.0,
+        "mean_ms": round(float(times.mean()) * 1000.0, 3),
+        "p95_ms": round(float(np.percentile(times, 95)) * 1000.0, 3),
+        "peak_mem_mb": round(peak / 2**20, 2),
+    }
+
+
+def case(group, name, params, figures):
+    row = {"group": group, "name": name, "params": params}
+    row.update(figures)
+    print(f"  {group:<10} {name:<34} {row['fps']:>9.1f} fps  {row['mean_ms']:>8.2f} ms"
+          f"  p95 {row['p95_ms']:>8.2f}  mem {row['peak_mem_mb']:>7.2f} MB", flush=True)
+    return row
+
+
+def mode_params(mode):
+    params = dict(DEFAULT_PARAMS, mode=mode, min_area=20)
+    if mode == DetectionMode.COLOR.value:
+        params.update(COLOR_PARAMS)
+    return params
+
+
+# --- GROUPS ---
+def bench_detection(config):
+    scene = make_scene(config, noise=config["noise"], seed=1)
+    frames = scene.frames(config["unique_frames"])
+    rows = []
+    for mode in DetectionMode:
+        for backend in DetectionBackend:
+            detector = BlobDetector()
+            detector.update_params(dict(mode_params(mode.value), backend=backend.value))
+            pool = BufferPool() # As in PipelineEngine
+            step = lambda i: detector.detect(frames[i % len(frames)], keypoints=False, pool=pool)
+            rows.append(case("detection", f"{mode.value}/{backend.value}",
+                             {"mode": mode.value, "backend": backend.value, "blobs": config["blobs"]},
+                             measure(step, config["frames"])))
+    return rows
+
+
+def bench_tracker(config):
+    rows = []
+    for n in config["tracker_n"]:
+        scene = make_scene(config, blobs=n, seed=2)
+        inputs = [scene.centroids(i) for i in range(config["frames"] + 2)]
+        variants = [(AssignmentMode.GREEDY.value, 0), (AssignmentMode.GREEDY.value, 50),
+                    (AssignmentMode.OPTIMAL.value, 50)]
+        if n <= 500: # Dense optimal assignment is O(n^3) without scipy
+            variants.append((AssignmentMode.OPTIMAL.value, 0))
+        for assignment, max_distance in variants:
+            tracker = CentroidTracker(assignment=assignment, max_distance=max_distance)
+            step = lambda i: tracker.update(inputs[i])
+            rows.append(case("tracker", f"n={n} {assignment} gate={max_distance}",
+                             {"n": n, "assignment": assignment, "max_distance": max_distance},
+                             measure(step, config["frames"], warmup=0)))
+    return rows
+
+
+def bench_draw(config):
+    n = config["blobs"]
+    scene = make_scene(config, seed=3)
+    background = scene.frame(0)
+    tracker = CentroidTracker()
+    objects = [dict(tracker.update(scene.centroids(i))) for i in range(config["frames"])]
+
+    rows = []
+    for name, toggles in DRAW_TOGGLES.items():
+        for shape in (VisualStyle.SQUARE.value, VisualStyle.CIRCLE.value):
+            visualizer = Visualizer(VisualStateManager())
+            visualizer.max_blobs = n
+            visualizer.glow_enabled = toggles.get("glow_enabled", False)
+            visualizer.show_traces = toggles.get("show_traces", False)
+            visualizer.fill_shape = toggles.get("fill_shape", False)
+            visualizer.fill_opacity = toggles.get("fill_opacity", 0.5)
+            visualizer.text_size = toggles.get("text_size", visualizer.text_size)
+            if not toggles.get("text"):
+                visualizer.set_text_strategy(NoTextStrategy())
+            buffers = [background.copy() for _ in range(config["frames"])]
+            step = lambda i: visualizer.draw(buffers[i], objects[i], shape_type=shape, frame_idx=i)
+            # Every pass (warmup, timing, memory) draws on a clean frame
+            prepare = lambda i: np.copyto(buffers[i], background)
+            figures = measure(step, config["frames"], memory_frames=3, prepare=prepare)
+            if toggles.get("text"):
+                figures["glyphs"] = visualizer.glyphs.report()
+            if visualizer.sprites.misses:
+                figures["sprites"] = visualizer.sprites.report()
+            rows.append(case("draw", f"{name}/{shape}", {"toggles": name, "shape": shape, "objects": n}, figures))
+    return rows
+
+
+def run_export(video, output, mode, visuals, trace=None):
+    engine = PipelineEngine(mode_params(mode), visuals)
+    engine.stats.trace = trace
+    source = VideoFileSource(video)
+    sink = VideoFileSink(output, source.fps, (source.width, source.height))
+    start = time.perf_counter()
+    frames = engine.run_threaded(source, sink)
+    return engine, frames, time.perf_counter() - start
+
+
+def bench_pipeline(config, workdir):
+    scene = make_scene(config, noise=config["noise"], seed=4)
+    video = write_video(os.path.join(workdir, "synthetic.mp4"), scene, config["frames"])
+    output = os.path.join(workdir, "out.mp4")
+    visuals = {"color_mode": "Effect", "effect_name": "Rainbow", "text_mode": "Index", "max_blobs": 50}
+    rows = []
+    for mode in DetectionMode:
+        trace = FrameTrace()
+        engine, frames, seconds = run_export(video, output, mode.value, visuals, trace)
+        per_frame = [sum(v for k, v in row.items() if k != "frame") for row in trace.rows]
+
+        # Separate pass for memory, tracemalloc slows down the Python stages
+        tracemalloc.start()
+        run_export(video, output, mode.value, visuals)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        figures = {"frames": frames, "fps": round(frames / seconds, 2) if seconds > 0 else 0.0,
+                   "mean_ms": round(seconds / max(frames, 1) * 1000.0, 3),
+                   "p95_ms": round(float(np.percentile(per_frame, 95)), 3) if per_frame else 0.0,
+                   "peak_mem_mb": round(peak / 2**20, 2),
+                   "stages": engine.stats.summary()["stages"]}
+        rows.append(case("pipeline", mode.value, {"mode": mode.value, "blobs": config["blobs"]}, figures))
+    return rows
+
+
+# --- REPORTING ---
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "opencv": cv2.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def scene_differences(baseline, config):
+    """[(key, baseline value, value)] for the SCENE_KEYS a results file was run with differently."""
+    theirs = baseline.get("config", {})
+    ours = dict(config, size=list(config["size"]))
+    return [(key, theirs.get(key), ours[key]) for key in SCENE_KEYS if theirs.get(key) != ours[key]]
+
+
+def compare(baseline, results):
+    """Prints fps ratios against a previous results file (> 1.0 is faster)."""
+    old = {(r["group"], r["name"]): r for r in baseline["results"]}
+    print(f"\nvs {baseline['environment'].get('commit') or 'baseline'}:")
+    for row in results:
+        prev = old.get((row["group"], row["name"]))
+        if prev and prev["fps"] > 0:
+            ratio = row["fps"] / prev["fps"]
+            flag = "  <-- slower" if ratio < 0.9 else ""
+            print(f"  {row['group']:<10} {row['name']:<34} {prev['fps']:>9.1f} -> {row['fps']:>9.1f} fps"
+                  f"  x{ratio:.2f}{flag}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run", description=__doc__.splitlines()[0])
+    parser.add_argument("--out", help="Write results as JSON to this file.")
+    parser.add_argument("--compare", help="Previous results JSON to compare against.")
+    parser.add_argument("--groups", nargs="+", choices=GROUPS, default=list(GROUPS))
+    parser.add_argument("--size", default="1280x720")
+    parser.add_argument("--frames", type=int, default=60, help="Measured frames per case.")
+    parser.add_argument("--blobs", type=int, default=50)
+    parser.add_argument("--radius", type=int, default=10, help="Blob radius in px.")
+    parser.add_argument("--speed", type=float, default=4.0, help="Max blob motion in px per frame, per axis.")
+    parser.add_argument("--noise", type=float, default=4.0, help="Gaussian noise std-dev.")
+    parser.add_argument("--tracker-n", type=int, nargs="+", default=[10, 100, 500, 2000])
+    parser.add_argument("--quick", action="store_true", help="Small sizes for a fast smoke run.")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    config = {
+        "size": tuple(int(v) for v in args.size.split("x")),
+        "frames": args.frames,
+        "unique_frames": 10,
+        "blobs": args.blobs,
+        "radius": args.radius,
+        "speed": args.speed,
+        "noise": args.noise,
+        "tracker_n": args.tracker_n,
+    }
+    if args.quick:
+        config.update(size=(640, 360), frames=15, tracker_n=[10, 200])
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        differs = scene_differences(baseline, config)
+        if differs:
+            # Like with like only: run with the baseline's scene options instead
+            print(f"{args.compare} was run on other scenes:", file=sys.stderr)
+            for key, theirs, ours in differs:
+                print(f"  {key}: {theirs} (now {ours})", file=sys.stderr)
+            return 1
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        runners = {"detection": bench_detection, "tracker": bench_tracker, "draw": bench_draw,
+                   "pipeline": lambda cfg: bench_pipeline(cfg, workdir)}
+        for group in args.groups:
+            results += runners[group](config)
+
+    report = {"environment": environment(), "config": dict(config, size=list(config["size"])),
+              "results": results}
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nWrote {len(results)} results to {args.out}")
+    if baseline is not None:
+        compare(baseline, results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,59 @@
+"""Synthetic test footage: moving blobs on a flat background with optional sensor noise."""
+import cv2
+import numpy as np
+
+BACKGROUND = 230
+BLOB_COLOR = (30, 30, 200) # Saturated red (BGR): dark enough for Grayscale, isolated by COLOR_PARAMS
+
+# HSV range matching BLOB_COLOR, for DetectionMode.COLOR runs
+COLOR_PARAMS = {"h_min": 0, "h_max": 10, "s_min": 120, "s_max": 255, "v_min": 80, "v_max": 255}
+
+
+class SyntheticScene:
+    """Deterministic scene of `blobs` discs bouncing inside a width x height frame.
+
+    radius: disc radius in px, speed: max px per frame along each axis,
+    noise: std-dev of additive Gaussian noise (0 = clean).
+    """
+
+    def __init__(self, width=1280, height=720, blobs=50, radius=10, speed=4.0, noise=0.0, seed=0):
+        self.width = width
+        self.height = height
+        self.radius = radius
+        self.noise = noise
+        self.rng = np.random.default_rng(seed)
+        self.start = self.rng.uniform((radius, radius), (width - radius, height - radius), (blobs, 2))
+        self.velocity = self.rng.uniform(-speed, speed, (blobs, 2))
+
+    def positions(self, frame_idx):
+        # Reflect off the borders: fold the unbounded path back into [r, size - r]
+        low = np.array([self.radius, self.radius], np.float64)
+        span = np.array([self.width, self.height], np.float64) - 2 * low
+        travel = (self.start - low + self.velocity * frame_idx) % (2 * span)
+        return low + np.where(travel > span, 2 * span - travel, travel)
+
+    def frame(self, frame_idx):
+        frame = np.full((self.height, self.width, 3), BACKGROUND, np.uint8)
+        for x, y in self.positions(frame_idx).astype(int).tolist():
+            cv2.circle(frame, (x, y), self.radius, BLOB_COLOR, -1)
+        if self.noise > 0:
+            noise = self.rng.normal(0, self.noise, frame.shape)
+            frame = np.clip(frame + noise, 0, 255).astype(np.uint8)
+        return frame
+
+    def frames(self, count):
+        return [self.frame(i) for i in range(count)]
+
+    def centroids(self, frame_idx):
+        """Ground-truth (N, 4) rects for feeding the tracker without detection."""
+        pos = self.positions(frame_idx).astype(np.int32)
+        r = self.radius
+        return np.concatenate([pos - r, pos + r], axis=1)
+
+
+def write_video(path, scene, count, fps=30, fourcc="mp4v"):
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*fourcc), fps, (scene.width, scene.height))
+    for i in range(count):
+        writer.write(scene.frame(i))
+    writer.release()
+    return path
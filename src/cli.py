@@ -0,0 +1,206 @@
+"""Headless batch renderer: python -m src.cli clips/*.mp4 --settings look.json --workers 4
+
+Never imports PyQt6, so it runs on machines without a display server.
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from src.core.tracking import DEFAULT_PARAMS
+from src.core.pipeline import PipelineEngine, VideoFileSource, VideoFileSink
+from src.core.profiler import FrameTrace
+from src.core.threaded_io import DEFAULT_QUEUE_DEPTH
+from src.core.trackfile import TrackFileWriter, load_tracks, sidecar_path, source_keys
+
+
+def load_settings(path):
+    """Reads {"params": get_params(), "visuals": get_visual_settings()} from a JSON file."""
+    if not path:
+        return dict(DEFAULT_PARAMS), {}
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    params = dict(DEFAULT_PARAMS)
+    params.update(data.get("params", {}))
+    return params, data.get("visuals", {})
+
+
+def expand_inputs(patterns):
+    paths = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        for path in matches:
+            if path not in paths:
+                paths.append(path)
+    return paths
+
+
+def output_path_for(input_path, output_dir=None):
+    base, _ = os.path.splitext(input_path)
+    if output_dir:
+        base = os.path.join(output_dir, os.path.basename(base))
+    return f"{base}_tracked.mp4"
+
+
+def render_file(input_path, output_path, params, visuals, io_depth=DEFAULT_QUEUE_DEPTH, trace=None,
+                tracks=None, save_tracks=False):
+    """Detect -> track -> draw -> encode one file. Returns a summary dict.
+
+    trace: "csv" or "json" to also write per-frame stage timings next to the output.
+    tracks: track file to render from instead (decode -> draw -> encode), "" for the
+    input's <video>.blobs sidecar.
+    save_tracks: write the detections and tracks to the input's sidecar.
+    """
+    track_file = None
+    if tracks is not None:
+        try:
+            track_file = load_tracks(tracks or sidecar_path(input_path), input_path)
+        except ValueError as e:
+            return {"input": input_path, "error": str(e)}
+
+    source = VideoFileSource(input_path)
+    if not source.is_opened():
+        return {"input": input_path, "error": "Could not open video."}
+
+    sink = VideoFileSink(output_path, source.fps, (source.width, source.height))
+    engine = PipelineEngine(params, visuals)
+    if trace:
+        engine.stats.trace = FrameTrace()
+    writer = None
+    if save_tracks and track_file is None:
+        keys = dict(engine.settings_keys(), **source_keys(input_path))
+        writer = TrackFileWriter(sidecar_path(input_path), keys)
+    on_frame = (lambda result: writer.add(result.rects, result.objects)) if writer else None
+    if io_depth > 0:
+        frames = engine.run_threaded(source, sink, depth=io_depth, tracks=track_file, on_frame=on_frame)
+    else:
+        frames = engine.run(source, sink, tracks=track_file, on_frame=on_frame)
+        source.release()
+        sink.release()
+
+    seconds = engine.stats.elapsed()
+    result = {
+        "input": input_path,
+        "output": output_path,
+        "frames": frames,
+        "seconds": round(seconds, 3),
+        "fps": round(frames / seconds, 2) if seconds > 0 else 0.0,
+        "stats": engine.stats.summary(),
+    }
+    if trace:
+        base, _ = os.path.splitext(output_path)
+        result["trace"] = f"{base}.trace.{trace}"
+        engine.stats.trace.write(result["trace"])
+    if track_file is not None:
+        result["tracks"] = track_file.path
+        if engine.stats.counters.get("tracks_short"):
+            # Frames past the end of the track file, written without overlay
+            result["tracks_short"] = engine.stats.counters["tracks_short"]
+    elif writer is not None and frames:
+        result["tracks"] = writer.save()
+    return result
+
+
+def format_result(result, show_stats=False):
+    name = os.path.basename(result["input"])
+    if "error" in result:
+        return f"{name}: ERROR {result['error']}"
+    line = (f"{name} -> {os.path.basename(result['output'])}: "
+            f"{result['frames']} frames in {result['seconds']:.2f}s ({result['fps']:.1f} fps)")
+    if "tracks" in result:
+        line += f" [tracks: {os.path.basename(result['tracks'])}]"
+    if "tracks_short" in result:
+        line += f" [{result['tracks_short']} frames past the end of the tracks, not drawn]"
+    if show_stats:
+        stats = result["stats"]
+        for stage, info in stats["stages"].items():
+            line += f"\n    {stage:<14} {info['seconds']:8.3f}s {info['fps']:10.1f} fps"
+            if "p95" in info:
+                line += f"  (last {info['p50']:.2f} / {info['p95']:.2f} / {info['p99']:.2f} ms p50/p95/p99)"
+        for gauge, info in stats["gauges"].items():
+            line += f"\n    {gauge:<14} avg {info['avg']} / max {info['max']} of {info['capacity']}"
+        for counter, value in stats.get("counters", {}).items():
+            line += f"\n    {counter:<14} {value}"
+    return line
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m src.cli",
+                                     description="Render BlobTrack overlays without the GUI.")
+    parser.add_argument("inputs", nargs="+", help="Video files or glob patterns.")
+    parser.add_argument("-s", "--settings", help="JSON file with 'params' and 'visuals' sections.")
+    parser.add_argument("-o", "--output-dir", help="Directory for rendered files (default: next to input).")
+    parser.add_argument("-w", "--workers", type=int, default=max(1, (os.cpu_count() or 1) // 2),
+                        help="Number of files processed concurrently.")
+    parser.add_argument("--io-depth", type=int, default=DEFAULT_QUEUE_DEPTH,
+                        help="Frames buffered by the decode/encode threads (0 = decode and encode inline).")
+    parser.add_argument("--stats", action="store_true", help="Print per-stage timings and queue depths.")
+    parser.add_argument("--json", action="store_true", help="Print the summary as JSON.")
+    parser.add_argument("--trace", choices=["csv", "json"],
+                        help="Write per-frame stage timings to <output>.trace.csv/.json.")
+    parser.add_argument("--save-tracks", action="store_true",
+                        help="Save detections and tracks next to each input as <video>.blobs.")
+    parser.add_argument("--tracks", nargs="?", const="", metavar="FILE",
+                        help="Render only: draw a saved track file (default: each input's <video>.blobs) "
+                             "instead of detecting and tracking. Detection settings are ignored.")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    params, visuals = load_settings(args.settings)
+
+    inputs = expand_inputs(args.inputs)
+    missing = [p for p in inputs if not os.path.isfile(p)]
+    for path in missing:
+        print(f"Skipping {path}: file not found", file=sys.stderr)
+    inputs = [p for p in inputs if p not in missing]
+    if not inputs:
+        print("No input files.", file=sys.stderr)
+        return 1
+
+    if args.tracks and len(inputs) > 1:
+        print("--tracks FILE takes a single input; use --tracks alone for each input's sidecar.",
+              file=sys.stderr)
+        return 1
+
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+
+    jobs = [(p, output_path_for(p, args.output_dir), params, visuals, args.io_depth, args.trace,
+             args.tracks, args.save_tracks)
+            for p in inputs]
+    results = []
+    started = time.perf_counter()
+
+    if args.workers <= 1 or len(jobs) == 1:
+        for job in jobs:
+            result = render_file(*job)
+            results.append(result)
+            if not args.json:
+                print(format_result(result, args.stats))
+    else:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            futures = [pool.submit(render_file, *job) for job in jobs]
+            for future in as_completed(futures):
+                result = future.result()
+                results.append(result)
+                if not args.json:
+                    print(format_result(result, args.stats))
+
+    total_frames = sum(r.get("frames", 0) for r in results)
+    wall = time.perf_counter() - started
+    if args.json:
+        print(json.dumps({"files": results, "frames": total_frames, "seconds": round(wall, 3)}, indent=2))
+    else:
+        print(f"Total: {len(results)} files, {total_frames} frames in {wall:.2f}s "
+              f"({total_frames / wall if wall > 0 else 0:.1f} fps aggregate)")
+
+    return 1 if any("error" in r for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
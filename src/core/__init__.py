@@ -1,4 +1,18 @@
 # Core Package
-from src.core.video_processor import VideoProcessor
 from src.core.tracking import CentroidTracker, BlobDetector
 from src.core.enums import DetectionMode, VisualStyle
+
+_PIPELINE_NAMES = ("PipelineEngine", "VideoFileSource", "VideoFileSink")
+
+
+def __getattr__(name):
+    # VideoProcessor is a QThread; import it lazily so headless users of
+    # src.core (CLI, worker processes) never load PyQt6.
+    if name == "VideoProcessor":
+        from src.core.video_processor import VideoProcessor
+        return VideoProcessor
+    # The pipeline imports src.visuals, which itself imports src.core.enums
+    if name in _PIPELINE_NAMES:
+        from src.core import pipeline
+        return getattr(pipeline, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,239 @@
+import numpy as np
+
+try:
+    from scipy.optimize import linear_sum_assignment as _scipy_lsa
+except ImportError: # scipy is optional, fall back to the NumPy solver below
+    _scipy_lsa = None
+
+
+def gate(D, max_distance=None):
+    """Returns D as float64 with pairs farther than max_distance set to inf (copied if gated)."""
+    D = np.asarray(D, dtype=np.float64)
+    if max_distance:
+        D = D.copy()
+        D[D > max_distance] = np.inf
+    return D
+
+
+def greedy_assign(D, max_distance=None):
+    """Greedy nearest-first matching on a cost matrix (rows: objects, cols: detections).
+
+    Each column takes its nearest row, columns closest to theirs first; a column
+    whose nearest row is already taken stays unmatched (no second choice). This is
+    CentroidTracker's original matching, vectorized: the first column per row in
+    that order wins. Returns (rows, cols) index arrays.
+    """
+    D = gate(D, max_distance)
+    if D.size == 0:
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+    best_row = D.argmin(axis=0)
+    best_val = D[best_row, np.arange(D.shape[1])]
+    order = best_val.argsort() # Same sort as the original loop, for identical ties
+    order = order[np.isfinite(best_val[order])]
+    return _first_claims(best_row[order], order)
+
+
+def _first_claims(rows, cols):
+    # Keeps the first (row, col) pair per row, in the given order
+    _, first = np.unique(rows, return_index=True)
+    first.sort()
+    return rows[first].astype(np.intp), cols[first].astype(np.intp)
+
+
+def _hungarian(cost):
+    # Shortest augmenting path (Hungarian / Jonker-Volgenant) for n <= m,
+    # inner loop vectorized over columns. Returns col assigned to each row.
+    n, m = cost.shape
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    p = np.zeros(m + 1, dtype=np.intp)   # p[j] = row (1-based) matched to column j
+    way = np.zeros(m + 1, dtype=np.intp)
+
+    for i in range(1, n + 1):
+        p[0] = i
+        j0 = 0
+        minv = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype=bool)
+        while True:
+            used[j0] = True
+            i0 = p[j0]
+            free = ~used[1:]
+            cur = cost[i0 - 1] - u[i0] - v[1:]
+            better = free & (cur < minv[1:])
+            minv[1:][better] = cur[better]
+            way[1:][better] = j0
+
+            candidates = np.where(free, minv[1:], np.inf)
+            j1 = int(np.argmin(candidates)) + 1
+            delta = candidates[j1 - 1]
+
+            used_cols = np.nonzero(used)[0]
+            u[p[used_cols]] += delta
+            v[used_cols] -= delta
+            minv[1:][free] -= delta
+
+            j0 = j1
+            if p[j0] == 0:
+                break
+        while j0:
+            j1 = way[j0]
+            p[j0] = p[j1]
+            j0 = j1
+
+    row_to_col = np.zeros(n, dtype=np.intp)
+    cols = np.nonzero(p[1:])[0]
+    row_to_col[p[1:][cols] - 1] = cols
+    return row_to_col
+
+
+def linear_sum_assign(D, max_distance=None):
+    """Minimum total-distance matching (scipy if available, NumPy otherwise).
+
+    Gated pairs are never returned. Returns (rows, cols) index arrays.
+    """
+    D = gate(D, max_distance)
+    if D.size == 0:
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+
+    finite = np.isfinite(D)
+    if not finite.any():
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+    # Replace gated pairs with a cost larger than any complete finite matching
+    big = (D[finite].max() + 1.0) * (min(D.shape) + 1)
+    cost = np.where(finite, D, big)
+
+    if _scipy_lsa is not None:
+        rows, cols = _scipy_lsa(cost)
+    elif cost.shape[0] <= cost.shape[1]:
+        rows = np.arange(cost.shape[0])
+        cols = _hungarian(cost)
+    else:
+        cols = np.arange(cost.shape[1])
+        rows = _hungarian(cost.T)
+
+    valid = finite[rows, cols]
+    return np.asarray(rows)[valid], np.asarray(cols)[valid]
+
+
+# --- SPATIAL (SPARSE) MATCHING ---
+def grid_candidates(points_a, points_b, radius):
+    """All pairs (i, j) with |a_i - b_j| <= radius, found through a uniform grid.
+
+    Points are bucketed into cells of size `radius`, so only the 3x3 neighbouring
+    cells are compared and the cost scales with the number of nearby pairs instead
+    of N x M. Returns (rows, cols, squared_distances).
+    """
+    a = np.asarray(points_a, dtype=np.float64).reshape(-1, 2)
+    b = np.asarray(points_b, dtype=np.float64).reshape(-1, 2)
+    empty = (np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp), np.empty(0))
+    if len(a) == 0 or len(b) == 0 or not radius or radius <= 0:
+        return empty
+
+    cell_a = np.floor(a / radius).astype(np.int64)
+    cell_b = np.floor(b / radius).astype(np.int64)
+    # Shift cells to start at 1 so neighbour offsets never go negative
+    origin = np.minimum(cell_a.min(axis=0), cell_b.min(axis=0)) - 1
+    cell_a -= origin
+    cell_b -= origin
+    span = int(max(cell_a[:, 1].max(), cell_b[:, 1].max())) + 2
+
+    keys_b = cell_b[:, 0] * span + cell_b[:, 1]
+    order = np.argsort(keys_b, kind="stable")
+    sorted_keys = keys_b[order]
+
+    rows_parts, cols_parts = [], []
+    row_ids = np.arange(len(a))
+    for dx in (-1, 0, 1):
+        for dy in (-1, 0, 1):
+            query = (cell_a[:, 0] + dx) * span + (cell_a[:, 1] + dy)
+            lo = np.searchsorted(sorted_keys, query, side="left")
+            hi = np.searchsorted(sorted_keys, query, side="right")
+            counts = hi - lo
+            total = int(counts.sum())
+            if total == 0:
+                continue
+            # Expand each [lo, hi) range into explicit indices
+            starts = np.repeat(lo - (np.cumsum(counts) - counts), counts)
+            rows_parts.append(np.repeat(row_ids, counts))
+            cols_parts.append(order[starts + np.arange(total)])
+
+    if not rows_parts:
+        return empty
+    rows = np.concatenate(rows_parts)
+    cols = np.concatenate(cols_parts)
+    delta = a[rows] - b[cols]
+    sq_dist = np.einsum('ij,ij->i', delta, delta)
+    keep = sq_dist <= radius * radius
+    return rows[keep], cols[keep], sq_dist[keep]
+
+
+def _first_per_group(groups, costs, ties):
+    # Index of the cheapest edge per group (ties broken by lowest `ties` index)
+    order = np.lexsort((ties, costs, groups))
+    g = groups[order]
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = g[1:] != g[:-1]
+    return order[first]
+
+
+def sparse_greedy_assign(rows, cols, costs):
+    """greedy_assign over an explicit candidate list instead of a dense matrix.
+    Equal costs may resolve in a different order than the dense version."""
+    rows = np.asarray(rows, dtype=np.intp)
+    cols = np.asarray(cols, dtype=np.intp)
+    costs = np.asarray(costs, dtype=np.float64)
+    if rows.size == 0:
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+    best = _first_per_group(cols, costs, rows) # Nearest row per col, by col
+    best = best[np.argsort(costs[best], kind="stable")]
+    return _first_claims(rows[best], cols[best])
+
+
+def _edge_components(rows, cols):
+    # Connected components of the bipartite candidate graph (min-label propagation)
+    row_nodes, row_inv = np.unique(rows, return_inverse=True)
+    col_nodes, col_inv = np.unique(cols, return_inverse=True)
+    u = row_inv
+    v = col_inv + len(row_nodes)
+    labels = np.arange(len(row_nodes) + len(col_nodes))
+    while True:
+        edge_min = np.minimum(labels[u], labels[v])
+        new = labels.copy()
+        np.minimum.at(new, u, edge_min)
+        np.minimum.at(new, v, edge_min)
+        new = new[new] # pointer jumping
+        if np.array_equal(new, labels):
+            return labels[u]
+        labels = new
+
+
+def sparse_linear_sum_assign(rows, cols, costs):
+    """linear_sum_assign over a candidate list, solved per connected component."""
+    rows = np.asarray(rows, dtype=np.intp)
+    cols = np.asarray(cols, dtype=np.intp)
+    costs = np.asarray(costs, dtype=np.float64)
+    if rows.size == 0:
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+
+    component = _edge_components(rows, cols)
+    order = np.argsort(component, kind="stable")
+    bounds = np.flatnonzero(np.diff(component[order])) + 1
+    sizes = np.diff(np.concatenate([[0], bounds, [len(order)]]))
+
+    # Isolated pairs (one candidate edge) need no solver
+    single = np.repeat(sizes == 1, sizes)
+    out_rows = [rows[order[single]]]
+    out_cols = [cols[order[single]]]
+
+    for edges in np.split(order, bounds):
+        if len(edges) == 1:
+            continue
+        sub_rows, r_inv = np.unique(rows[edges], return_inverse=True)
+        sub_cols, c_inv = np.unique(cols[edges], return_inverse=True)
+        D = np.full((len(sub_rows), len(sub_cols)), np.inf)
+        D[r_inv, c_inv] = costs[edges]
+        r, c = linear_sum_assign(D)
+        out_rows.append(sub_rows[r])
+        out_cols.append(sub_cols[c])
+
+    return np.concatenate(out_rows), np.concatenate(out_cols)
@@ -0,0 +1,53 @@
+import numpy as np
+
+
+class BufferPool:
+    """Reusable scratch arrays for the per-frame pipeline.
+
+    Each call site asks for a named slot with the shape/dtype it needs and gets
+    the same array back every frame, to hand to OpenCV as `dst=`. A slot is only
+    reallocated when its shape or dtype changes (new video, detection scale...),
+    so steady-state processing allocates nothing here. The contents of a slot are
+    valid until the same slot is requested again, i.e. for the rest of the frame.
+
+    Allocation counts go to `stats` (a StageStats) as the buffer_allocs and
+    buffer_bytes counters when given.
+    """
+
+    def __init__(self, stats=None):
+        self.stats = stats
+        self.buffers = {} # (slot, shape, dtype) -> ndarray
+        self.allocations = 0
+        self.allocated_bytes = 0
+
+    def get(self, slot, shape, dtype=np.uint8):
+        key = (slot, tuple(shape), np.dtype(dtype).str)
+        buffer = self.buffers.get(key)
+        if buffer is None:
+            # Drop stale sizes of this slot so a resolution change does not leak
+            for stale in [k for k in self.buffers if k[0] == slot]:
+                del self.buffers[stale]
+            buffer = self.buffers[key] = np.empty(shape, dtype)
+            self.allocations += 1
+            self.allocated_bytes += buffer.nbytes
+            if self.stats is not None:
+                self.stats.count("buffer_allocs")
+                self.stats.count("buffer_bytes", buffer.nbytes)
+        return buffer
+
+    def like(self, slot, array):
+        return self.get(slot, array.shape, array.dtype)
+
+    def nbytes(self):
+        """Memory currently held by the pool."""
+        return sum(buffer.nbytes for buffer in self.buffers.values())
+
+    def clear(self):
+        self.buffers = {}
+
+
+def pooled(pool, slot, shape, dtype=np.uint8):
+    """pool.get() that tolerates pool=None (then OpenCV allocates as usual)."""
+    if pool is None:
+        return None
+    return pool.get(slot, shape, dtype)
@@ -0,0 +1,37 @@
+from src.visuals.cache import RenderCache
+
+DEFAULT_MAX_BYTES = 32 * 2**20
+ENTRY_OVERHEAD = 200 # Approximate Python/NumPy bytes per entry on top of the rects
+
+
+class Detection:
+    __slots__ = ("rects", "nbytes")
+
+    def __init__(self, rects):
+        self.rects = rects
+        self.nbytes = rects.nbytes + ENTRY_OVERHEAD
+
+
+class DetectionCache(RenderCache):
+    """Detected rects per (frame index, BlobDetector.params_key()) of one video.
+
+    Lets the preview skip detection on frames it already processed with the same
+    detector settings: when looping, scrubbing back, or while only visuals or
+    tracking settings change. Any detector change gives new keys; the old entries
+    age out of the LRU.
+
+    Counters: detect_cache_hits, detect_cache_misses, detect_cache_bytes.
+    """
+
+    counter = "detect_cache"
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, stats=None):
+        super().__init__(max_bytes, stats)
+
+    def get(self, frame_idx, params_key):
+        """Cached rects or None."""
+        entry = self.lookup((frame_idx, params_key))
+        return entry.rects if entry is not None else None
+
+    def put(self, frame_idx, params_key, rects):
+        self.store((frame_idx, params_key), Detection(rects))
@@ -0,0 +1,70 @@
+import threading
+import cv2
+from src.core.buffers import BufferPool
+
+DEFAULT_SLOTS = 3 # On screen, queued to the GUI, being rendered
+
+
+def fit_size(width, height, box_width, box_height):
+    """Largest width x height with the same aspect ratio that fits the box (Qt's KeepAspectRatio)."""
+    if box_width <= 0 or box_height <= 0:
+        return width, height
+    scaled_width = box_height * width // height
+    if scaled_width <= box_width:
+        return max(1, scaled_width), box_height
+    return box_width, max(1, box_width * height // width)
+
+
+class DisplayFrame:
+    """A rendered slot on its way to the GUI. Call release() once it is off screen."""
+    __slots__ = ("buffers", "slot", "image", "ambient")
+
+    def __init__(self, buffers, slot, image, ambient):
+        self.buffers = buffers
+        self.slot = slot
+        self.image = image
+        self.ambient = ambient
+
+    def release(self):
+        if self.slot is not None:
+            self.buffers.release(self.slot)
+            self.slot = None
+
+
+class DisplayBuffers:
+    """Preallocated 32-bit RGB frames at display resolution, shared with the GUI.
+
+    The worker scales and converts into a free slot and the GUI wraps it in a
+    QImage (no copy). With Qt's raster pixmaps, QPixmap.fromImage() of RGB32 keeps
+    reading that same buffer (checked by VideoPlayer's pixmap_shares_buffer()), so
+    the GUI releases the slot once the next frame replaces it on screen; on a
+    backend that copies, right after fromImage(). A slot is never written while it
+    is in flight. When every slot is (GUI lagging behind), acquire() returns None and
+    that frame is not displayed, instead of queuing full-size copies of it.
+    """
+
+    def __init__(self, slots=DEFAULT_SLOTS, stats=None):
+        self.lock = threading.Lock()
+        self.free = list(range(slots))
+        self.pools = [BufferPool(stats) for _ in range(slots)]
+
+    def acquire(self):
+        """Index of a free slot, or None."""
+        with self.lock:
+            return self.free.pop() if self.free else None
+
+    def release(self, slot):
+        with self.lock:
+            self.free.append(slot)
+
+    def render(self, slot, frame, size, name="image"):
+        """frame (BGR) scaled to size = (width, height), as BGRA (Qt RGB32) in the slot's buffer."""
+        pool = self.pools[slot]
+        width, height = size
+        frame_height, frame_width = frame.shape[:2]
+        if (width, height) != (frame_width, frame_height):
+            # Area averaging is only worth its cost when shrinking by 2x or more
+            interpolation = cv2.INTER_AREA if width * 2 <= frame_width else cv2.INTER_LINEAR
+            frame = cv2.resize(frame, (width, height), dst=pool.get(name + "_scaled", (height, width, 3)),
+                               interpolation=interpolation)
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2BGRA, dst=pool.get(name, (height, width, 4)))
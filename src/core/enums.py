@@ -5,6 +5,14 @@ class DetectionMode(str, Enum):
     EDGES = "Edges"
     COLOR = "Color"
 
+class DetectionBackend(str, Enum):
+    CONTOURS = "Contours"
+    COMPONENTS = "Components"
+
+class AssignmentMode(str, Enum):
+    GREEDY = "Greedy"
+    OPTIMAL = "Optimal"
+
 class VisualStyle(str, Enum):
     SQUARE = "Square"
     CIRCLE = "Circle"
@@ -0,0 +1,287 @@
+import threading
+import time
+import cv2
+import numpy as np
+from src.core.profiler import StageStats
+from src.core.keyframes import keyframe_index
+from src.visuals.cache import RenderCache
+
+DEFAULT_MAX_BYTES = 256 * 2**20
+DEFAULT_PROXY_BYTES = 32 * 2**20
+DEFAULT_READ_AHEAD = 12 # Frames decoded past the playhead
+SEEK_BACKOFF = 16 # OpenCV's FFmpeg seek lands on the keyframe before target - 16, then grabs forward
+PROXY_WIDTH = 320
+
+
+class FrameCache(RenderCache):
+    """Decoded frames by index, LRU within a byte budget.
+
+    Counters: frame_cache_hits, frame_cache_misses, frame_cache_bytes.
+    """
+
+    counter = "frame_cache"
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, stats=None):
+        super().__init__(max_bytes, stats)
+
+    def store(self, key, entry, keep=range(0)):
+        """RenderCache.store() that never evicts the keys in `keep` (the read-ahead
+        window): frames just played are more recent than the ones about to be."""
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self._account(-old.nbytes)
+        self.entries[key] = entry
+        self._account(entry.nbytes)
+        if self.nbytes > self.max_bytes:
+            for old_key in [k for k in self.entries if k != key and k not in keep]:
+                if self.nbytes <= self.max_bytes:
+                    break
+                self.evictions += 1
+                self._account(-self.entries.pop(old_key).nbytes)
+        return entry
+
+
+class ProxyCache(FrameCache):
+    """Small copies (PROXY_WIDTH wide) of every decoded frame, for scrubbing.
+    Keyframe proxies are evicted last, so scrubbing back over played parts of the
+    video always finds one nearby.
+
+    Counters: proxy_hits, proxy_misses, proxy_bytes.
+    """
+
+    counter = "proxy"
+
+    def __init__(self, max_bytes=DEFAULT_PROXY_BYTES, stats=None):
+        super().__init__(max_bytes, stats)
+        self.keyframes = None # KeyframeIndex, set once scanned
+
+    def store(self, key, entry):
+        super().store(key, entry, keep=self.keyframes or ())
+        # Still over budget: only keyframes are left, drop the oldest of them
+        for old_key in [k for k in self.entries if k != key]:
+            if self.nbytes <= self.max_bytes:
+                break
+            self.evictions += 1
+            self._account(-self.entries.pop(old_key).nbytes)
+        return entry
+
+
+class CachedFrameSource:
+    """Frame source for the preview: decodes on a background thread into a FrameCache.
+
+    The decoder keeps the cache filled from the playhead up to read_ahead frames past
+    it. read() serves the playhead frame from the cache, waiting for the decoder
+    only on a miss, and seek() just moves the playhead: revisited and neighbouring
+    frames never touch the decoder, and a burst of seeks only costs a decode for
+    wherever the playhead ends up (a read() still waiting follows it there).
+
+    With a keyframe index (built on the side, see src.core.keyframes) the decoder
+    decodes through instead of seeking whenever that is the shorter way to the
+    target: a seek restarts from a keyframe before it (see SEEK_BACKOFF). Until the
+    index is ready, short hops forward are decoded through. Frames only decoded
+    on the way to the playhead are grabbed, not converted or kept.
+
+    keyframes: a KeyframeIndex when the caller has one; otherwise the source's file
+    is scanned on a thread of its own, stopped and joined by release().
+
+    read() copies the cached frame into the caller's image, since the pipeline draws
+    on it. Decode timings go to `stats` (merged as io_* like ThreadedFrameReader's).
+    """
+
+    def __init__(self, source, cache=None, proxies=None, read_ahead=DEFAULT_READ_AHEAD, keyframes=None):
+        self.source = source
+        self.width = source.width
+        self.height = source.height
+        self.fps = source.fps
+        self.frame_count = source.frame_count
+        self.cache = cache if cache is not None else FrameCache()
+        self.proxies = proxies
+        self.read_ahead = read_ahead
+        self.stats = StageStats()
+
+        self.cond = threading.Condition()
+        self.position = 0 # Frame the next read() returns
+        self.current = -1 # Frame the last read() returned
+        self.decode_pos = 0 # Frame the decoder reads next
+        self.end = None # First index past the last frame, once a sequential read failed there
+        self.retry = None # (target, restart): a read failed right after seeking to target
+        self.through = -1 # Decode through up to here without seeking (retrying a failed seek)
+        self.keyframes = None # KeyframeIndex once known, if the file allows it
+        self.error = None
+        self._stop = False
+        self._thread = threading.Thread(target=self._run, name="FrameCacheDecoder", daemon=True)
+        self._scan_thread = None
+        if keyframes is not None:
+            self._set_keyframes(keyframes)
+        elif getattr(source, "path", None):
+            self._scan_thread = threading.Thread(target=self._load_keyframes, name="KeyframeScan", daemon=True)
+            self._scan_thread.start()
+        self._thread.start()
+
+    def is_opened(self):
+        return self.source.is_opened()
+
+    def seek(self, frame_idx):
+        with self.cond:
+            self.position = max(0, int(frame_idx))
+            if self.end is not None and self.position >= self.end:
+                self.end = None # Only a hint: look again
+            self.cond.notify_all()
+
+    def read(self, image=None):
+        """(ret, frame) at the playhead; the frame index is then in `current`."""
+        with self.cond:
+            frame_idx = self.position
+            frame = self.cache.lookup(frame_idx)
+            while frame is None:
+                if self.error is not None:
+                    raise self.error
+                if self.end is not None and frame_idx >= self.end:
+                    return False, None
+                self.cond.wait()
+                if self.position != frame_idx:
+                    # Seeked while waiting: only the latest target is worth decoding
+                    frame_idx = self.position
+                    frame = self.cache.lookup(frame_idx)
+                else:
+                    frame = self.cache.entries.get(frame_idx)
+            self.current = frame_idx
+            self.position = frame_idx + 1
+            self.cond.notify_all() # Playhead moved, the decoder may have room again
+        if image is None or image.shape != frame.shape:
+            return True, frame.copy()
+        np.copyto(image, frame)
+        return True, image
+
+    def is_decoded(self, frame_idx):
+        with self.cond:
+            return frame_idx in self.cache.entries
+
+    def preview(self, frame_idx):
+        """Closest decoded frame at or before frame_idx, down to its keyframe, as
+        (index, image) where image is a full frame or a proxy; None if there is none.
+        Never waits on the decoder. The image is shared with the caches, read only.
+        """
+        with self.cond:
+            return self._nearest_decoded(frame_idx)
+
+    def _nearest_decoded(self, frame_idx):
+        lowest = self.keyframes.before(frame_idx) if self.keyframes else frame_idx - self.read_ahead
+        for i in range(frame_idx, max(lowest, 0) - 1, -1):
+            frame = self.cache.entries.get(i)
+            if frame is None and self.proxies is not None:
+                frame = self.proxies.entries.get(i)
+            if frame is not None:
+                return i, frame
+        return None
+
+    def proxy(self, frame_idx):
+        """Proxy of a frame if one was kept, else None."""
+        if self.proxies is None:
+            return None
+        with self.cond:
+            return self.proxies.lookup(frame_idx)
+
+    def _window(self):
+        """Frames from the playhead to read_ahead past it, fewer if the budget is small."""
+        ahead = self.read_ahead
+        if self.cache.entries:
+            frame_bytes = next(iter(self.cache.entries.values())).nbytes
+            ahead = max(1, min(ahead, self.cache.max_bytes // max(frame_bytes, 1) // 2))
+        return range(self.position, self.position + ahead)
+
+    def _next_to_decode(self):
+        """Frame the decoder should produce next, or None when the window is full."""
+        for frame_idx in self._window():
+            if self.end is not None and frame_idx >= self.end:
+                return None
+            if frame_idx not in self.cache.entries:
+                return frame_idx
+        return None
+
+    def _run(self):
+        try:
+            while True:
+                with self.cond:
+                    target = self._next_to_decode()
+                    while not self._stop and target is None:
+                        self.cond.wait()
+                        target = self._next_to_decode()
+                    if self._stop:
+                        return
+                    restart = target
+                    if self.retry is not None and self.retry[0] == target:
+                        # Inexact seeks fail too: decode through from further back before
+                        # taking it for the end
+                        seek, restart, self.through = True, self.retry[1], target
+                        self.retry = None
+                    elif self.decode_pos <= target <= self.through:
+                        seek = False
+                    elif self.keyframes:
+                        # A seek decodes from the keyframe before target - SEEK_BACKOFF: decode
+                        # through instead when we are already past that keyframe
+                        keyframe = self.keyframes.before(max(0, target - SEEK_BACKOFF))
+                        seek = not keyframe <= self.decode_pos <= target
+                    else:
+                        # Short hops forward: decoding the frames in between is cheaper than a seek
+                        seek = not self.decode_pos <= target <= self.decode_pos + self.read_ahead
+                    if seek:
+                        self.decode_pos = restart
+                    frame_idx = self.decode_pos
+                    # Frames decoded through on the way to the playhead are not kept
+                    skip = frame_idx < self.position
+
+                start = time.perf_counter()
+                if seek:
+                    self.source.seek(frame_idx)
+                if skip:
+                    ret, frame = self.source.grab(), None
+                else:
+                    ret, frame = self.source.read()
+                self.stats.add("decode", time.perf_counter() - start)
+
+                with self.cond:
+                    if not ret:
+                        if seek and frame_idx > 0:
+                            self.retry = (target, max(0, frame_idx - SEEK_BACKOFF))
+                        else:
+                            self.end = frame_idx
+                        self.decode_pos = -1 - self.read_ahead # Seek next time
+                    else:
+                        if frame is not None:
+                            self.cache.store(frame_idx, frame, keep=self._window())
+                            if self.proxies is not None:
+                                self.proxies.store(frame_idx, make_proxy(frame))
+                        self.decode_pos = frame_idx + 1
+                    self.cond.notify_all()
+        except Exception as e:
+            with self.cond:
+                self.error = e
+                self.cond.notify_all()
+
+    def _load_keyframes(self):
+        index = keyframe_index(self.source.path, should_stop=lambda: self._stop)
+        with self.cond:
+            if not self._stop:
+                self._set_keyframes(index)
+
+    def _set_keyframes(self, index):
+        self.keyframes = index
+        if self.proxies is not None:
+            self.proxies.keyframes = index
+
+    def release(self):
+        with self.cond:
+            self._stop = True
+            self.cond.notify_all()
+        self._thread.join()
+        if self._scan_thread is not None:
+            self._scan_thread.join()
+        self.source.release()
+
+
+def make_proxy(frame, width=PROXY_WIDTH):
+    h, w = frame.shape[:2]
+    if w <= width:
+        return frame.copy()
+    return cv2.resize(frame, (width, max(1, h * width // w)), interpolation=cv2.INTER_AREA)
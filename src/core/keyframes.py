@@ -0,0 +1,88 @@
+import os
+import threading
+from bisect import bisect_right
+import cv2
+
+_INDEXES = {} # (path, size, mtime) -> KeyframeIndex, so reopening a file does not scan it again
+_INDEXES_LOCK = threading.Lock()
+
+
+class KeyframeIndex:
+    """Frame indices of a video's keyframes (sorted), where a seek can start decoding."""
+
+    def __init__(self, keyframes):
+        self.keyframes = list(keyframes)
+
+    def before(self, frame_idx):
+        """Last keyframe at or before frame_idx."""
+        i = bisect_right(self.keyframes, frame_idx)
+        return self.keyframes[i - 1] if i else 0
+
+    def __contains__(self, frame_idx):
+        return self.before(frame_idx) == frame_idx and bool(self.keyframes)
+
+    def __len__(self):
+        return len(self.keyframes)
+
+
+def scan_keyframes(path, should_stop=None):
+    """KeyframeIndex from a demux-only pass over the file (packets are read, not decoded).
+
+    Needs OpenCV's FFmpeg backend with raw stream reading; returns None without it,
+    or when the flags look unusable (no keyframe past the first on a long video).
+    Packets come in decode order, which only differs from display order around
+    B-frames: an index that is off by a frame or two still seeks correctly, since
+    seeks are exact, it just decodes a little more. Also None when should_stop()
+    turns true before the end.
+    """
+    if not hasattr(cv2, "CAP_PROP_LRF_HAS_KEY_FRAME"):
+        return None
+    cap = cv2.VideoCapture(path, cv2.CAP_FFMPEG)
+    try:
+        if not cap.isOpened() or not cap.set(cv2.CAP_PROP_FORMAT, -1):
+            return None
+        keyframes = []
+        frame_idx = 0
+        while cap.grab():
+            if should_stop and should_stop():
+                return None
+            if cap.get(cv2.CAP_PROP_LRF_HAS_KEY_FRAME):
+                keyframes.append(frame_idx)
+            frame_idx += 1
+    finally:
+        cap.release()
+    if not keyframes or (len(keyframes) == 1 and frame_idx > 1000):
+        return None
+    return KeyframeIndex(keyframes)
+
+
+def _memo_key(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (os.path.abspath(path), stat.st_size, stat.st_mtime)
+
+
+def cached_keyframe_index(path):
+    """keyframe_index(path) if it was built already (None otherwise), without scanning."""
+    key = _memo_key(path)
+    with _INDEXES_LOCK:
+        return _INDEXES.get(key)
+
+
+def keyframe_index(path, should_stop=None):
+    """scan_keyframes(path), built once per file (and version of it) per process.
+    A scan stopped by should_stop() returns None and is not remembered."""
+    key = _memo_key(path)
+    if key is None:
+        return None
+    with _INDEXES_LOCK:
+        if key in _INDEXES:
+            return _INDEXES[key]
+    index = scan_keyframes(path, should_stop)
+    if should_stop and should_stop():
+        return None
+    with _INDEXES_LOCK:
+        _INDEXES[key] = index
+    return index
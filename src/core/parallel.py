@@ -0,0 +1,87 @@
+import os
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import cv2
+from src.core.tracking import BlobDetector
+from src.core.profiler import StageStats
+
+DEFAULT_CHUNK_SIZE = 120
+
+
+def default_workers():
+    return max(1, (os.cpu_count() or 1) - 1)
+
+
+def split_frame_ranges(total_frames, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Splits [0, total_frames) into (start, stop) ranges. The last range is open-ended
+    (stop=None) because CAP_PROP_FRAME_COUNT is only an estimate for many containers."""
+    chunk_size = max(1, int(chunk_size))
+    ranges = [(start, start + chunk_size) for start in range(0, max(total_frames, 1), chunk_size)]
+    start, _ = ranges[-1]
+    ranges[-1] = (start, None)
+    return ranges
+
+
+def detect_frame_range(input_path, params, start, stop):
+    """Worker entry point: decodes frames [start, stop) and runs detection on each.
+
+    Returns (start, [rects per frame], StageStats with chunk_* stages, summed over
+    workers when merged: CPU time, not wall clock). Only rects travel back to the
+    parent process, frames are decoded again there for drawing/encoding.
+    If the seek does not land on start (inexact on some containers), no rects are
+    returned and the parent detects that range itself.
+    """
+    stats = StageStats()
+    detector = BlobDetector()
+    detector.update_params(params)
+
+    cap = cv2.VideoCapture(input_path)
+    if start > 0:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+        if int(cap.get(cv2.CAP_PROP_POS_FRAMES)) != start:
+            stats.count("chunk_seek_miss")
+            cap.release()
+            return start, [], stats
+
+    results = []
+    frame_idx = start
+    while stop is None or frame_idx < stop:
+        with stats.time("chunk_decode"):
+            ret, frame = cap.read()
+        if not ret:
+            break
+        with stats.time("chunk_detect"):
+            rects, _, _ = detector.detect(frame, keypoints=False)
+        results.append(rects)
+        frame_idx += 1
+
+    cap.release()
+    return start, results, stats
+
+
+def iter_parallel_detections(input_path, params, total_frames, workers=None,
+                             chunk_size=DEFAULT_CHUNK_SIZE, stats=None):
+    """Runs BlobDetector.detect over frame chunks in a process pool.
+
+    Yields (frame_idx, rects) strictly in frame order, so the caller can feed a single
+    CentroidTracker and keep IDs continuous across chunk boundaries. Time the
+    caller spends waiting on the pool goes to stats as detect_wait.
+    """
+    workers = workers or default_workers()
+    # Spawn instead of fork: the parent usually owns a running QThread/event loop.
+    ctx = multiprocessing.get_context("spawn")
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=ctx)
+    try:
+        futures = [pool.submit(detect_frame_range, input_path, dict(params), start, stop)
+                   for start, stop in split_frame_ranges(total_frames, chunk_size)]
+        for future in futures:
+            waited = time.perf_counter()
+            start, chunk, chunk_stats = future.result()
+            if stats is not None:
+                stats.add("detect_wait", time.perf_counter() - waited, len(chunk))
+                stats.merge(chunk_stats)
+            for offset, rects in enumerate(chunk):
+                yield start + offset, rects
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,35 @@
+import threading
+
+
+class ParamChannel:
+    """Latest-wins hand-off of detection/tracking parameters between threads.
+
+    The GUI thread publish()es as often as its widgets fire; each call merges into
+    one pending snapshot and bumps a version number, holding the lock only for a
+    dict update. The processing thread take()s the snapshot once per frame, between
+    frames, so a burst of slider moves is applied once and a detect() never runs
+    with half of an update.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.version = 0 # Bumped by every publish()
+        self.pending = {}
+
+    def publish(self, params):
+        params = dict(params) # The caller may keep mutating its dict
+        with self.lock:
+            self.pending.update(params)
+            self.version += 1
+
+    def take(self, since):
+        """(version, params) published after version `since`, or None if nothing new.
+
+        Publishes in between are merged, the latest value of each key wins.
+        """
+        with self.lock:
+            if self.version == since:
+                return None
+            version, params = self.version, self.pending
+            self.pending = {}
+        return version, params
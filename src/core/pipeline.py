@@ -0,0 +1,257 @@
+import cv2
+import numpy as np
+from collections import OrderedDict
+from src.core.tracking import BlobDetector, CentroidTracker, DEFAULT_PARAMS
+from src.core.profiler import StageStats
+from src.core.buffers import BufferPool
+from src.core.params import ParamChannel
+from src.core.trackfile import settings_hash
+from src.core.threaded_io import open_threaded, DEFAULT_QUEUE_DEPTH
+from src.core.enums import VisualStyle
+from src.visuals import VisualStateManager, Visualizer
+from src.visuals.settings import VisualSettingsApplier
+
+
+# --- FRAME SOURCES / SINKS ---
+class VideoFileSource:
+    """Frame source backed by cv2.VideoCapture."""
+
+    def __init__(self, path):
+        self.path = path
+        self.cap = cv2.VideoCapture(path)
+        self.width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS)
+        self.frame_count = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+
+    def is_opened(self):
+        return self.cap.isOpened()
+
+    def read(self, image=None):
+        # Passing a previously returned frame lets OpenCV decode into it in place
+        return self.cap.read(image)
+
+    def grab(self):
+        # Decodes the next frame without converting it, for skipping ahead
+        return self.cap.grab()
+
+    def seek(self, frame_idx):
+        self.cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx)
+
+    def release(self):
+        self.cap.release()
+
+
+class VideoFileSink:
+    """Frame sink backed by cv2.VideoWriter."""
+
+    def __init__(self, path, fps, size, fourcc="mp4v"):
+        self.path = path
+        self.writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*fourcc), fps, size)
+
+    def write(self, frame):
+        self.writer.write(frame)
+
+    def release(self):
+        self.writer.release()
+
+
+class FrameResult:
+    __slots__ = ("frame_idx", "frame", "rects", "objects", "thresh", "debug_frames")
+
+    def __init__(self, frame_idx, frame, rects, objects, thresh=None, debug_frames=None):
+        self.frame_idx = frame_idx
+        self.frame = frame
+        self.rects = rects
+        self.objects = objects
+        self.thresh = thresh
+        self.debug_frames = debug_frames or {}
+
+
+# --- ENGINE ---
+class PipelineEngine:
+    """Frame source -> detect -> track -> draw -> sink, with no Qt dependency.
+
+    VideoProcessor wraps this for the GUI, src.cli drives it directly.
+    """
+
+    def __init__(self, params=None, visuals=None, shape_type=VisualStyle.SQUARE.value):
+        self.params = dict(DEFAULT_PARAMS)
+        self.detector = BlobDetector()
+        self.tracker = CentroidTracker()
+        self.visualizer = Visualizer(VisualStateManager())
+        self.visual_settings = VisualSettingsApplier(self.visualizer) # Only re-applies what changed
+        self.shape_type = shape_type
+        self.stats = StageStats()
+        self.buffers = BufferPool(self.stats) # Per-frame scratch arrays, allocation counts in stats
+        self.visualizer.glyphs.stats = self.stats # Label/shape cache hits, misses and bytes
+        self.visualizer.sprites.stats = self.stats
+        self.param_channel = ParamChannel() # Updates from other threads, see apply_pending_params()
+        self.params_version = 0
+        self.detection_cache = None # Optional DetectionCache, see process()
+        self.detection_key = None
+
+        self.update_params(params or {})
+        if visuals:
+            self.apply_visuals(visuals)
+
+    def update_params(self, params):
+        self.params.update(params)
+        self.detector.update_params(self.params)
+        self.tracker.update_params(self.params)
+        self.detection_key = self.detector.params_key()
+
+    def apply_pending_params(self):
+        """Applies what was published to param_channel since the last call, if anything.
+
+        Call from the processing thread between frames.
+        """
+        update = self.param_channel.take(self.params_version)
+        if update is None:
+            return False
+        self.params_version, params = update
+        self.update_params(params)
+        self.stats.count("param_updates")
+        return True
+
+    def settings_keys(self):
+        """Hashes of the current detector and tracker settings, as track files record them."""
+        return {"detection": settings_hash(self.detection_key),
+                "tracking": settings_hash((self.detection_key, self.tracker.params_key()))}
+
+    def apply_visuals(self, settings):
+        self.visual_settings.apply(settings)
+        self.shape_type = settings.get("shape_style", self.shape_type)
+
+    # --- Stages ---
+    def detect(self, frame):
+        with self.stats.time("detect"):
+            rects, _, detection_data = self.detector.detect(frame, keypoints=False, pool=self.buffers)
+        if isinstance(detection_data, tuple):
+            thresh, debug_frames = detection_data
+        else:
+            thresh, debug_frames = detection_data, {}
+        return rects, thresh, debug_frames
+
+    def track(self, rects):
+        with self.stats.time("track"):
+            return self.tracker.update(rects)
+
+    def draw(self, frame, objects, frame_idx):
+        with self.stats.time("draw"):
+            return self.visualizer.draw(frame, objects, shape_type=self.shape_type, frame_idx=frame_idx,
+                                        pool=self.buffers)
+
+    def process(self, frame, frame_idx, rects=None, render=True, use_cache=True, objects=None):
+        """Runs one frame through detection (unless rects are supplied), tracking and drawing.
+
+        objects: tracked objects from a track file, skips detection and tracking.
+
+        With a detection_cache, rects detected earlier for this frame index and the
+        same detector settings are reused (use_cache=False forces detection, e.g. when
+        the masks are wanted); thresh and debug_frames are then empty.
+        """
+        thresh, debug_frames = None, {}
+        if objects is not None:
+            if render:
+                frame = self.draw(frame, objects, frame_idx)
+            return FrameResult(frame_idx, frame, rects, objects)
+        cache = self.detection_cache if use_cache else None
+        if rects is None and cache is not None:
+            rects = cache.get(frame_idx, self.detection_key)
+        if rects is None:
+            rects, thresh, debug_frames = self.detect(frame)
+            if cache is not None:
+                cache.put(frame_idx, self.detection_key, rects)
+        objects = self.track(rects)
+        if render:
+            frame = self.draw(frame, objects, frame_idx)
+        return FrameResult(frame_idx, frame, rects, objects, thresh, debug_frames)
+
+    def debug_view(self, result):
+        """Most relevant intermediate mask of a processed frame, as BGR."""
+        debug_frames = result.debug_frames
+        if 'dilated' in debug_frames:
+            debug_img = debug_frames['dilated']
+        elif 'color_mask' in debug_frames:
+            debug_img = debug_frames['color_mask']
+        elif 'edges' in debug_frames:
+            debug_img = debug_frames['edges']
+        elif 'threshold' in debug_frames:
+            debug_img = debug_frames['threshold']
+        else:
+            debug_img = result.thresh
+
+        if len(debug_img.shape) == 2:
+            return cv2.cvtColor(debug_img, cv2.COLOR_GRAY2BGR,
+                                dst=self.buffers.get("debug_bgr", debug_img.shape + (3,)))
+        return debug_img
+
+    def run(self, source, sink=None, detections=None, tracks=None, before_frame=None, on_frame=None,
+            should_stop=None):
+        """Processes source until exhausted (or should_stop() is true), writing to sink.
+
+        detections: optional iterator of (frame_idx, rects) in frame order, e.g. from
+        src.core.parallel. Frames it does not cover are detected locally.
+        tracks: optional TrackFile, its frames are only drawn (no detection/tracking).
+        Frames past its end are written without overlay and counted as tracks_short.
+        Returns the number of frames processed.
+        """
+        pending = None
+        frame = None
+        # A synchronous sink is done with the previous frame, so decode into it
+        reuse_frames = not getattr(sink, "asynchronous", False)
+        frame_idx = 0
+        while not (should_stop and should_stop()):
+            with self.stats.time("decode"):
+                ret, frame = source.read(frame if reuse_frames else None)
+            if not ret:
+                break
+
+            rects = None
+            objects = None
+            if tracks is not None:
+                if frame_idx < tracks.frames:
+                    rects, objects = tracks.rects(frame_idx), tracks.objects(frame_idx)
+                else:
+                    # The video outlasts the track file: never detect, just draw nothing
+                    rects, objects = np.empty((0, 4), np.int32), OrderedDict()
+                    self.stats.count("tracks_short")
+            elif detections is not None:
+                while pending is None or pending[0] < frame_idx:
+                    pending = next(detections, (float("inf"), None))
+                if pending[0] == frame_idx:
+                    rects = pending[1]
+
+            self.apply_pending_params()
+            if before_frame:
+                before_frame(frame_idx)
+
+            result = self.process(frame, frame_idx, rects=rects, objects=objects)
+
+            if sink is not None:
+                with self.stats.time("encode"):
+                    sink.write(result.frame)
+            if on_frame:
+                on_frame(result)
+            self.stats.end_frame(frame_idx)
+            frame_idx += 1
+
+        return frame_idx
+
+    def run_threaded(self, source, sink=None, depth=DEFAULT_QUEUE_DEPTH, **kwargs):
+        """run() with decoding and encoding moved to their own threads.
+
+        The engine's own decode/encode stages then measure time spent waiting on the
+        queues; the io_* stages and queue gauges report the background threads.
+        Releases source and sink.
+        """
+        reader, writer = open_threaded(source, sink, depth)
+        try:
+            return self.run(reader, writer, **kwargs)
+        finally:
+            if writer is not None:
+                writer.release()
+                self.stats.merge(writer.stats, "io_")
+            reader.release()
+            self.stats.merge(reader.stats, "io_")
@@ -0,0 +1,169 @@
+import csv
+import json
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+
+DEFAULT_WINDOW = 120 # Frames kept for rolling percentiles
+PERCENTILES = (50, 95, 99)
+
+
+class FrameTrace:
+    """Per-frame stage timings (ms), written as CSV or JSON for offline analysis."""
+
+    def __init__(self):
+        self.rows = []
+        self.stages = []
+        self.current = {}
+
+    def record(self, stage, seconds):
+        if stage not in self.current and stage not in self.stages:
+            self.stages.append(stage)
+        self.current[stage] = self.current.get(stage, 0.0) + seconds * 1000.0
+
+    def end_frame(self, frame_idx):
+        row = {stage: round(ms, 4) for stage, ms in self.current.items()}
+        row["frame"] = frame_idx
+        self.rows.append(row)
+        self.current = {}
+
+    def write(self, path):
+        """Writes the trace; the format follows the extension (.json, otherwise CSV)."""
+        if path.lower().endswith(".json"):
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({"unit": "ms", "stages": self.stages, "frames": self.rows}, f)
+            return
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=["frame"] + self.stages, restval="")
+            writer.writeheader()
+            writer.writerows(self.rows)
+
+
+class StageStats:
+    """Accumulates wall-clock time and frame counts per pipeline stage.
+
+    The last `window` per-frame durations of each stage are kept as well, for
+    rolling percentiles (live HUD). Attach a FrameTrace to also log every frame.
+    """
+
+    def __init__(self, window=DEFAULT_WINDOW, trace=None):
+        self.seconds = {}
+        self.frames = {}
+        self.gauges = {} # name -> [samples, total, max, capacity]
+        self.recent = {} # stage -> deque of per-frame seconds
+        self.counters = {} # name -> running total, e.g. buffer_allocs
+        self.window = window
+        self.trace = trace
+        self.started = time.perf_counter()
+
+    @contextmanager
+    def time(self, stage, frames=1):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - start, frames)
+
+    def add(self, stage, seconds, frames=1):
+        self.seconds[stage] = self.seconds.get(stage, 0.0) + seconds
+        self.frames[stage] = self.frames.get(stage, 0) + frames
+        if frames and self.window:
+            recent = self.recent.get(stage)
+            if recent is None:
+                recent = self.recent[stage] = deque(maxlen=self.window)
+            recent.append(seconds / frames)
+        if self.trace is not None:
+            self.trace.record(stage, seconds)
+
+    def count(self, name, value=1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def end_frame(self, frame_idx):
+        """Closes the current frame's trace row (no-op without a trace)."""
+        if self.trace is not None:
+            self.trace.end_frame(frame_idx)
+
+    def sample(self, name, value, capacity=None):
+        """Records an instantaneous reading such as a queue depth."""
+        gauge = self.gauges.setdefault(name, [0, 0.0, 0, capacity])
+        gauge[0] += 1
+        gauge[1] += value
+        gauge[2] = max(gauge[2], value)
+        if capacity is not None:
+            gauge[3] = capacity
+
+    def merge(self, other, prefix=""):
+        for stage, seconds in other.seconds.items():
+            name = prefix + stage
+            self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+            self.frames[name] = self.frames.get(name, 0) + other.frames.get(stage, 0)
+            if self.window and other.recent.get(stage):
+                self.recent.setdefault(name, deque(maxlen=self.window)).extend(other.recent[stage])
+        for name, value in other.counters.items():
+            self.count(prefix + name, value)
+        for name, (samples, total, peak, capacity) in other.gauges.items():
+            gauge = self.gauges.setdefault(prefix + name, [0, 0.0, 0, capacity])
+            gauge[0] += samples
+            gauge[1] += total
+            gauge[2] = max(gauge[2], peak)
+
+    def fps(self, stage):
+        seconds = self.seconds.get(stage, 0.0)
+        if seconds <= 0:
+            return 0.0
+        return self.frames.get(stage, 0) / seconds
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def percentiles(self, stage, q=PERCENTILES):
+        """Rolling per-frame percentiles of a stage in ms, e.g. {"p50": 3.1, "p95": 4.0, ...}."""
+        recent = self.recent.get(stage)
+        if not recent:
+            return {}
+        values = np.percentile(np.fromiter(recent, dtype=np.float64, count=len(recent)), q) * 1000.0
+        return {f"p{p}": round(float(v), 3) for p, v in zip(q, values)}
+
+    def rolling(self):
+        """{stage: percentiles} for every stage with recent samples. Plain dict, safe to
+        hand to another thread."""
+        return {stage: self.percentiles(stage) for stage in list(self.recent)}
+
+    def summary(self):
+        stages = {}
+        for stage in self.seconds:
+            stages[stage] = {
+                "frames": self.frames.get(stage, 0),
+                "seconds": round(self.seconds[stage], 4),
+                "fps": round(self.fps(stage), 2),
+            }
+            stages[stage].update(self.percentiles(stage))
+        gauges = {}
+        for name, (samples, total, peak, capacity) in self.gauges.items():
+            gauges[name] = {
+                "avg": round(total / samples, 2) if samples else 0.0,
+                "max": peak,
+                "capacity": capacity,
+            }
+        return {"wall_seconds": round(self.elapsed(), 4), "stages": stages, "gauges": gauges,
+                "counters": dict(self.counters)}
+
+    def format(self):
+        # e.g. "detect 412.3 fps | track 9120.0 fps | encode 180.4 fps"
+        parts = [f"{stage} {self.fps(stage):.1f} fps" for stage in self.seconds]
+        for name, (samples, total, peak, capacity) in self.gauges.items():
+            avg = total / samples if samples else 0.0
+            parts.append(f"{name} {avg:.1f}/{capacity}" if capacity else f"{name} {avg:.1f}")
+        parts += [f"{name} {value}" for name, value in self.counters.items()]
+        return " | ".join(parts)
+
+
+def format_rolling(rolling):
+    # One line per stage for the HUD: "detect     3.1   4.0   6.2 ms"
+    lines = [f"{'stage':<10} {'p50':>6} {'p95':>6} {'p99':>6}"]
+    for stage, p in rolling.items():
+        if p:
+            lines.append(f"{stage:<10} {p['p50']:6.1f} {p['p95']:6.1f} {p['p99']:6.1f}")
+    return "\n".join(lines)
@@ -0,0 +1,145 @@
+import queue
+import threading
+import time
+from src.core.profiler import StageStats
+
+DEFAULT_QUEUE_DEPTH = 4
+
+
+class ThreadedFrameReader:
+    """Drop-in frame source that decodes on a background thread.
+
+    Frames are prefetched into a bounded queue. Buffers handed back through
+    recycle() are reused for the next decode (cap.read(image)), so together with
+    ThreadedFrameWriter the frames in flight form a fixed ring instead of a fresh
+    allocation per frame. cv2 releases the GIL while decoding, so this overlaps
+    with detection/drawing on the consumer thread.
+    """
+
+    def __init__(self, source, depth=DEFAULT_QUEUE_DEPTH):
+        self.source = source
+        self.depth = depth
+        self.width = source.width
+        self.height = source.height
+        self.fps = source.fps
+        self.frame_count = source.frame_count
+        self.stats = StageStats()
+
+        self._filled = queue.Queue(maxsize=depth)
+        self._free = queue.SimpleQueue()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="FrameReader", daemon=True)
+        self._thread.start()
+
+    def is_opened(self):
+        return self.source.is_opened()
+
+    def _put(self, item):
+        while not self._stop.is_set():
+            try:
+                self._filled.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _run(self):
+        try:
+            while not self._stop.is_set():
+                try:
+                    buffer = self._free.get_nowait()
+                except queue.Empty:
+                    buffer = None
+                start = time.perf_counter()
+                ret, frame = self.source.read(buffer)
+                self.stats.add("decode", time.perf_counter() - start)
+                if not self._put((ret, frame, None)) or not ret:
+                    break
+        except Exception as e:
+            self._put((False, None, e))
+
+    def read(self, image=None):
+        self.stats.sample("read_queue", self._filled.qsize(), self.depth)
+        ret, frame, error = self._filled.get()
+        if error is not None:
+            raise error
+        if not ret:
+            # Keep returning end-of-stream to repeated callers
+            self._filled.put((False, None, None))
+        return ret, frame
+
+    def recycle(self, frame):
+        """Returns a consumed frame buffer to the ring."""
+        if frame is not None:
+            self._free.put(frame)
+
+    def release(self):
+        self._stop.set()
+        # Unblock the decode thread if it is waiting on a full queue
+        try:
+            while True:
+                self._filled.get_nowait()
+        except queue.Empty:
+            pass
+        self._thread.join()
+        self.source.release()
+
+
+class ThreadedFrameWriter:
+    """Drop-in frame sink that encodes on a background thread.
+
+    write() only blocks when `depth` frames are already waiting (back-pressure).
+    on_written(frame) is called after each frame is encoded, typically
+    ThreadedFrameReader.recycle.
+    """
+
+    asynchronous = True # write() returns before the frame is consumed
+
+    def __init__(self, sink, depth=DEFAULT_QUEUE_DEPTH, on_written=None):
+        self.sink = sink
+        self.depth = depth
+        self.on_written = on_written
+        self.stats = StageStats()
+
+        self._pending = queue.Queue(maxsize=depth)
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name="FrameWriter", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            frame = self._pending.get()
+            if frame is None:
+                break
+            if self._error is not None:
+                continue # Drain so write() never blocks forever
+            try:
+                start = time.perf_counter()
+                self.sink.write(frame)
+                self.stats.add("encode", time.perf_counter() - start)
+                if self.on_written:
+                    self.on_written(frame)
+            except Exception as e:
+                self._error = e
+
+    def write(self, frame):
+        if self._error is not None:
+            raise self._error
+        self.stats.sample("write_queue", self._pending.qsize(), self.depth)
+        self._pending.put(frame)
+
+    def release(self):
+        self._pending.put(None)
+        self._thread.join()
+        self.sink.release()
+        if self._error is not None:
+            raise self._error
+
+
+def open_threaded(source, sink=None, depth=DEFAULT_QUEUE_DEPTH):
+    """Wraps a source (and optional sink) in prefetch/encode threads sharing one frame ring."""
+    reader = ThreadedFrameReader(source, depth)
+    writer = None
+    if sink is not None:
+        writer = ThreadedFrameWriter(sink, depth, on_written=reader.recycle)
+    return reader, writer
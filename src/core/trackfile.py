@@ -0,0 +1,229 @@
+"""Track files: per-frame detections and tracked objects of one video, on disk.
+
+Written next to the video as a sidecar (<video>.blobs) during an export, so the
+next render of the same file with the same detector/tracker settings can skip
+detection and tracking and only decode, draw and encode.
+
+Layout: MAGIC, a little-endian uint64 header length, a JSON header, then the
+arrays, each at a 64-byte aligned offset. The header lists every array's dtype,
+shape and offset, and the keys (source fingerprint and modification time, detection
+and tracking settings hashes) the file was made with. Arrays are columnar, with per-frame
+rows found through offset arrays:
+
+    rect_offsets  int64 (frames + 1,)  rows of frame i: rects[rect_offsets[i]:rect_offsets[i + 1]]
+    rects         int32 (R, 4)         start_x, start_y, end_x, end_y (BlobDetector.detect)
+    track_offsets int64 (frames + 1,)  same for the tracked objects
+    track_ids     int64 (T,)           object IDs, in CentroidTracker.objects order
+    track_xyr     int32 (T, 3)         centroid x, centroid y, radius
+
+The whole file is memory-mapped on read, so opening it costs nothing up front.
+"""
+import hashlib
+import json
+import os
+import struct
+from collections import OrderedDict
+import numpy as np
+
+MAGIC = b"BLOBTRK1"
+VERSION = 1
+ALIGN = 64
+SIDECAR_SUFFIX = ".blobs"
+FINGERPRINT_SAMPLE = 2**20 # Bytes hashed from each end of the video
+FINGERPRINT_INTERIOR = 16 # Evenly spaced samples in between...
+FINGERPRINT_INTERIOR_SAMPLE = 2**16 # ...of this many bytes each
+
+
+def sidecar_path(video_path):
+    return video_path + SIDECAR_SUFFIX
+
+
+def source_fingerprint(path, sample=FINGERPRINT_SAMPLE, interior=FINGERPRINT_INTERIOR,
+                       interior_sample=FINGERPRINT_INTERIOR_SAMPLE):
+    """Hash of a file's size, its first and last `sample` bytes and `interior`
+    evenly spaced `interior_sample` byte blocks in between.
+
+    Hashing all of a multi-GB video would take longer than some of the renders
+    it lets us skip; the ends catch re-encodes and trims, the interior blocks
+    same-length edits such as a re-mux or a patched segment. An edit that fits
+    entirely between two blocks still goes unnoticed.
+    """
+    digest = hashlib.sha1()
+    size = os.path.getsize(path)
+    digest.update(str(size).encode())
+    with open(path, "rb") as f:
+        digest.update(f.read(sample))
+        if size > 2 * sample:
+            step = (size - 2 * sample) // (interior + 1)
+            for i in range(1, interior + 1):
+                f.seek(sample + i * step)
+                digest.update(f.read(interior_sample))
+        if size > sample:
+            f.seek(max(sample, size - sample))
+            digest.update(f.read(sample))
+    return digest.hexdigest()
+
+
+def source_keys(path):
+    """Keys identifying the video file: content fingerprint and modification time.
+
+    Reusing a sidecar takes both, so any in-place edit invalidates it even where
+    the sampled fingerprint cannot tell; a render-only export only checks the
+    fingerprint, so a copied video still renders from its track file.
+    """
+    return {"source": source_fingerprint(path), "modified": os.stat(path).st_mtime_ns}
+
+
+def settings_hash(key):
+    """Short stable hash of a params_key() tuple."""
+    return hashlib.sha1(repr(key).encode()).hexdigest()[:16]
+
+
+class TrackFileWriter:
+    """Collects one frame at a time (in order, from frame 0) and writes the file on save()."""
+
+    def __init__(self, path, keys):
+        self.path = path
+        self.keys = dict(keys) # source / detection / tracking
+        self.rect_counts = []
+        self.rects = []
+        self.track_counts = []
+        self.track_ids = []
+        self.track_xyr = []
+
+    @property
+    def frames(self):
+        return len(self.rect_counts)
+
+    def add(self, rects, objects):
+        rects = np.asarray(rects, dtype=np.int32).reshape(-1, 4)
+        self.rect_counts.append(len(rects))
+        self.rects.append(rects)
+        self.track_counts.append(len(objects))
+        self.track_ids.append(np.fromiter(objects.keys(), dtype=np.int64, count=len(objects)))
+        self.track_xyr.append(np.array(list(objects.values()), dtype=np.int32).reshape(-1, 3))
+
+    def save(self):
+        """Writes the file (atomically, through a temporary next to it). Returns its path."""
+        arrays = {
+            "rect_offsets": offsets(self.rect_counts),
+            "rects": concat(self.rects, (0, 4), np.int32),
+            "track_offsets": offsets(self.track_counts),
+            "track_ids": concat(self.track_ids, (0,), np.int64),
+            "track_xyr": concat(self.track_xyr, (0, 3), np.int32),
+        }
+        header = {"version": VERSION, "frames": self.frames, "keys": self.keys, "arrays": {}}
+        # Offsets depend on the header length and vice versa: size the header with
+        # placeholder offsets wider than any real one, then fill them in
+        for name, array in arrays.items():
+            header["arrays"][name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": 10**15}
+        start = align(len(MAGIC) + 8 + len(json.dumps(header).encode()))
+        position = start
+        for name, array in arrays.items():
+            header["arrays"][name]["offset"] = position
+            position = align(position + array.nbytes)
+        header_bytes = json.dumps(header).encode()
+
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "wb") as f:
+            f.write(MAGIC)
+            f.write(struct.pack("<Q", len(header_bytes)))
+            f.write(header_bytes)
+            for name, array in arrays.items():
+                f.write(b"\0" * (header["arrays"][name]["offset"] - f.tell()))
+                f.write(np.ascontiguousarray(array).tobytes())
+        os.replace(temp_path, self.path)
+        return self.path
+
+
+class TrackFile:
+    """Read side: a memory-mapped track file. Raises ValueError for anything else."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a track file")
+            (length,) = struct.unpack("<Q", f.read(8))
+            try:
+                header = json.loads(f.read(length))
+            except ValueError:
+                raise ValueError(f"{path}: corrupt header")
+        if header.get("version") != VERSION:
+            raise ValueError(f"{path}: unsupported version {header.get('version')}")
+        self.frames = header["frames"]
+        self.keys = header["keys"]
+
+        raw = np.memmap(path, dtype=np.uint8, mode="r") if os.path.getsize(path) else np.empty(0, np.uint8)
+        arrays = {}
+        for name, spec in header["arrays"].items():
+            dtype = np.dtype(spec["dtype"])
+            shape = tuple(spec["shape"])
+            nbytes = dtype.itemsize * int(np.prod(shape))
+            if spec["offset"] + nbytes > len(raw):
+                raise ValueError(f"{path}: truncated")
+            arrays[name] = raw[spec["offset"]:spec["offset"] + nbytes].view(dtype).reshape(shape)
+        self.rect_offsets = arrays["rect_offsets"]
+        self.rects_data = arrays["rects"]
+        self.track_offsets = arrays["track_offsets"]
+        self.track_ids = arrays["track_ids"]
+        self.track_xyr = arrays["track_xyr"]
+
+    def matches(self, keys, names=("source", "detection", "tracking")):
+        return all(self.keys.get(name) == keys.get(name) for name in names)
+
+    def rects(self, frame_idx):
+        """BlobDetector.detect() rects of a frame, (N, 4) int32."""
+        return self.rects_data[self.rect_offsets[frame_idx]:self.rect_offsets[frame_idx + 1]]
+
+    def objects(self, frame_idx):
+        """CentroidTracker.update() result of a frame: OrderedDict id -> (x, y, radius)."""
+        start, stop = self.track_offsets[frame_idx], self.track_offsets[frame_idx + 1]
+        xs, ys, radii = self.track_xyr[start:stop].T.tolist() if stop > start else ([], [], [])
+        return OrderedDict(zip(self.track_ids[start:stop].tolist(), zip(xs, ys, radii)))
+
+    def iter_rects(self):
+        """(frame_idx, rects) for every frame, as PipelineEngine.run(detections=...) takes them."""
+        for frame_idx in range(self.frames):
+            yield frame_idx, self.rects(frame_idx)
+
+
+def load_sidecar(path, keys, names=("source", "modified", "detection")):
+    """The TrackFile at path if it exists, is readable and matches keys on `names`, else None."""
+    if not os.path.isfile(path):
+        return None
+    try:
+        tracks = TrackFile(path)
+    except (OSError, ValueError, KeyError):
+        return None
+    return tracks if tracks.matches(keys, names) else None
+
+
+def load_tracks(path, video_path):
+    """TrackFile for a render-only export of video_path, regardless of current settings.
+
+    Raises ValueError when it cannot be read or was made from another video.
+    """
+    if not os.path.isfile(path):
+        raise ValueError(f"No track file at {path}")
+    try:
+        tracks = TrackFile(path)
+    except (OSError, KeyError) as e:
+        raise ValueError(f"Could not read track file {path}: {e}")
+    if tracks.keys.get("source") != source_fingerprint(video_path):
+        raise ValueError(f"{os.path.basename(path)} was made from a different video")
+    return tracks
+
+
+def offsets(counts):
+    result = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=result[1:])
+    return result
+
+
+def concat(parts, empty_shape, dtype):
+    return np.concatenate(parts).astype(dtype, copy=False) if parts else np.empty(empty_shape, dtype)
+
+
+def align(position):
+    return (position + ALIGN - 1) // ALIGN * ALIGN
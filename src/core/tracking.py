@@ -1,87 +1,157 @@
 import cv2
 import numpy as np
 from collections import OrderedDict
+from src.core.buffers import pooled
+from src.core.enums import DetectionMode, DetectionBackend, AssignmentMode
+from src.core.assignment import (
+    greedy_assign, linear_sum_assign,
+    grid_candidates, sparse_greedy_assign, sparse_linear_sum_assign
+)
 
 class CentroidTracker:
-    def __init__(self, max_disappeared=50):
+    """Centroid tracker with state kept in contiguous arrays (sorted by object ID).
+
+    assignment: AssignmentMode.GREEDY (each detection takes its nearest object,
+    nearest first) or AssignmentMode.OPTIMAL (minimum total distance, linear-sum).
+    max_distance: matches farther apart than this are rejected (0/None = no gate).
+    With a gate set, candidates come from a uniform spatial grid instead of the
+    dense N x M distance matrix, so cost grows with blob count, not its square.
+
+    Without a gate, greedy gives the same IDs as the original loop-based tracker,
+    including its rule for leftovers: with at least as many detections as objects
+    unmatched detections are registered (unmatched objects do not age), otherwise
+    unmatched objects age (unmatched detections are dropped). With a gate, unmatched
+    objects always age and unmatched detections always register.
+    """
+    def __init__(self, max_disappeared=50, max_distance=0, assignment=AssignmentMode.GREEDY.value):
         self.next_object_id = 0
-        self.objects = OrderedDict() # Stores (centroid_x, centroid_y, radius)
-        self.disappeared = OrderedDict()
+        self.ids = np.empty(0, dtype=np.int64)
+        self.centroids = np.empty((0, 2), dtype=np.int64)
+        self.radii = np.empty(0, dtype=np.int64)
+        self.disappeared = np.empty(0, dtype=np.int64)
+        self.objects = OrderedDict() # id -> (centroid_x, centroid_y, radius), rebuilt per update
         self.max_disappeared = max_disappeared
+        self.max_distance = max_distance
+        self.assignment = assignment
+
+    def update_params(self, params):
+        self.max_disappeared = params.get("max_disappeared", self.max_disappeared)
+        self.max_distance = params.get("max_distance", self.max_distance)
+        self.assignment = params.get("assignment", self.assignment)
+
+    def params_key(self):
+        """Hashable snapshot of every setting that affects update() results."""
+        return (self.max_disappeared, self.max_distance, self.assignment)
 
     def register(self, centroid, radius):
-        self.objects[self.next_object_id] = (centroid[0], centroid[1], radius)
-        self.disappeared[self.next_object_id] = 0
-        self.next_object_id += 1
+        self._register(np.asarray(centroid, dtype=np.int64).reshape(1, 2),
+                       np.asarray([radius], dtype=np.int64))
+        self._publish()
 
     def deregister(self, object_id):
-        del self.objects[object_id]
-        del self.disappeared[object_id]
+        self._keep(self.ids != object_id)
+        self._publish()
+
+    def _register(self, centroids, radii):
+        count = len(radii)
+        new_ids = np.arange(self.next_object_id, self.next_object_id + count, dtype=np.int64)
+        self.next_object_id += count
+        self.ids = np.concatenate([self.ids, new_ids])
+        self.centroids = np.concatenate([self.centroids, centroids])
+        self.radii = np.concatenate([self.radii, radii])
+        self.disappeared = np.concatenate([self.disappeared, np.zeros(count, dtype=np.int64)])
+
+    def _keep(self, mask):
+        self.ids = self.ids[mask]
+        self.centroids = self.centroids[mask]
+        self.radii = self.radii[mask]
+        self.disappeared = self.disappeared[mask]
+
+    def _publish(self):
+        xs, ys = self.centroids.T.tolist() if len(self.ids) else ([], [])
+        self.objects = OrderedDict(zip(self.ids.tolist(), zip(xs, ys, self.radii.tolist())))
+        return self.objects
+
+    def _assign(self, input_centroids):
+        optimal = self.assignment == AssignmentMode.OPTIMAL.value
+
+        if self.max_distance:
+            rows, cols, sq_dist = grid_candidates(self.centroids, input_centroids, self.max_distance)
+            if optimal:
+                return sparse_linear_sum_assign(rows, cols, np.sqrt(sq_dist))
+            return sparse_greedy_assign(rows, cols, sq_dist)
+
+        # Greedy matching only needs the distance order, so it works on squared
+        # distances and skips the sqrt over the whole N x M matrix.
+        delta = self.centroids[:, np.newaxis].astype(np.float64) - input_centroids[np.newaxis]
+        sq_dist = np.einsum('ijk,ijk->ij', delta, delta)
+        if optimal:
+            return linear_sum_assign(np.sqrt(sq_dist, out=sq_dist))
+        return greedy_assign(sq_dist)
 
     def update(self, rects):
+        rects = np.asarray(rects, dtype=np.int64).reshape(-1, 4)
+
         if len(rects) == 0:
-            for object_id in list(self.disappeared.keys()):
-                self.disappeared[object_id] += 1
-                if self.disappeared[object_id] > self.max_disappeared:
-                    self.deregister(object_id)
-            return self.objects
+            self.disappeared += 1
+            self._keep(self.disappeared <= self.max_disappeared)
+            return self._publish()
 
         # Process input rects into centroids and radii
-        input_centroids = np.zeros((len(rects), 2), dtype="int")
-        input_radii = np.zeros(len(rects), dtype="int")
-        
-        for (i, (start_x, start_y, end_x, end_y)) in enumerate(rects):
-            cX = int((start_x + end_x) / 2.0)
-            cY = int((start_y + end_y) / 2.0)
-            input_centroids[i] = (cX, cY)
-            # Use max dimension for radius approximation
-            w = end_x - start_x
-            h = end_y - start_y
-            input_radii[i] = int(max(w, h) / 2.0)
-
-        if len(self.objects) == 0:
-            for i in range(0, len(input_centroids)):
-                self.register(input_centroids[i], input_radii[i])
-        else:
-            object_ids = list(self.objects.keys())
-            # Extract just centroids for distance calculation
-            object_centroids = [o[:2] for o in self.objects.values()]
+        input_centroids = ((rects[:, :2] + rects[:, 2:]) / 2.0).astype(np.int64)
+        # Use max dimension for radius approximation
+        sizes = rects[:, 2:] - rects[:, :2]
+        input_radii = (sizes.max(axis=1) / 2.0).astype(np.int64)
 
-            D = np.linalg.norm(np.array(object_centroids) - input_centroids[:, np.newaxis], axis=2)
-            rows = D.min(axis=1).argsort()
-            cols = D.argmin(axis=1)[rows]
+        if len(self.ids) == 0:
+            self._register(input_centroids, input_radii)
+            return self._publish()
 
-            used_rows = set()
-            used_cols = set()
+        # Rows: tracked objects, cols: new detections
+        rows, cols = self._assign(input_centroids)
 
-            for (row, col) in zip(rows, cols):
-                if row in used_rows or col in used_cols:
-                    continue
+        # Matched objects take the new centroid AND new radius
+        self.centroids[rows] = input_centroids[cols]
+        self.radii[rows] = input_radii[cols]
 
-                object_id = object_ids[col]
-                # Update with new centroid AND new radius
-                self.objects[object_id] = (input_centroids[row][0], input_centroids[row][1], input_radii[row])
-                self.disappeared[object_id] = 0
-
-                used_rows.add(row)
-                used_cols.add(col)
-
-            unused_rows = set(range(0, D.shape[0])).difference(used_rows)
-            unused_cols = set(range(0, D.shape[1])).difference(used_cols)
+        missing = np.ones(len(self.ids), dtype=bool)
+        missing[rows] = False
+        self.disappeared[rows] = 0
+        if self.max_distance:
+            # Anything left unmatched is out of reach of everything on the other side
+            new = np.flatnonzero(np.isin(np.arange(len(input_radii)), cols, invert=True))
+        elif len(input_radii) >= len(self.ids):
+            # The original tracker's rule: only the larger side's leftovers count. New
+            # IDs go out in its order too (it walked a set of the leftover indices)
+            missing[:] = False
+            new = np.fromiter(set(range(len(input_radii))).difference(set(cols.tolist())), dtype=np.intp)
+        else:
+            new = np.empty(0, dtype=np.intp)
+        self.disappeared[missing] += 1
 
-            if D.shape[0] >= D.shape[1]:
-                for row in unused_rows:
-                    self.register(input_centroids[row], input_radii[row])
-            else:
-                for col in unused_cols:
-                    object_id = object_ids[col]
-                    self.disappeared[object_id] += 1
-                    if self.disappeared[object_id] > self.max_disappeared:
-                        self.deregister(object_id)
+        self._keep(self.disappeared <= self.max_disappeared)
+        self._register(input_centroids[new], input_radii[new])
+        return self._publish()
 
-        return self.objects
+# One row per detected blob: bounding box, area and centroid
+BLOB_DTYPE = np.dtype([
+    ("x", np.int32), ("y", np.int32), ("w", np.int32), ("h", np.int32),
+    ("area", np.float64), ("cx", np.float32), ("cy", np.float32),
+])
 
-from src.core.enums import DetectionMode
+# Detection params as produced by ControlPanel.get_params()
+DEFAULT_PARAMS = {
+    "min_area": 100, "max_area": 100000,
+    "dilation": 0, "blur": 0, "threshold": 127,
+    "mode": DetectionMode.EDGES.value, # Default now Edges
+    "backend": DetectionBackend.CONTOURS.value,
+    "detect_scale": 1.0, "roi": None,
+    "canny_low": 50, "canny_high": 150,
+    "h_min": 0, "s_min": 0, "v_min": 0,
+    "h_max": 179, "s_max": 255, "v_max": 255,
+    # Tracking
+    "assignment": AssignmentMode.GREEDY.value, "max_distance": 0
+}
 
 class BlobDetector:
     def __init__(self):
@@ -91,6 +161,14 @@ class BlobDetector:
         self.blur = 0
         self.threshold = 127
         self.mode = DetectionMode.GRAYSCALE
+        self.backend = DetectionBackend.CONTOURS.value
+        
+        # Performance: run on a downscaled frame and/or a region of interest.
+        # roi is (x, y, w, h) or a polygon [[x, y], ...] in source pixels, None = full frame
+        self.detect_scale = 1.0
+        self.roi = None
+        self._roi_mask_cache = None
+        self._kernel = None
         
         # Edge Detection (Canny) params
         self.canny_low = 50
@@ -110,6 +188,9 @@ class BlobDetector:
         self.dilation = params.get("dilation", self.dilation)
         self.blur = params.get("blur", self.blur)
         self.threshold = params.get("threshold", self.threshold)
+        self.backend = params.get("backend", self.backend)
+        self.detect_scale = params.get("detect_scale", self.detect_scale)
+        self.roi = params.get("roi", self.roi)
         
         mode_str = params.get("mode", self.mode)
         # Ensure we set the Enum
@@ -131,66 +212,185 @@ class BlobDetector:
         self.s_max = params.get("s_max", self.s_max)
         self.v_max = params.get("v_max", self.v_max)
 
-    def detect(self, frame):
+    def params_key(self):
+        """Hashable snapshot of every setting that affects detect() results."""
+        return (self.mode, self.backend, self.min_area, self.max_area, self.dilation, self.blur,
+                self.threshold, self.detect_scale, repr(self.roi), self.canny_low, self.canny_high,
+                self.h_min, self.s_min, self.v_min, self.h_max, self.s_max, self.v_max)
+
+    def mask(self, frame, scale=1.0, pool=None):
+        """Runs the pre-processing pipeline. Returns (binary mask, debug frames).
+
+        scale is the size of `frame` relative to the source, blur and dilation
+        sizes are scaled with it so a downscaled frame groups pixels the same way.
+        With a BufferPool every intermediate is written into a reused buffer.
+        """
         debug_frames = {}
+        blur = int(round(self.blur * scale))
+        dilation = max(1, int(round(self.dilation * scale))) if self.dilation > 0 else 0
+        plane = frame.shape[:2]
         
         # 1. Grayscale / Pre-processing
         if self.mode == DetectionMode.COLOR:
             # For color mode, we work in HSV
-            hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
+            hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV, dst=pooled(pool, "hsv", frame.shape))
             lower = np.array([self.h_min, self.s_min, self.v_min])
             upper = np.array([self.h_max, self.s_max, self.v_max])
-            thresh = cv2.inRange(hsv, lower, upper)
+            thresh = cv2.inRange(hsv, lower, upper, dst=pooled(pool, "color_mask", plane))
             debug_frames['color_mask'] = thresh
         else:
             # Grayscale for standard and edges
             if len(frame.shape) == 3:
-                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=pooled(pool, "gray", plane))
             else:
                 gray = frame
 
-            # Blur (Grouping aid)
-            k = 2 * self.blur + 1
-            blurred = cv2.GaussianBlur(gray, (k, k), 0)
+            # Blur (Grouping aid); a 1x1 kernel would only copy
+            if blur > 0:
+                k = 2 * blur + 1
+                blurred = cv2.GaussianBlur(gray, (k, k), 0, dst=pooled(pool, "blurred", plane))
+            else:
+                blurred = gray
             debug_frames['blurred'] = blurred
 
             if self.mode == DetectionMode.EDGES:
                 # Canny Edge Detection
-                thresh = cv2.Canny(blurred, self.canny_low, self.canny_high)
+                thresh = cv2.Canny(blurred, self.canny_low, self.canny_high, edges=pooled(pool, "edges", plane))
                 debug_frames['edges'] = thresh
             else:
                 # Standard Thresholding (Inverted)
-                _, thresh = cv2.threshold(blurred, self.threshold, 255, cv2.THRESH_BINARY_INV)
+                _, thresh = cv2.threshold(blurred, self.threshold, 255, cv2.THRESH_BINARY_INV,
+                                          dst=pooled(pool, "threshold", plane))
                 debug_frames['threshold'] = thresh
 
         # 4. Dilate (Grouping: expanding white regions to merge them)
-        if self.dilation > 0:
-            kernel = np.ones((self.dilation, self.dilation), np.uint8)
-            thresh = cv2.dilate(thresh, kernel, iterations=1)
+        if dilation > 0:
+            if self._kernel is None or self._kernel.shape[0] != dilation:
+                self._kernel = np.ones((dilation, dilation), np.uint8)
+            thresh = cv2.dilate(thresh, self._kernel, dst=pooled(pool, "dilated", plane), iterations=1)
             debug_frames['dilated'] = thresh
 
-        # 5. Find Contours
+        return thresh, debug_frames
+
+    def _blobs_from_contours(self, thresh, centroids, min_area, max_area):
         contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        
-        rects = []
-        keypoints = [] 
 
+        blobs = []
         for cnt in contours:
             area = cv2.contourArea(cnt)
-            if self.min_area < area < self.max_area:
+            if min_area < area < max_area:
                 # Bounding box
                 x, y, w, h = cv2.boundingRect(cnt)
-                rects.append((x, y, x+w, y+h))
-                
-                # Center
-                M = cv2.moments(cnt)
-                if M["m00"] != 0:
-                    cX = int(M["m10"] / M["m00"])
-                    cY = int(M["m01"] / M["m00"])
-                else:
-                    cX, cY = x + w//2, y + h//2
                 
-                keypoints.append(cv2.KeyPoint(float(cX), float(cY), 10.0))
+                # Center (moments are only worth computing if someone uses them)
+                cX, cY = x + w//2, y + h//2
+                if centroids:
+                    M = cv2.moments(cnt)
+                    if M["m00"] != 0:
+                        cX = int(M["m10"] / M["m00"])
+                        cY = int(M["m01"] / M["m00"])
+                blobs.append((x, y, w, h, area, cX, cY))
+
+        return np.array(blobs, dtype=BLOB_DTYPE)
+
+    def _blobs_from_components(self, thresh, min_area, max_area, pool=None):
+        # One native pass labels every region and returns bbox, pixel area and centroid.
+        # Note: area is the pixel count of the region, holes excluded, whereas the
+        # contour backend measures the polygon enclosed by the outer boundary.
+        _, _, stats, centers = cv2.connectedComponentsWithStatsWithAlgorithm(
+            thresh, 8, cv2.CV_32S, cv2.CCL_BBDT, labels=pooled(pool, "labels", thresh.shape, np.int32))
+        stats, centers = stats[1:], centers[1:] # Label 0 is the background
+        area = stats[:, cv2.CC_STAT_AREA]
+        keep = (area > min_area) & (area < max_area)
+
+        blobs = np.empty(int(keep.sum()), dtype=BLOB_DTYPE)
+        blobs["x"] = stats[keep, cv2.CC_STAT_LEFT]
+        blobs["y"] = stats[keep, cv2.CC_STAT_TOP]
+        blobs["w"] = stats[keep, cv2.CC_STAT_WIDTH]
+        blobs["h"] = stats[keep, cv2.CC_STAT_HEIGHT]
+        blobs["area"] = area[keep]
+        blobs["cx"] = centers[keep, 0]
+        blobs["cy"] = centers[keep, 1]
+        return blobs
+
+    def _roi_bounds(self, frame_shape):
+        # Bounding box (x0, y0, x1, y1) of the ROI clipped to the frame, plus the
+        # polygon points if the ROI is not a plain rectangle.
+        h, w = frame_shape[:2]
+        roi = np.asarray(self.roi, dtype=np.int32)
+        if roi.ndim == 1: # (x, y, w, h)
+            x, y, rw, rh = roi.tolist()
+            bounds, polygon = (x, y, x + rw, y + rh), None
+        else: # [[x, y], ...]
+            bounds, polygon = (*roi.min(axis=0).tolist(), *(roi.max(axis=0) + 1).tolist()), roi
+        x0, y0 = max(0, bounds[0]), max(0, bounds[1])
+        x1, y1 = min(w, bounds[2]), min(h, bounds[3])
+        return (x0, y0, max(x0, x1), max(y0, y1)), polygon
+
+    def _roi_mask(self, polygon, origin, size, scale):
+        key = (polygon.tobytes(), origin, size, scale)
+        if self._roi_mask_cache is None or self._roi_mask_cache[0] != key:
+            mask = np.zeros((size[1], size[0]), np.uint8)
+            points = ((polygon - origin) * scale).round().astype(np.int32)
+            cv2.fillPoly(mask, [points], 255)
+            self._roi_mask_cache = (key, mask)
+        return self._roi_mask_cache[1]
+
+    def detect_blobs(self, frame, centroids=True, pool=None):
+        """Returns (blobs, thresh, debug_frames); blobs is a BLOB_DTYPE structured array.
+
+        With an ROI only that part of the frame is processed, and with a detection
+        scale below 1 the mask pipeline runs on a downscaled copy. Blobs are always
+        returned in source-frame coordinates; thresh/debug frames stay in the
+        processed (cropped/scaled) space.
+        """
+        x0 = y0 = 0
+        polygon = None
+        if self.roi is not None and len(self.roi):
+            (x0, y0, x1, y1), polygon = self._roi_bounds(frame.shape)
+            frame = frame[y0:y1, x0:x1]
+
+        scale = float(self.detect_scale) if self.detect_scale else 1.0
+        if scale < 1.0 and frame.size:
+            frame, scale = downscale(frame, scale, pool)
+        else:
+            scale = 1.0
+
+        if frame.size == 0:
+            return np.empty(0, dtype=BLOB_DTYPE), np.zeros((1, 1), np.uint8), {}
+
+        thresh, debug_frames = self.mask(frame, scale, pool)
+        if polygon is not None:
+            roi_mask = self._roi_mask(polygon, (x0, y0), (thresh.shape[1], thresh.shape[0]), scale)
+            thresh = cv2.bitwise_and(thresh, roi_mask, dst=pooled(pool, "roi_thresh", thresh.shape))
+
+        min_area = self.min_area * scale * scale
+        max_area = self.max_area * scale * scale
+        if self.backend == DetectionBackend.COMPONENTS.value:
+            blobs = self._blobs_from_components(thresh, min_area, max_area, pool)
+        else:
+            blobs = self._blobs_from_contours(thresh, centroids, min_area, max_area)
+
+        if scale != 1.0 or x0 or y0:
+            # Back to source coordinates (boxes grow outward so they still cover the blob)
+            x_end = np.ceil((blobs["x"] + blobs["w"]) / scale).astype(np.int32) + x0
+            y_end = np.ceil((blobs["y"] + blobs["h"]) / scale).astype(np.int32) + y0
+            blobs["x"] = np.floor(blobs["x"] / scale).astype(np.int32) + x0
+            blobs["y"] = np.floor(blobs["y"] / scale).astype(np.int32) + y0
+            blobs["w"] = x_end - blobs["x"]
+            blobs["h"] = y_end - blobs["y"]
+            blobs["area"] /= scale * scale
+            blobs["cx"] = blobs["cx"] / scale + x0
+            blobs["cy"] = blobs["cy"] / scale + y0
+        return blobs, thresh, debug_frames
+
+    def detect(self, frame, keypoints=True, pool=None):
+        # Centroids only feed keypoints, skip them (and the moments) when not wanted
+        blobs, thresh, debug_frames = self.detect_blobs(frame, centroids=keypoints, pool=pool)
+        rects = blobs_to_rects(blobs)
+
+        keypoints = [cv2.KeyPoint(float(cx), float(cy), 10.0)
+                     for cx, cy in zip(blobs["cx"].tolist(), blobs["cy"].tolist())] if keypoints else []
              
         # Normalize what we return as the main "debug" frame for Simple use cases, 
         # but also return the full dict.
@@ -198,3 +398,30 @@ class BlobDetector:
         return rects, keypoints, (thresh, debug_frames)
 
 
+def downscale(frame, scale, pool=None):
+    """Area-averaged resize by `scale` (< 1). Returns (frame, effective scale).
+
+    Halves repeatedly instead of one large INTER_AREA step, which OpenCV only
+    fast-paths for 2x; the effective scale accounts for rounding of odd sizes.
+    """
+    h, w = frame.shape[:2]
+    remaining = scale
+    step = 0
+    while remaining <= 0.5 and frame.shape[0] > 1 and frame.shape[1] > 1:
+        size = (frame.shape[1] // 2, frame.shape[0] // 2)
+        dst = pooled(pool, f"downscale{step}", (size[1], size[0]) + frame.shape[2:])
+        frame = cv2.resize(frame, size, dst=dst, interpolation=cv2.INTER_AREA)
+        remaining *= 2
+        step += 1
+    if remaining < 0.999:
+        size = (max(1, int(round(frame.shape[1] * remaining))), max(1, int(round(frame.shape[0] * remaining))))
+        dst = pooled(pool, f"downscale{step}", (size[1], size[0]) + frame.shape[2:])
+        frame = cv2.resize(frame, size, dst=dst, interpolation=cv2.INTER_AREA)
+    return frame, frame.shape[1] / w
+
+
+def blobs_to_rects(blobs):
+    """(N, 4) int32 array of (start_x, start_y, end_x, end_y) from BLOB_DTYPE rows."""
+    return np.stack([blobs["x"], blobs["y"], blobs["x"] + blobs["w"], blobs["y"] + blobs["h"]],
+                    axis=1).astype(np.int32).reshape(-1, 4)
+
@@ -1,137 +1,93 @@
 import cv2
-import numpy as np
 import os
+import time
 from PyQt6.QtCore import QThread, pyqtSignal, QMutex, QWaitCondition
 from PyQt6.QtGui import QImage
-from src.core.tracking import BlobDetector, CentroidTracker
-from src.visuals import VisualStateManager, Visualizer
-from src.visuals.strategies import (
-    WhiteColorStrategy, RainbowColorStrategy, CycleColorStrategy,
-    SolidColorStrategy, BreatheColorStrategy, RippleColorStrategy, FireworkColorStrategy,
-    TrackedShapeStrategy, FixedShapeStrategy,
-    NoTextStrategy, IndexTextStrategy, RandomWordStrategy
-)
-from src.core.enums import DetectionMode, ColorMode, ColorEffectType, TextMode, TextPosition
+from src.core.pipeline import PipelineEngine, VideoFileSource, VideoFileSink
+from src.core.parallel import iter_parallel_detections
+from src.core.threaded_io import DEFAULT_QUEUE_DEPTH
+from src.core.display import DisplayBuffers, DisplayFrame, fit_size
+from src.core.detection_cache import DetectionCache
+from src.core.frame_cache import CachedFrameSource, FrameCache, ProxyCache
+from src.core.keyframes import cached_keyframe_index
+from src.core.trackfile import TrackFileWriter, load_sidecar, load_tracks, sidecar_path, source_keys
 
 class VideoProcessor(QThread):
+    """Qt adapter around PipelineEngine: threading, pause/seek and QImage conversion."""
     progress_update = pyqtSignal(int)
-    frame_update = pyqtSignal(QImage, QImage) # Main, Ambient
+    frame_update = pyqtSignal(object) # DisplayFrame: main and ambient QImage, release() when replaced
     finished = pyqtSignal(str)
     duration_changed = pyqtSignal(int) # Total frames
     current_frame_changed = pyqtSignal(int) # Current frame index
-    
+    stats_update = pyqtSignal(dict) # Rolling stage percentiles (ms), a few times per second
+
+    STATS_INTERVAL = 0.25 # Seconds between stats_update emits
+    SCRUB_SETTLE_MS = 80 # After a scrub preview, how long to wait for the next seek before decoding the exact frame
+
     def __init__(self, input_path, shape_type):
         super().__init__()
         self.input_path = input_path
-        self.shape_type = shape_type
+        self.engine = PipelineEngine(shape_type=shape_type)
         self.is_running = True
         self.is_paused = False
         self.is_preview = False
         self.debug_mode = False
         self.seek_req = -1
-        
+        self.scrub_preview = True # While seeks keep coming, show the nearest decoded frame instead of waiting
+        self.preview_source = None # CachedFrameSource while previewing
+        self.export_workers = 1 # > 1 enables the parallel chunked export
+        self.io_depth = DEFAULT_QUEUE_DEPTH # Export decode/encode queue size, 0 = inline
+        self.use_sidecar = True # Reuse a matching <video>.blobs track file on export
+        self.save_sidecar = True # Write one when there is none that matches
+        self.tracks_path = None # Render-only export: draw this track file, no detection/tracking
+
         self.mutex = QMutex()
         self.wait_cond = QWaitCondition()
 
-        self.params = {
-            "min_area": 100, "max_area": 100000,
-            "dilation": 0, "blur": 0, "threshold": 127,
-            "mode": DetectionMode.EDGES.value, # Default now Edges
-            "canny_low": 50, "canny_high": 150,
-            "h_min": 0, "s_min": 0, "v_min": 0,
-            "h_max": 179, "s_max": 255, "v_max": 255
-        }
-        self.detector = BlobDetector()
-        
         self.pending_visual_settings = None
+        self.display_size = None # (width, height) of the player, None = frame size
+        self.display = DisplayBuffers(stats=self.engine.stats)
+
+    @property
+    def shape_type(self):
+        return self.engine.shape_type
+
+    @shape_type.setter
+    def shape_type(self, value):
+        self.engine.shape_type = value
+
+    @property
+    def params(self):
+        return self.engine.params
+
+    @property
+    def stats(self):
+        return self.engine.stats
 
     def update_visuals(self, settings):
         self.mutex.lock()
         self.pending_visual_settings = settings
         self.mutex.unlock()
-    
-    def _apply_visual_settings(self, visualizer, settings):
-        # Color Mode Setup
-        cm = settings.get("color_mode", ColorMode.SOLID.value)
-        
-        if cm == ColorMode.SOLID.value:
-            solid_color = settings.get("solid_color", (255, 255, 255))
-            visualizer.set_color_strategy(SolidColorStrategy(solid_color))
-        elif cm == ColorMode.EFFECT.value:
-            effect_name = settings.get("effect_name", ColorEffectType.RAINBOW.value)
-            speed = settings.get("effect_speed", 50)
-            self._set_effect_strategy(visualizer, effect_name, speed, 75)
-        elif cm == ColorMode.CUSTOM.value:
-            effect_name = settings.get("effect_name", ColorEffectType.NONE.value)
-            speed = settings.get("effect_speed", 50)
-            intensity = settings.get("effect_intensity", 75)
-            primary_color = settings.get("primary_color", (67, 160, 71))
-            self._set_effect_strategy(visualizer, effect_name, speed, intensity, primary_color)
-        else:
-            # Fallback
-            visualizer.set_color_strategy(WhiteColorStrategy())
-            
-        # Text Settings
-        tm = settings.get("text_mode", TextMode.NONE.value)
-        if tm == TextMode.NONE.value:
-            visualizer.set_text_strategy(NoTextStrategy())
-        elif tm == TextMode.RANDOM_WORD.value:
-            visualizer.set_text_strategy(RandomWordStrategy())
-        else:  # Index or Custom
-            visualizer.set_text_strategy(IndexTextStrategy())
-        
-        # Text styling 
-        visualizer.text_size = settings.get("text_size", 14)
-        visualizer.text_color = settings.get("text_color", (255, 255, 255))
-        visualizer.text_position = settings.get("text_position", TextPosition.RIGHT.value)
-            
-        # Shape
-        fixed = settings.get("fixed_size_enabled", False)
-        if fixed:
-            visualizer.set_shape_strategy(FixedShapeStrategy())
-        else:
-            visualizer.set_shape_strategy(TrackedShapeStrategy())
-            
-        visualizer.fixed_size = settings.get("fixed_size", 50)
-        visualizer.show_center_dot = settings.get("show_dot", False)
-        visualizer.fill_shape = settings.get("fill_shape", False)
-        visualizer.fill_opacity = settings.get("fill_opacity", 0.5)
-        
-        # Overlays
-        visualizer.show_traces = settings.get("show_traces", True)
-        visualizer.border_thickness = settings.get("border_thickness", 2)
-        
-        # Tracer Settings
-        visualizer.trace_thickness = settings.get("trace_thickness", 3)
-        visualizer.trace_lifetime = settings.get("trace_lifetime", 20)
-        trace_rgb = settings.get("trace_color", None)
-        if trace_rgb:
-            visualizer.trace_color = (trace_rgb[2], trace_rgb[1], trace_rgb[0])  # RGB to BGR
-        else:
-            visualizer.trace_color = None
-        
-        # Limits
-        visualizer.max_blobs = settings.get("max_blobs", 50)
-    
-    def _set_effect_strategy(self, visualizer, effect_name, speed, intensity, primary_color=None):
-        if effect_name == ColorEffectType.RAINBOW.value:
-            visualizer.set_color_strategy(RainbowColorStrategy())
-        elif effect_name == ColorEffectType.CYCLE.value:
-            visualizer.set_color_strategy(CycleColorStrategy(speed=speed))
-        elif effect_name == ColorEffectType.BREATHE.value:
-            base = primary_color if primary_color else (67, 160, 71)
-            visualizer.set_color_strategy(BreatheColorStrategy(base_color=base, speed=speed, intensity=intensity))
-        elif effect_name == ColorEffectType.RIPPLE.value:
-            visualizer.set_color_strategy(RippleColorStrategy(speed=speed, intensity=intensity))
-        elif effect_name == ColorEffectType.FIREWORK.value:
-            visualizer.set_color_strategy(FireworkColorStrategy(speed=speed, intensity=intensity))
-        else:
-            visualizer.set_color_strategy(WhiteColorStrategy())
 
+    def _apply_pending_visuals(self, *args):
+        # Called once per frame: a burst of updates since the last frame collapses into
+        # the latest one, applied outside the lock so the GUI thread never waits on it
+        self.mutex.lock()
+        settings = self.pending_visual_settings
+        self.pending_visual_settings = None
+        self.mutex.unlock()
+        if settings:
+            self.engine.apply_visuals(settings)
 
     def update_params(self, params):
-        self.params = params
-        self.detector.update_params(params)
+        # Non-blocking: the worker applies the latest snapshot before its next frame
+        self.engine.param_channel.publish(params)
+
+    def set_display_size(self, width, height):
+        # Preview frames are scaled on this thread to fit, the player shows them as-is
+        self.mutex.lock()
+        self.display_size = (width, height)
+        self.mutex.unlock()
 
     def set_debug_mode(self, enabled):
         self.debug_mode = enabled
@@ -148,141 +104,226 @@ class VideoProcessor(QThread):
         self.seek_req = frame_idx
         self.wait_cond.wakeAll() # Wake if paused to process seek
         self.mutex.unlock()
+        # Move the playhead now: the decoder (and a read() waiting on it) drop the
+        # previous target instead of finishing it first
+        source = self.preview_source
+        if source is not None:
+            source.seek(frame_idx)
 
     def run(self):
-        cap = cv2.VideoCapture(self.input_path)
-        if not cap.isOpened():
+        source = VideoFileSource(self.input_path)
+        if not source.is_opened():
             self.finished.emit("Error: Could not open video.")
             return
 
-        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-        fps = cap.get(cv2.CAP_PROP_FPS)
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        
-        self.duration_changed.emit(total_frames)
-
-        out = None
-        if not self.is_preview:
-            base, ext = os.path.splitext(self.input_path)
-            output_path = f"{base}_tracked.mp4"
-            fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-            out = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
-
-        self.detector.update_params(self.params)
-        
-        tracker = CentroidTracker()
-        visual_state = VisualStateManager()
-        visualizer = Visualizer(visual_state)
-        frame_idx = 0
-        
+        self.duration_changed.emit(source.frame_count)
+        self.engine.apply_pending_params() # Published before start()
+
+        if self.is_preview:
+            # Loops and scrubbing revisit frames: keep them decoded (and read ahead of
+            # the playhead), and only detect them again for new settings
+            # A file previewed before keeps its keyframe index, otherwise it is scanned on the side
+            source = CachedFrameSource(source, FrameCache(stats=self.stats), ProxyCache(stats=self.stats),
+                                       keyframes=cached_keyframe_index(self.input_path))
+            self.engine.detection_cache = DetectionCache(stats=self.stats)
+            self.preview_source = source
+            self._run_preview(source)
+            self.preview_source = None
+            source.release()
+            return
+
+        tracks = None
+        if self.tracks_path:
+            try:
+                tracks = load_tracks(self.tracks_path, self.input_path)
+            except ValueError as e:
+                source.release()
+                self.finished.emit(f"Error: {e}")
+                return
+
+        base, ext = os.path.splitext(self.input_path)
+        output_path = f"{base}_tracked.mp4"
+        sink = VideoFileSink(output_path, source.fps, (source.width, source.height))
+        self._run_export(source, sink, tracks)
+
+        filename = os.path.basename(output_path)
+        self.finished.emit(f"Processing complete! Saved as {filename}\n{self.stats.format()}")
+
+    def _run_export(self, source, sink, tracks=None):
+        total_frames = source.frame_count
+
+        # Track file sidecar: made from this video with the same detector settings, it
+        # replaces detection (and tracking too if those settings match as well);
+        # otherwise this export writes a new one, if saving is on
+        writer = None
+        retrack = False
+        if tracks is None and (self.use_sidecar or self.save_sidecar):
+            keys = dict(self.engine.settings_keys(), **source_keys(self.input_path))
+            tracks = load_sidecar(sidecar_path(self.input_path), keys) if self.use_sidecar else None
+            retrack = tracks is not None and not tracks.matches(keys)
+            if self.save_sidecar and (tracks is None or retrack):
+                writer = TrackFileWriter(sidecar_path(self.input_path), keys)
+        params_version = self.engine.params_version
+
+        def on_frame(result):
+            nonlocal writer
+            if writer is not None:
+                if self.engine.params_version != params_version:
+                    writer = None # Settings changed mid-export, the file would mix both
+                else:
+                    writer.add(result.rects, result.objects)
+            self.current_frame_changed.emit(result.frame_idx)
+            # Emit progress less frequently if needed, but 1% granularity is fine
+            if total_frames > 0:
+                self.progress_update.emit(int((result.frame_idx / total_frames) * 100))
+
+        # Parallel mode: detection fans out over a process pool in frame-range chunks;
+        # tracking, drawing and encoding stay here in frame order, so a single tracker
+        # sees every frame and IDs survive chunk boundaries.
+        detections = None
+        parallel = False
+        if retrack:
+            # Same detections, different tracker settings: track them again
+            detections, tracks = tracks.iter_rects(), None
+        elif tracks is None and self.export_workers > 1 and total_frames > 0:
+            detections = iter_parallel_detections(self.input_path, self.params, total_frames,
+                                                  workers=self.export_workers, stats=self.stats)
+            parallel = True
+        run_kwargs = dict(detections=detections,
+                          tracks=tracks,
+                          before_frame=self._apply_pending_visuals,
+                          on_frame=on_frame,
+                          should_stop=lambda: not self.is_running)
+        try:
+            if self.io_depth > 0:
+                processed = self.engine.run_threaded(source, sink, depth=self.io_depth, **run_kwargs)
+            else:
+                processed = self.engine.run(source, sink, **run_kwargs)
+                source.release()
+                sink.release()
+        finally:
+            if detections is not None:
+                detections.close()
+
+        if parallel:
+            # Effective detection rate across the pool (wall clock, not per worker)
+            self.stats.add("export", self.stats.elapsed(), processed)
+        if tracks is not None:
+            self.stats.count("sidecar_frames", min(processed, tracks.frames))
+        if writer is not None and self.is_running and processed and writer.frames == processed:
+            try:
+                writer.save()
+            except OSError:
+                pass # Read-only folder: the export itself still succeeded
+
+    def _run_preview(self, source):
+        last_stats = 0.0
+        frame = None
+
         while self.is_running:
             # Handle Pausing
             self.mutex.lock()
-            if self.is_paused and self.seek_req == -1 and self.is_preview:
+            if self.is_paused and self.seek_req == -1:
                 self.wait_cond.wait(self.mutex)
-            
-            # Handle Seeking
-            if self.seek_req != -1:
-                cap.set(cv2.CAP_PROP_POS_FRAMES, self.seek_req)
-                frame_idx = self.seek_req
-                self.seek_req = -1
+
+            # Handle Seeking: only the latest request counts
+            seek_target = self.seek_req
+            self.seek_req = -1
             self.mutex.unlock()
+            # seek() moved the source's playhead already; when the last read() followed
+            # it there, the target is the frame just shown
+            if seek_target != -1 and seek_target != source.current:
+                source.seek(seek_target)
+                if self.scrub_preview and not source.is_decoded(seek_target):
+                    # Show the nearest decoded frame (back to the keyframe) right away
+                    nearest = source.preview(seek_target)
+                    if nearest is not None:
+                        slot, qt_ambient = self._acquire_display(nearest[1])
+                        if slot is not None:
+                            self._emit_display(slot, qt_ambient, nearest[1], (source.width, source.height))
+                        self.current_frame_changed.emit(seek_target)
+                        self.stats.count("scrub_previews")
+                        # Keep previewing while seeks keep coming, decode the exact frame once they stop
+                        self.mutex.lock()
+                        if self.seek_req == -1:
+                            self.wait_cond.wait(self.mutex, self.SCRUB_SETTLE_MS)
+                        pending = self.seek_req != -1
+                        self.mutex.unlock()
+                        if pending:
+                            continue
 
-            ret, frame = cap.read()
+            with self.stats.time("decode"):
+                # Previous frame was rendered into its display slot already, reuse its buffer
+                ret, frame = source.read(frame)
             if not ret:
-                if self.is_preview:
-                    cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
-                    frame_idx = 0
-                    continue
-                else:
-                    break
+                frame = None
+                source.seek(0)
+                continue
+            frame_idx = source.current # read() follows seeks made while it waited
 
             # --- AMBIENT FRAME GENERATION (RAW) ---
-            # Only generate for preview to save processing during export
-            qt_ambient = None
-            if self.is_preview:
-                amb_small = cv2.resize(frame, (40, 22), interpolation=cv2.INTER_AREA)
-                amb_blurred = cv2.GaussianBlur(amb_small, (21, 21), 0)
-                amb_rgb = cv2.cvtColor(amb_blurred, cv2.COLOR_BGR2RGB)
-                ah, aw, ach = amb_rgb.shape
-                amb_bytes = ach * aw
-                qt_ambient = QImage(amb_rgb.data, aw, ah, amb_bytes, QImage.Format.Format_RGB888).copy()
-
-            # --- MAIN DETECTION & TRACKING ---
-            # Detection
-            rects, _, detection_data = self.detector.detect(frame)
-            if isinstance(detection_data, tuple):
-                 thresh, debug_frames = detection_data
-            else:
-                 thresh = detection_data
-                 debug_frames = {}
+            slot, qt_ambient = self._acquire_display(frame)
 
-            # Check for visual settings updates
-            self.mutex.lock()
-            if self.pending_visual_settings:
-                 self._apply_visual_settings(visualizer, self.pending_visual_settings)
-                 self.pending_visual_settings = None
-            self.mutex.unlock()
+            # Check for parameter and visual settings updates
+            self.engine.apply_pending_params()
+            self._apply_pending_visuals()
 
-            # Tracking
-            objects = tracker.update(rects)
-            
-            # Prepare Output
-            if self.is_preview:
-                if self.debug_mode:
-                    # Show the most relevant debug frame
-                    if 'dilated' in debug_frames:
-                        debug_img = debug_frames['dilated']
-                    elif 'color_mask' in debug_frames:
-                        debug_img = debug_frames['color_mask']
-                    elif 'edges' in debug_frames:
-                         debug_img = debug_frames['edges']
-                    elif 'threshold' in debug_frames:
-                         debug_img = debug_frames['threshold']
-                    else:
-                         debug_img = thresh
-                    
-                    if len(debug_img.shape) == 2:
-                        out_frame = cv2.cvtColor(debug_img, cv2.COLOR_GRAY2BGR)
-                    else:
-                        out_frame = debug_img
-                else:
-                    out_frame = visualizer.draw(frame, objects, shape_type=self.shape_type, frame_idx=frame_idx)
-
-                # Convert for Qt (BGR -> RGB)
-                rgb_image = cv2.cvtColor(out_frame, cv2.COLOR_BGR2RGB)
-                h, w, ch = rgb_image.shape
-                bytes_per_line = ch * w
-                
-                # COPY the data to ensure it persists
-                qt_image = QImage(rgb_image.data, w, h, bytes_per_line, QImage.Format.Format_RGB888).copy()
-                self.frame_update.emit(qt_image, qt_ambient)
-            
+            # --- MAIN DETECTION & TRACKING & DRAWING ---
+            # The debug view needs this frame's masks, not just cached rects
+            result = self.engine.process(frame, frame_idx, render=not self.debug_mode, use_cache=not self.debug_mode)
+            if self.debug_mode:
+                # Show the most relevant debug frame
+                out_frame = self.engine.debug_view(result)
+            else:
+                out_frame = result.frame
+
+            if slot is not None:
+                self._emit_display(slot, qt_ambient, out_frame)
             self.current_frame_changed.emit(frame_idx)
+            self.stats.end_frame(frame_idx)
+
+            now = time.perf_counter()
+            if now - last_stats >= self.STATS_INTERVAL:
+                # Snapshot here: the deques are only ever touched by this thread
+                self.stats_update.emit(self.stats.rolling())
+                last_stats = now
 
-            if not self.is_preview and out:
-                # During export, always draw a clean frame (respecting current visualization settings)
-                clean_frame = visualizer.draw(frame, objects, shape_type=self.shape_type, frame_idx=frame_idx)
-                out.write(clean_frame)
-                
-                # Emit progress less frequently if needed, but 1% granularity is fine
-                progress = int((frame_idx / total_frames) * 100)
-                self.progress_update.emit(progress)
-
-            frame_idx += 1
-            
             # Simple FPS limiting for preview if needed, but Qt event loop handles it okay mostly.
             # actually for tight loops without GUI interaction we might need a tiny sleep?
             # self.msleep(int(1000/fps)) # Optional
 
-        cap.release()
-        if out:
-            out.release()
-            
-        if not self.is_preview:
-            filename = os.path.basename(output_path)
-            self.finished.emit(f"Processing complete! Saved as {filename}")
+    def _acquire_display(self, frame):
+        """Display slot with frame's ambient image rendered into it: (slot, QImage).
+
+        With every slot still in flight on the GUI side it is (None, None) and
+        the frame is processed but not shown.
+        """
+        slot = self.display.acquire()
+        if slot is None:
+            self.stats.count("display_dropped")
+            return None, None
+        buffers = self.engine.buffers
+        with self.stats.time("ambient"):
+            amb_small = cv2.resize(frame, (40, 22), dst=buffers.get("amb_small", (22, 40, 3)),
+                                   interpolation=cv2.INTER_AREA)
+            amb_blurred = cv2.GaussianBlur(amb_small, (21, 21), 0, dst=buffers.get("amb_blurred", (22, 40, 3)))
+            amb_rgb = self.display.render(slot, amb_blurred, (40, 22), "ambient")
+            qt_ambient = QImage(amb_rgb.data, 40, 22, amb_rgb.strides[0], QImage.Format.Format_RGB32)
+        return slot, qt_ambient
+
+    def _emit_display(self, slot, qt_ambient, out_frame, frame_size=None):
+        # Scale to the player and convert for Qt (BGR -> RGB32), no copies on either side.
+        # frame_size: (width, height) out_frame stands for, when it is a proxy
+        with self.stats.time("to_qimage"):
+            self.mutex.lock()
+            box = self.display_size
+            self.mutex.unlock()
+            w, h = frame_size or (out_frame.shape[1], out_frame.shape[0])
+            size = fit_size(w, h, *box) if box else (w, h)
+            rgb_image = self.display.render(slot, out_frame, size)
+            qt_image = QImage(rgb_image.data, size[0], size[1], rgb_image.strides[0],
+                              QImage.Format.Format_RGB32)
+        self.frame_update.emit(DisplayFrame(self.display, slot, qt_image, qt_ambient))
 
     def stop(self):
         self.is_running = False
@@ -4,6 +4,7 @@ from PyQt6.QtWidgets import (QMainWindow, QWidget, QHBoxLayout, QToolBar,
 from PyQt6.QtCore import Qt
 from PyQt6.QtGui import QAction, QIcon
 from src.core.video_processor import VideoProcessor
+from src.core.trackfile import sidecar_path
 from src.ui.widgets.control_panel import ControlPanel
 from src.ui.widgets.video_player import VideoPlayer
 from src.ui.themes import ThemeManager
@@ -93,6 +94,7 @@ class MainWindow(QMainWindow):
         self.video_player.debug_toggled.connect(self.toggle_debug)
         self.video_player.file_selection_requested.connect(self.control_panel.select_file)
         self.video_player.close_video_requested.connect(self.reset_video)
+        self.video_player.display_resized.connect(self.update_display_size)
 
     def start_preview(self, path):
         if self.processor:
@@ -102,9 +104,11 @@ class MainWindow(QMainWindow):
         shape = self.control_panel.shape_combo.currentText()
         self.processor = VideoProcessor(path, shape)
         self.processor.is_preview = True
+        self.processor.set_display_size(*self.video_player.display_size())
         
         # Connect Signals
         self.processor.frame_update.connect(self.video_player.update_image)
+        self.processor.stats_update.connect(self.video_player.update_stats)
         self.processor.duration_changed.connect(self.video_player.set_duration)
         self.processor.current_frame_changed.connect(self.video_player.update_position)
         
@@ -130,6 +134,10 @@ class MainWindow(QMainWindow):
         
         self.processor = VideoProcessor(path, shape)
         self.processor.is_preview = False
+        self.processor.export_workers = self.control_panel.workers_spin.value()
+        self.processor.save_sidecar = self.control_panel.save_tracks_chk.isChecked()
+        if self.control_panel.from_tracks_chk.isChecked():
+            self.processor.tracks_path = sidecar_path(path)
         self.control_panel.emit_params()
         self.control_panel.emit_visuals()
         
@@ -160,6 +168,7 @@ class MainWindow(QMainWindow):
         
         # Output to Control Panel Status Label
         self.processor.finished.connect(lambda msg: self.control_panel.status_label.setText(msg))
+        self.processor.finished.connect(self.control_panel.update_tracks_option) # Export saved tracks
         
         self.processor.start()
 
@@ -167,6 +176,10 @@ class MainWindow(QMainWindow):
         if self.processor:
             self.processor.update_params(params)
 
+    def update_display_size(self, width, height):
+        if self.processor:
+            self.processor.set_display_size(width, height)
+
     def update_visual_settings(self, settings):
         if self.processor:
             self.processor.update_visuals(settings)
@@ -202,6 +215,7 @@ class MainWindow(QMainWindow):
             # Disconnect signals to prevent late updates from hiding the placeholder
             try:
                 self.processor.frame_update.disconnect()
+                self.processor.stats_update.disconnect()
                 self.processor.duration_changed.disconnect()
                 self.processor.current_frame_changed.disconnect()
                 self.processor.finished.disconnect()
@@ -216,6 +230,7 @@ class MainWindow(QMainWindow):
         # Clear the display
         self.video_player.video_display_label.clear()
         self.video_player.ambient_label.clear()
+        self.video_player.shown_frame = None
         self.video_player.slider.setValue(0)
         self.video_player.time_label.setText("0:00 / 0:00")
         self.control_panel.file_label.setText("No file selected")
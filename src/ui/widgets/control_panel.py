@@ -1,15 +1,17 @@
+import os
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QGroupBox, QComboBox, 
                              QSlider, QLabel, QPushButton, QFileDialog, QHBoxLayout,
                              QTabWidget, QCheckBox, QColorDialog, QSpinBox, QFormLayout,
                              QScrollArea)
 from PyQt6.QtCore import Qt, pyqtSignal
 from PyQt6.QtGui import QColor
-from src.core.enums import DetectionMode, VisualStyle
+from src.core.enums import DetectionMode, DetectionBackend, VisualStyle, AssignmentMode
 from src.ui.widgets.custom_combo import ClickableComboBox
 from src.ui.widgets.color_effect_widget import ColorEffectWidget
 from src.ui.widgets.text_style_widget import TextStyleWidget
 from src.ui.widgets.color_picker_widget import CompactColorButton
 from src.core.enums import Platform
+from src.core.trackfile import sidecar_path
 from src.ui.utils.tooltip_manager import InfoTooltip
 
 class ControlPanel(QWidget):
@@ -85,6 +87,15 @@ class ControlPanel(QWidget):
         mode_row.addWidget(self.mode_combo)
         self.add_tooltip(mode_row, None, "detection", "mode")
         mode_lay.addLayout(mode_row)
+        
+        backend_row = QHBoxLayout()
+        backend_row.addWidget(QLabel("Extraction:"))
+        self.backend_combo = ClickableComboBox()
+        self.backend_combo.addItems([e.value for e in DetectionBackend])
+        self.backend_combo.currentTextChanged.connect(self.emit_params)
+        backend_row.addWidget(self.backend_combo, 1)
+        self.add_tooltip(backend_row, None, "detection", "backend")
+        mode_lay.addLayout(backend_row)
         layout.addWidget(mode_group)
         
         # 2. Dynamic Settings Area
@@ -135,8 +146,31 @@ class ControlPanel(QWidget):
         self.dilate_slider = self.create_slider("Dilation", 0, 20, 0, f_lay, tooltip_key="dilation")
         self.min_area_slider = self.create_slider("Min Area", 10, 10000, 100, f_lay, tooltip_key="min_area")
         self.max_area_slider = self.create_slider("Max Area", 100, 100000, 50000, f_lay, tooltip_key="max_area")
+        scale_row = QHBoxLayout()
+        scale_row.addWidget(QLabel("Detection Scale:"))
+        self.detect_scale_combo = ClickableComboBox()
+        for scale in (1.0, 0.5, 0.25):
+            self.detect_scale_combo.addItem(f"{int(scale * 100)}%", scale)
+        self.detect_scale_combo.currentIndexChanged.connect(self.emit_params)
+        scale_row.addWidget(self.detect_scale_combo, 1)
+        self.add_tooltip(scale_row, None, "detection", "detect_scale")
+        f_lay.addLayout(scale_row)
         layout.addWidget(filter_group)
         
+        # 4. Tracking
+        track_group = QGroupBox("Tracking")
+        tr_lay = QVBoxLayout(track_group)
+        match_row = QHBoxLayout()
+        match_row.addWidget(QLabel("Matching:"))
+        self.assignment_combo = ClickableComboBox()
+        self.assignment_combo.addItems([e.value for e in AssignmentMode])
+        self.assignment_combo.currentTextChanged.connect(self.emit_params)
+        match_row.addWidget(self.assignment_combo, 1)
+        self.add_tooltip(match_row, None, "detection", "assignment")
+        tr_lay.addLayout(match_row)
+        self.max_distance_slider = self.create_slider("Max Distance", 0, 500, 0, tr_lay, tooltip_key="max_distance")
+        layout.addWidget(track_group)
+        
         layout.addStretch()
 
     def init_visuals_tab(self):
@@ -182,7 +216,6 @@ class ControlPanel(QWidget):
         self.trace_chk = QCheckBox("Show Traces")
         self.trace_chk.setChecked(True)
         self.trace_chk.toggled.connect(self.emit_visuals)
-        self.trace_chk.toggled.connect(self.emit_visuals)
         
         # Trace Checkbox Row
         tr_row = QHBoxLayout()
@@ -218,7 +251,6 @@ class ControlPanel(QWidget):
         self.max_blobs_spin.setRange(1, 100)
         self.max_blobs_spin.setValue(50)
         self.max_blobs_spin.valueChanged.connect(self.emit_visuals)
-        self.max_blobs_spin.valueChanged.connect(self.emit_visuals)
         max_row.addWidget(self.max_blobs_spin, 1)
         self.add_tooltip(max_row, None, "visuals", "max_blobs")
         b_lay.addLayout(max_row)
@@ -255,7 +287,6 @@ class ControlPanel(QWidget):
         self.dot_chk = QCheckBox("Show Dot")
         self.dot_chk.setChecked(False) # Default No Dot
         self.dot_chk.toggled.connect(self.emit_visuals)
-        self.dot_chk.toggled.connect(self.emit_visuals)
         
         # Dot row wrapper for tooltip
         dot_wrapper = QHBoxLayout()
@@ -320,6 +351,32 @@ class ControlPanel(QWidget):
         a_lay = QVBoxLayout(action_group)
         a_lay.setSpacing(10)
         
+        # Export Workers (parallel detection processes)
+        workers_row = QHBoxLayout()
+        workers_row.addWidget(QLabel("Export Workers:"))
+        self.workers_spin = QSpinBox()
+        self.workers_spin.setRange(1, max(1, os.cpu_count() or 1))
+        self.workers_spin.setValue(1) # Spawned workers re-import the UI, opt in
+        workers_row.addWidget(self.workers_spin, 1)
+        self.add_tooltip(workers_row, None, "project", "export_workers")
+        a_lay.addLayout(workers_row)
+
+        # Track file next to the video, for later exports to reuse
+        save_tracks_row = QHBoxLayout()
+        self.save_tracks_chk = QCheckBox("Save Tracks On Export")
+        self.save_tracks_chk.setChecked(True)
+        save_tracks_row.addWidget(self.save_tracks_chk)
+        self.add_tooltip(save_tracks_row, None, "project", "save_tracks")
+        a_lay.addLayout(save_tracks_row)
+
+        # Render-only export, from the tracks saved by a previous export of this video
+        tracks_row = QHBoxLayout()
+        self.from_tracks_chk = QCheckBox("Render From Saved Tracks")
+        self.from_tracks_chk.setEnabled(False) # Until the video has a <video>.blobs file
+        tracks_row.addWidget(self.from_tracks_chk)
+        self.add_tooltip(tracks_row, None, "project", "render_from_tracks")
+        a_lay.addLayout(tracks_row)
+        
         self.export_btn = QPushButton("Export Processed Video")
         self.export_btn.setObjectName("PrimaryButton") # Use theme
         self.export_btn.clicked.connect(self.export_requested)
@@ -380,6 +437,8 @@ class ControlPanel(QWidget):
         h_min, h_max, s_min, s_max, v_min, v_max = self._get_target_hsv_range()
         return {
             "mode": self.mode_combo.currentText(),
+            "backend": self.backend_combo.currentText(),
+            "detect_scale": self.detect_scale_combo.currentData(),
             "min_area": self.min_area_slider.value(),
             "max_area": self.max_area_slider.value(),
             "dilation": self.dilate_slider.value(),
@@ -393,6 +452,8 @@ class ControlPanel(QWidget):
             "s_max": s_max,
             "v_min": v_min,
             "v_max": v_max,
+            "assignment": self.assignment_combo.currentText(),
+            "max_distance": self.max_distance_slider.value(),
         }
 
     def get_visual_settings(self):
@@ -433,8 +494,15 @@ class ControlPanel(QWidget):
             self.file_label.setText(fname)
             self.export_btn.setEnabled(True)
             self.open_folder_btn.setEnabled(True)
+            self.update_tracks_option()
             self.file_selected.emit(fname)
 
+    def update_tracks_option(self, *args):
+        available = os.path.isfile(sidecar_path(self.file_label.text()))
+        self.from_tracks_chk.setEnabled(available)
+        if not available:
+            self.from_tracks_chk.setChecked(False)
+
     def on_mode_changed(self, mode):
         self.gray_widget.setVisible(mode == DetectionMode.GRAYSCALE.value)
         self.edge_widget.setVisible(mode == DetectionMode.EDGES.value)
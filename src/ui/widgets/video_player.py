@@ -1,8 +1,29 @@
+import time
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QLabel, QSlider, 
                              QHBoxLayout, QPushButton, QSizePolicy, QButtonGroup,
                              QGraphicsOpacityEffect, QGridLayout)
 from PyQt6.QtCore import Qt, pyqtSignal, QPropertyAnimation, QEasingCurve, QEvent, QSize
-from PyQt6.QtGui import QPixmap, QImage, QIcon, QPainter, QColor, QPainterPath
+from PyQt6.QtGui import QPixmap, QIcon, QPainter, QColor, QPainterPath, QImage
+from src.core.profiler import StageStats, format_rolling
+
+_PIXMAP_SHARES = None
+
+
+def pixmap_shares_buffer():
+    """Whether QPixmap.fromImage() of an RGB32 QImage keeps reading the image's buffer.
+
+    True on Qt's raster pixmaps (the desktop default); other backends upload a copy.
+    Probed once: write to the buffer after fromImage() and look through the pixmap.
+    """
+    global _PIXMAP_SHARES
+    if _PIXMAP_SHARES is None:
+        data = bytearray(4)
+        image = QImage(data, 1, 1, 4, QImage.Format.Format_RGB32)
+        pixmap = QPixmap.fromImage(image)
+        data[:] = b"\xff\xff\xff\xff"
+        _PIXMAP_SHARES = pixmap.toImage().pixel(0, 0) & 0xFFFFFF == 0xFFFFFF
+    return _PIXMAP_SHARES
+
 
 class VideoPlayer(QWidget):
     toggle_play_requested = pyqtSignal()
@@ -10,6 +31,7 @@ class VideoPlayer(QWidget):
     debug_toggled = pyqtSignal(bool)
     file_selection_requested = pyqtSignal()
     close_video_requested = pyqtSignal()
+    display_resized = pyqtSignal(int, int) # Size frames should be scaled to (VideoProcessor.set_display_size)
 
     def __init__(self):
         super().__init__()
@@ -23,6 +45,11 @@ class VideoPlayer(QWidget):
         self.controls_visible = True
         self.hide_timer_active = False
         
+        # GUI-side timings (pixmap scaling), shown with the processor's in the HUD
+        self.display_stats = StageStats()
+        self._last_image_time = None
+        self.shown_frame = None # DisplayFrame on screen, released when replaced
+        
         self.init_ui()
 
     def mouseDoubleClickEvent(self, event):
@@ -83,6 +110,7 @@ class VideoPlayer(QWidget):
         self.video_display_label.setObjectName("MainVideoDisplay")
         self.video_display_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         self.video_display_label.setSizePolicy(QSizePolicy.Policy.Ignored, QSizePolicy.Policy.Ignored)
+        self.video_display_label.installEventFilter(self) # Forwards its size to the processor
         self.video_layout.addWidget(self.video_display_label, 0, 0)
 
         # 2. Placeholder Container (Layer 1, Center Aligned, Visible initially)
@@ -157,6 +185,24 @@ class VideoPlayer(QWidget):
         # Add to grid at top-right
         self.video_layout.addWidget(self.close_btn_container, 0, 0, Qt.AlignmentFlag.AlignTop | Qt.AlignmentFlag.AlignRight)
 
+        # Performance HUD (Independent Layer, Top-Left)
+        self.hud_label = QLabel(self.video_container)
+        self.hud_label.setObjectName("PerfHud")
+        self.hud_label.setStyleSheet("""
+            QLabel#PerfHud {
+                background-color: rgba(20, 20, 20, 0.75);
+                color: #81c784;
+                font-family: "Consolas", "Courier New", monospace;
+                font-size: 11px;
+                border-radius: 6px;
+                padding: 6px;
+                margin: 10px;
+            }
+        """)
+        self.hud_label.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents)
+        self.hud_label.hide()
+        self.video_layout.addWidget(self.hud_label, 0, 0, Qt.AlignmentFlag.AlignTop | Qt.AlignmentFlag.AlignLeft)
+
         # OVERLAY CONTROLS
         self.overlay_widget = QWidget(self.video_container)
         self.overlay_widget.setObjectName("OverlayControls")
@@ -244,6 +290,13 @@ class VideoPlayer(QWidget):
         controls_layout.addWidget(self.btn_video)
         controls_layout.addWidget(self.btn_debug)
 
+        self.btn_stats = QPushButton("Stats")
+        self.btn_stats.setObjectName("ModeToggle")
+        self.btn_stats.setCheckable(True)
+        self.btn_stats.setToolTip("Show per-stage timings (ms, last 120 frames)")
+        self.btn_stats.toggled.connect(self.set_hud_visible)
+        controls_layout.addWidget(self.btn_stats)
+
         overlay_layout.addLayout(controls_layout)
 
     def resizeEvent(self, event):
@@ -254,6 +307,15 @@ class VideoPlayer(QWidget):
             self.overlay_widget.setGeometry(0, self.height() - h, w, h)
         super().resizeEvent(event)
 
+    def eventFilter(self, obj, event):
+        if obj is self.video_display_label and event.type() == QEvent.Type.Resize:
+            self.display_resized.emit(*self.display_size())
+        return super().eventFilter(obj, event)
+
+    def display_size(self):
+        size = self.video_display_label.size()
+        return size.width(), size.height()
+
     def enterEvent(self, event):
         self.show_controls()
         super().enterEvent(event)
@@ -276,21 +338,52 @@ class VideoPlayer(QWidget):
         is_debug = (btn == self.btn_debug)
         self.debug_toggled.emit(is_debug)
 
-    def update_image(self, qimg, ambient_qimg):
+    def set_hud_visible(self, visible):
+        self.hud_label.setVisible(visible)
+        if visible:
+            self.hud_label.raise_()
+
+    def update_stats(self, rolling):
+        """Receives VideoProcessor.stats_update and refreshes the HUD."""
+        if not self.hud_label.isVisible():
+            return
+        rolling = dict(rolling)
+        rolling.update(self.display_stats.rolling())
+        interval = rolling.pop("interval", {})
+        text = format_rolling(rolling)
+        if interval.get("p50"):
+            text += f"\n\npreview {1000.0 / interval['p50']:.1f} fps"
+        self.hud_label.setText(text)
+
+    def update_image(self, frame):
+        """Shows a DisplayFrame from VideoProcessor.frame_update.
+
+        The worker already scaled it to display_size(). Where the pixmaps share its
+        buffers the previous frame is only released once it is off screen, otherwise
+        as soon as the pixmaps hold their copies.
+        """
+        start = time.perf_counter()
+        if self._last_image_time is not None:
+            self.display_stats.add("interval", start - self._last_image_time)
+        self._last_image_time = start
+
         # Hide Placeholder if it's visible
         if self.placeholder_widget.isVisible():
             self.placeholder_widget.setVisible(False)
             
         # OPTIMIZED AMBIENT:
         # Pre-processed ambient frame (small, blurred, raw) is provided
-        self.ambient_label.setPixmap(QPixmap.fromImage(ambient_qimg))
-        
-        # Normal Video Update
-        if self.video_display_label.size().width() > 0 and self.video_display_label.size().height() > 0:
-            scaled = qimg.scaled(self.video_display_label.size(), 
-                               Qt.AspectRatioMode.KeepAspectRatio, 
-                               Qt.TransformationMode.SmoothTransformation)
-            self.video_display_label.setPixmap(QPixmap.fromImage(scaled))
+        self.ambient_label.setPixmap(QPixmap.fromImage(frame.ambient))
+        self.video_display_label.setPixmap(QPixmap.fromImage(frame.image))
+
+        if self.shown_frame is not None:
+            self.shown_frame.release()
+        if pixmap_shares_buffer():
+            self.shown_frame = frame
+        else:
+            frame.release()
+            self.shown_frame = None
+        self.display_stats.add("display", time.perf_counter() - start)
 
     def set_duration(self, total_frames):
         self.total_frames = total_frames
@@ -0,0 +1,91 @@
+from collections import OrderedDict
+
+
+class RenderCache:
+    """LRU store of pre-rendered overlay pieces, bounded by the bytes they hold.
+
+    Entries are anything with an `nbytes` attribute. Hits/misses and the bytes held
+    go to `stats` (a StageStats) as the <counter>_hits, <counter>_misses and
+    <counter>_bytes counters when given.
+    """
+
+    counter = "render"
+
+    def __init__(self, max_bytes, stats=None):
+        self.max_bytes = max_bytes
+        self.stats = stats
+        self.entries = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def fetch(self, key, render, *args):
+        """Cached entry for key, calling render(*args) to create it on a miss."""
+        entry = self.lookup(key)
+        if entry is None:
+            entry = self.store(key, render(*args))
+        return entry
+
+    def lookup(self, key):
+        """Cached entry for key or None, counted as a hit or a miss."""
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            if self.stats is not None:
+                self.stats.count(self.counter + "_hits")
+            return entry
+        self.misses += 1
+        if self.stats is not None:
+            self.stats.count(self.counter + "_misses")
+        return None
+
+    def store(self, key, entry):
+        """Adds entry as the most recently used, evicting the oldest ones over budget."""
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self._account(-old.nbytes)
+        self.entries[key] = entry
+        self._account(entry.nbytes)
+        while self.nbytes > self.max_bytes and len(self.entries) > 1:
+            _, old = self.entries.popitem(last=False)
+            self.evictions += 1
+            self._account(-old.nbytes)
+        return entry
+
+    def _account(self, nbytes):
+        self.nbytes += nbytes
+        if self.stats is not None:
+            self.stats.count(self.counter + "_bytes", nbytes)
+
+    def clear(self):
+        if self.stats is not None and self.nbytes:
+            self.stats.count(self.counter + "_bytes", -self.nbytes)
+        self.entries.clear()
+        self.nbytes = 0
+
+    def report(self):
+        """Hit rate and memory use, e.g. for logs and benchmarks."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "bytes": self.nbytes,
+        }
+
+
+def clip_box(frame, x0, y0, w, h):
+    """The part of the w x h box at (x0, y0) inside frame, as (roi, sx, sy, rw, rh)
+    where (sx, sy) is the offset into the box; None when nothing is visible."""
+    fh, fw = frame.shape[:2]
+    if x0 >= 0 and y0 >= 0 and x0 + w <= fw and y0 + h <= fh:
+        return frame[y0:y0 + h, x0:x0 + w], 0, 0, w, h
+    cx0, cy0 = max(x0, 0), max(y0, 0)
+    cx1, cy1 = min(x0 + w, fw), min(y0 + h, fh)
+    if cx1 <= cx0 or cy1 <= cy0:
+        return None
+    return frame[cy0:cy1, cx0:cx1], cx0 - x0, cy0 - y0, cx1 - cx0, cy1 - cy0
@@ -0,0 +1,132 @@
+import cv2
+import numpy as np
+
+
+class LayerCompositor:
+    """Semi-transparent overlay layers that only touch the dirty parts of a frame.
+
+    Usage per frame: begin(frame), mark() every box that will be drawn on, prepare()
+    (copies the untouched frame into the layers, dirty regions only), draw on
+    layer(name) and on the frame, then blend(frame, name, alpha).
+
+    Outside the dirty regions the frame and every layer hold identical pixels, so a
+    full-frame addWeighted would leave them unchanged anyway; skipping them makes
+    the cost scale with the drawn area instead of the frame size. Layer buffers are
+    kept between frames and only reallocated when the frame shape changes.
+    """
+
+    TILE = 32
+    FULL_FRAME_RATIO = 0.4 # Above this dirty fraction one full-frame pass beats many small ones
+
+    def __init__(self, tile=TILE):
+        self.tile = tile
+        self.layers = {}
+        self.dirty = None
+        self.shape = None
+        self._regions = None
+
+    def begin(self, frame):
+        if frame.shape != self.shape:
+            self.shape = frame.shape
+            self.layers = {}
+            h, w = frame.shape[:2]
+            self.dirty = np.zeros(((h + self.tile - 1) // self.tile, (w + self.tile - 1) // self.tile), bool)
+        else:
+            self.dirty[:] = False
+        self._regions = None
+
+    def mark(self, x0, y0, x1, y1):
+        """Flags the box [x0, x1) x [y0, y1) (frame pixels, may exceed the frame) as drawn on."""
+        t = self.tile
+        x0, y0 = max(0, int(x0) // t), max(0, int(y0) // t)
+        x1, y1 = (int(x1) + t - 1) // t, (int(y1) + t - 1) // t
+        if x1 > x0 and y1 > y0:
+            self.dirty[y0:y1, x0:x1] = True
+
+    def mark_all(self):
+        self.dirty[:] = True
+        self._regions = None
+
+    def mark_boxes(self, boxes):
+        """mark() for an (N, 4) array of (x0, y0, x1, y1) boxes, vectorized.
+
+        Each box adds +1/-1 at its tile corners; a 2D prefix sum then gives how many
+        boxes cover each tile.
+        """
+        boxes = np.asarray(boxes, dtype=np.int64).reshape(-1, 4)
+        if not len(boxes):
+            return
+        t = self.tile
+        rows, cols = self.dirty.shape
+        x0 = np.clip(boxes[:, 0] // t, 0, cols)
+        y0 = np.clip(boxes[:, 1] // t, 0, rows)
+        x1 = np.clip((boxes[:, 2] + t - 1) // t, 0, cols)
+        y1 = np.clip((boxes[:, 3] + t - 1) // t, 0, rows)
+        keep = (x1 > x0) & (y1 > y0)
+        x0, y0, x1, y1 = x0[keep], y0[keep], x1[keep], y1[keep]
+
+        cover = np.zeros((rows + 1, cols + 1), np.int32)
+        np.add.at(cover, (y0, x0), 1)
+        np.add.at(cover, (y0, x1), -1)
+        np.add.at(cover, (y1, x0), -1)
+        np.add.at(cover, (y1, x1), 1)
+        self.dirty |= cover.cumsum(axis=0).cumsum(axis=1)[:rows, :cols] > 0
+        self._regions = None
+
+    def regions(self):
+        """Dirty area as a few (y0, y1, x0, x1) pixel rectangles: runs of tiles per row,
+        merged downwards while consecutive rows share the same run."""
+        if self._regions is not None:
+            return self._regions
+        t = self.tile
+        h, w = self.shape[:2]
+        if self.dirty.all() or self.dirty.mean() > self.FULL_FRAME_RATIO:
+            self._regions = [(0, h, 0, w)]
+            return self._regions
+        padded = np.zeros((self.dirty.shape[0], self.dirty.shape[1] + 2), np.int8)
+        padded[:, 1:-1] = self.dirty
+        edges = np.diff(padded, axis=1)
+
+        regions = []
+        open_runs = {} # (x0, x1) -> index into regions
+        for row in range(self.dirty.shape[0]):
+            starts = np.flatnonzero(edges[row] == 1)
+            ends = np.flatnonzero(edges[row] == -1)
+            runs = {}
+            for x0, x1 in zip(starts.tolist(), ends.tolist()):
+                idx = open_runs.get((x0, x1))
+                if idx is None:
+                    idx = len(regions)
+                    regions.append([row, row + 1, x0, x1])
+                else:
+                    regions[idx][1] = row + 1
+                runs[(x0, x1)] = idx
+            open_runs = runs
+
+        self._regions = [(y0 * t, min(h, y1 * t), x0 * t, min(w, x1 * t)) for y0, y1, x0, x1 in regions]
+        return self._regions
+
+    def prepare(self, frame, names, pool=None):
+        """Starts each named layer as a copy of the (not yet drawn on) frame.
+
+        Layers come from `pool` (a BufferPool) when given, else they are owned here.
+        """
+        for name in names:
+            if pool is not None:
+                layer = self.layers[name] = pool.like(f"layer_{name}", frame)
+            else:
+                layer = self.layers.get(name)
+                if layer is None:
+                    layer = self.layers[name] = np.empty_like(frame)
+            for y0, y1, x0, x1 in self.regions():
+                layer[y0:y1, x0:x1] = frame[y0:y1, x0:x1]
+
+    def layer(self, name):
+        return self.layers[name]
+
+    def blend(self, frame, name, alpha):
+        """frame = layer * alpha + frame * (1 - alpha), over the dirty regions, in place."""
+        layer = self.layers[name]
+        for y0, y1, x0, x1 in self.regions():
+            roi = frame[y0:y1, x0:x1]
+            cv2.addWeighted(layer[y0:y1, x0:x1], alpha, roi, 1.0 - alpha, 0, dst=roi)
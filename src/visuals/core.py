@@ -1,32 +1,102 @@
+from itertools import islice
 import cv2
 import numpy as np
-from collections import deque
 from .strategies import (
     WhiteColorStrategy, RainbowColorStrategy, CycleColorStrategy,
     TrackedShapeStrategy, FixedShapeStrategy,
     NoTextStrategy, IndexTextStrategy, RandomWordStrategy
 )
+from .compositor import LayerCompositor
+from .glyphs import GlyphCache
+from .sprites import SpriteCache
 from src.core.enums import TextPosition
 
 class VisualStateManager:
+    """Recent centroids of every tracked object, kept in a ring buffer per slot.
+
+    All trails live in one (capacity, 2 * max_len, 2) int32 array. Each point is
+    written twice, at `head` and `head + max_len`, so the newest-first trail of a
+    slot is always the contiguous slice points[slot, head:head + length] (no copy,
+    no wrap-around handling). Slots of vanished IDs are recycled; capacity only
+    grows with the number of objects alive at the same time.
+    """
+
+    INITIAL_CAPACITY = 64
+
     def __init__(self, max_trace_length=20):
-        self.traces = {}  # id -> deque of points
-        self.max_trace_length = max_trace_length
+        self.max_trace_length = max(1, int(max_trace_length))
+        self.slots = {} # object id -> slot
+        self.free = [] # recycled slots
+        self.used = 0 # slots handed out so far
+        self._allocate(self.INITIAL_CAPACITY)
+
+    def _allocate(self, capacity):
+        self.points = np.zeros((capacity, 2 * self.max_trace_length, 2), dtype=np.int32)
+        self.head = np.zeros(capacity, dtype=np.intp)
+        self.length = np.zeros(capacity, dtype=np.intp)
+
+    def _grow(self):
+        capacity = len(self.head)
+        points, head, length = self.points, self.head, self.length
+        self._allocate(capacity * 2)
+        self.points[:capacity] = points
+        self.head[:capacity] = head
+        self.length[:capacity] = length
+
+    def _take_slot(self):
+        if self.free:
+            return self.free.pop()
+        if self.used == len(self.head):
+            self._grow()
+        self.used += 1
+        return self.used - 1
 
     def update(self, objects):
-        # objects is a dict: id -> (x, y)
-        current_ids = set(objects.keys())
-        
-        # Remove old traces
-        for obj_id in list(self.traces.keys()):
-            if obj_id not in current_ids:
-                del self.traces[obj_id]
+        # objects is a dict: id -> (x, y); traces of IDs not in it are dropped
+        for obj_id in [i for i in self.slots if i not in objects]:
+            self.free.append(self.slots.pop(obj_id))
+        if not objects:
+            return
+
+        slots = []
+        for obj_id in objects:
+            slot = self.slots.get(obj_id)
+            if slot is None:
+                slot = self.slots[obj_id] = self._take_slot()
+                self.length[slot] = 0
+            slots.append(slot)
+        slots = np.array(slots, dtype=np.intp)
+        points = np.array(list(objects.values()), dtype=np.int32).reshape(-1, 2)
 
-        # Update existing and new
-        for obj_id, centroid in objects.items():
-            if obj_id not in self.traces:
-                self.traces[obj_id] = deque(maxlen=self.max_trace_length)
-            self.traces[obj_id].appendleft(centroid)
+        n = self.max_trace_length
+        head = (self.head[slots] - 1) % n
+        self.head[slots] = head
+        self.points[slots, head] = points
+        self.points[slots, head + n] = points
+        self.length[slots] = np.minimum(self.length[slots] + 1, n)
+
+    def trace(self, obj_id):
+        """(n, 2) view of an object's points, newest first, or None."""
+        slot = self.slots.get(obj_id)
+        if slot is None:
+            return None
+        head = self.head[slot]
+        return self.points[slot, head:head + self.length[slot]]
+
+    def set_max_length(self, max_trace_length):
+        """Resizes every trail, keeping the most recent points."""
+        max_trace_length = max(1, int(max_trace_length))
+        if max_trace_length == self.max_trace_length:
+            return
+        trails = {slot: self.trace(obj_id)[:max_trace_length].copy() for obj_id, slot in self.slots.items()}
+        self.max_trace_length = max_trace_length
+        self._allocate(len(self.head))
+        for slot, trail in trails.items():
+            k = len(trail)
+            self.points[slot, :k] = trail
+            self.points[slot, max_trace_length:max_trace_length + k] = trail
+            self.length[slot] = k
+        # head stays 0: the next point goes to the end of the ring (index n - 1)
 
 class Visualizer:
     def __init__(self, state_manager):
@@ -53,11 +123,29 @@ class Visualizer:
         
         # Tracer Settings
         self.trace_thickness = 2
-        self.trace_lifetime = 20  # Number of frames
+        self.trace_lifetime = 20  # Number of frames (resizes the state's trails)
         self.trace_color = None  # None = use shape color
         
         # Limits
         self.max_blobs = 50
+        
+        self._trace_runs = {} # (limit, trace_thickness) -> [(thickness, first, last point)]
+        
+        # Reused overlay buffers for glow / semi-transparent fill
+        self.compositor = LayerCompositor()
+        
+        # Pre-rendered text labels and fixed-size shapes
+        self.glyphs = GlyphCache()
+        self.sprites = SpriteCache()
+
+    @property
+    def trace_lifetime(self):
+        return self._trace_lifetime
+
+    @trace_lifetime.setter
+    def trace_lifetime(self, value):
+        self._trace_lifetime = value
+        self.state.set_max_length(value)
 
     def set_color_strategy(self, strategy):
         self.color_strategy = strategy
@@ -68,111 +156,193 @@ class Visualizer:
     def set_text_strategy(self, strategy):
         self.text_strategy = strategy
 
-    def draw(self, frame, objects, shape_type="square", frame_idx=0): 
+    def draw(self, frame, objects, shape_type="square", frame_idx=0, pool=None): 
         # simple objects for trace tracking
         simple_objects = {oid: (o[0], o[1]) for oid, o in objects.items()}
         self.state.update(simple_objects)
         
-        # Prepare overlays only if needed to save performance
-        glow_overlay = None
-        if self.glow_enabled:
-            glow_overlay = frame.copy()
-            
         use_fill_opacity = self.fill_shape and (self.fill_opacity < 1.0)
-        fill_overlay = None
-        if use_fill_opacity:
-            fill_overlay = frame.copy()
+        is_circle = (shape_type.lower() == "circle")
+        font_scale = self.text_size / 24.0
+        text_thickness = max(1, int(self.text_size / 12))
         
-        # Limit to max_blobs
-        drawn_count = 0
-        for obj_id, data in objects.items():
-            if drawn_count >= self.max_blobs:
-                break
-            drawn_count += 1
+        # --- GEOMETRY PASS ---
+        # Colors/text are resolved once per object (strategies may be stateful).
+        # Vectorized color strategies do all drawn objects in one get_colors call; the
+        # others stay interleaved with the text strategy (both may draw from `random`).
+        drawn = list(islice(objects.items(), max(0, self.max_blobs)))
+        colors = [None] * len(drawn)
+        if self.color_strategy.vectorized:
+            ids = np.fromiter((obj_id for obj_id, _ in drawn), dtype=np.int64, count=len(drawn))
+            colors = [tuple(c) for c in self.color_strategy.get_colors(ids, frame_idx).tolist()]
+        items = []
+        for (obj_id, data), color in zip(drawn, colors):
             x, y, radius = data 
             
             mock_rect = (x - radius, y - radius, radius*2, radius*2)
             gx, gy, gw, gh = self.shape_strategy.get_geometry(mock_rect, self.fixed_size)
-            
-            color = self.color_strategy.get_color(obj_id, frame_idx)
-            text = self.text_strategy.get_text(obj_id, frame_idx)
-
-            # Draw Trace
-            if self.show_traces:
-                trace = self.state.traces.get(obj_id, [])
-                if len(trace) > 1:
-                    limit = min(len(trace), self.trace_lifetime)
-                    trace_col = self.trace_color if self.trace_color else color
-                    for i in range(1, limit):
-                        age_factor = 1 - (i / limit)
-                        thickness = max(1, int(self.trace_thickness * age_factor * 1.5))
-                        cv2.line(frame, trace[i - 1], trace[i], trace_col, thickness)
-
-            # Draw Shape
             draw_radius = gw // 2
             center = (gx + draw_radius, gy + draw_radius)
-            is_circle = (shape_type.lower() == "circle")
             
+            if color is None:
+                color = self.color_strategy.get_color(obj_id, frame_idx)
+            text = self.text_strategy.get_text(obj_id, frame_idx)
+            
+            # Position logic...
+            text_org = None
+            if text:
+                tx, ty = gx + gw + 5, gy + 10 # Default 'Right'
+                tp = self.text_position
+                if tp == TextPosition.TOP.value: tx, ty = gx, gy - 10
+                elif tp == TextPosition.BOTTOM.value: tx, ty = gx, gy + gh + 20
+                elif tp == TextPosition.CENTER.value:
+                    text_dims, _ = self.glyphs.text_size(text, font_scale, text_thickness)
+                    tx, ty = center[0] - text_dims[0] // 2, center[1] + text_dims[1] // 2
+                text_org = (tx, ty)
+            
+            items.append((obj_id, gx, gy, gw, gh, draw_radius, center, color, text, text_org))
+        
+        # Overlay layers only cover what gets drawn, see LayerCompositor
+        layers = []
+        if use_fill_opacity:
+            layers.append("fill")
+        if self.glow_enabled:
+            layers.append("glow")
+        if layers:
+            self._mark_dirty(frame, items, is_circle, font_scale, text_thickness)
+            self.compositor.prepare(frame, layers, pool)
+        fill_overlay = self.compositor.layer("fill") if use_fill_opacity else None
+        glow_overlay = self.compositor.layer("glow") if self.glow_enabled else None
+        
+        # --- DRAW PASS ---
+        # Traces go first (under all shapes), batched into a few polylines calls
+        if self.show_traces:
+            self._draw_traces(frame, items)
+        
+        # Fixed-size markers all draw the same rings: stamp pre-rendered sprites
+        circle = self.sprites.circle if self.shape_strategy.fixed_geometry else cv2.circle
+        
+        for obj_id, gx, gy, gw, gh, draw_radius, center, color, text, text_org in items:
             # --- FILL LOGIC ---
             if self.fill_shape:
                 # If opacity used, draw filled on fill_overlay, and border on frame
                 if use_fill_opacity:
                     if is_circle:
-                        cv2.circle(fill_overlay, center, draw_radius, color, -1)
-                        cv2.circle(frame, center, draw_radius, color, self.border_thickness)
+                        circle(fill_overlay, center, draw_radius, color, -1)
+                        circle(frame, center, draw_radius, color, self.border_thickness)
                     else:
                         cv2.rectangle(fill_overlay, (gx, gy), (gx + gw, gy + gh), color, -1)
                         cv2.rectangle(frame, (gx, gy), (gx + gw, gy + gh), color, self.border_thickness)
                 else:
                     # Solid fill on frame (thickness = -1)
                     if is_circle:
-                        cv2.circle(frame, center, draw_radius, color, -1)
+                        circle(frame, center, draw_radius, color, -1)
                     else:
                         cv2.rectangle(frame, (gx, gy), (gx + gw, gy + gh), color, -1)
             else:
                 # Hollow - just border
                 if is_circle:
-                    cv2.circle(frame, center, draw_radius, color, self.border_thickness)
+                    circle(frame, center, draw_radius, color, self.border_thickness)
                 else:
                     cv2.rectangle(frame, (gx, gy), (gx + gw, gy + gh), color, self.border_thickness)
 
             # --- GLOW LOGIC ---
-            if self.glow_enabled and glow_overlay is not None:
+            if glow_overlay is not None:
                 # If hollow, glow is hollow. If filled, glow is filled.
                 glow_thick = -1 if self.fill_shape else (self.border_thickness + 4)
                 if is_circle:
-                     cv2.circle(glow_overlay, center, draw_radius + 5, color, glow_thick)
+                     circle(glow_overlay, center, draw_radius + 5, color, glow_thick)
                 else:
                     cv2.rectangle(glow_overlay, (gx - 2, gy - 2), (gx + gw + 2, gy + gh + 2), color, glow_thick)
             
             # Draw Center Dot
             if self.show_center_dot:
-                cv2.circle(frame, center, 2, (0, 0, 255), -1)
+                circle(frame, center, 2, (0, 0, 255), -1)
 
             # Draw Text
             if text:
-                font_scale = self.text_size / 24.0
-                thickness = max(1, int(self.text_size / 12))
-                
-                # Position logic...
-                tx, ty = gx + gw + 5, gy + 10 # Default 'Right'
-                tp = self.text_position
-                if tp == TextPosition.TOP.value: tx, ty = gx, gy - 10
-                elif tp == TextPosition.BOTTOM.value: tx, ty = gx, gy + gh + 20
-                elif tp == TextPosition.CENTER.value:
-                    text_dims, _ = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, font_scale, thickness)
-                    tx, ty = center[0] - text_dims[0] // 2, center[1] + text_dims[1] // 2
-                
                 text_color_bgr = (self.text_color[2], self.text_color[1], self.text_color[0])
-                cv2.putText(frame, text, (tx, ty), 
-                            cv2.FONT_HERSHEY_SIMPLEX, font_scale, text_color_bgr, thickness)
+                self.glyphs.draw(frame, text, text_org, font_scale, text_color_bgr, text_thickness)
 
         # Merge Layers
-        if use_fill_opacity and fill_overlay is not None:
-            cv2.addWeighted(fill_overlay, self.fill_opacity, frame, 1.0 - self.fill_opacity, 0, frame)
+        if fill_overlay is not None:
+            self.compositor.blend(frame, "fill", self.fill_opacity)
             
-        if self.glow_enabled and glow_overlay is not None:
+        if glow_overlay is not None:
             alpha = 0.3
-            cv2.addWeighted(glow_overlay, alpha, frame, 1 - alpha, 0, frame)
+            self.compositor.blend(frame, "glow", alpha)
         
         return frame
+
+    def _trace_segments(self, limit):
+        # Segment i (points i-1 -> i) tapers with age; consecutive segments of equal
+        # thickness are merged into runs that can be drawn as one polyline.
+        key = (limit, self.trace_thickness)
+        runs = self._trace_runs.get(key)
+        if runs is None:
+            runs = []
+            for i in range(1, limit):
+                age_factor = 1 - (i / limit)
+                thickness = max(1, int(self.trace_thickness * age_factor * 1.5))
+                if runs and runs[-1][0] == thickness:
+                    runs[-1][2] = i
+                else:
+                    runs.append([thickness, i - 1, i])
+            if len(self._trace_runs) > 256:
+                self._trace_runs.clear()
+            runs = self._trace_runs[key] = [tuple(run) for run in runs]
+        return runs
+
+    def _draw_traces(self, frame, items):
+        # A polyline through the points of one run draws the same pixels as a cv2.line
+        # per segment: the shared joints get the same round cap either way.
+        batches = {} # (color, thickness) -> list of point arrays
+        for obj_id, gx, gy, gw, gh, draw_radius, center, color, text, text_org in items:
+            trace = self.state.trace(obj_id)
+            if trace is None or len(trace) < 2:
+                continue
+            limit = min(len(trace), self.trace_lifetime)
+            trace_col = self.trace_color if self.trace_color else color
+            for thickness, first, last in self._trace_segments(limit):
+                batches.setdefault((trace_col, thickness), []).append(trace[first:last + 1])
+        for (trace_col, thickness), lines in batches.items():
+            cv2.polylines(frame, lines, False, trace_col, thickness)
+
+    def _mark_dirty(self, frame, items, is_circle, font_scale, text_thickness):
+        # Conservative bounds of everything the draw pass will touch (frame or layers)
+        compositor = self.compositor
+        compositor.begin(frame)
+        pad = self.border_thickness + 12 # line width + glow offset
+        boxes = []
+        for obj_id, gx, gy, gw, gh, draw_radius, center, color, text, text_org in items:
+            if is_circle:
+                r = draw_radius + 5 + pad
+                boxes.append((center[0] - r, center[1] - r, center[0] + r + 1, center[1] + r + 1))
+            else:
+                boxes.append((gx - pad, gy - pad, gx + gw + pad + 1, gy + gh + pad + 1))
+
+        # Crowded frame: blending everything is cheaper than tracking text/trace bounds.
+        # Estimate in whole tiles, labels and traces roughly double the covered area.
+        t = compositor.tile
+        area = sum((x1 - x0 + t) * (y1 - y0 + t) for x0, y0, x1, y1 in boxes)
+        if self.show_traces or any(item[8] for item in items):
+            area *= 2
+        if area > compositor.FULL_FRAME_RATIO * frame.shape[0] * frame.shape[1]:
+            compositor.mark_all()
+            return
+
+        trace_pad = int(self.trace_thickness * 1.5) + 2
+        for obj_id, gx, gy, gw, gh, draw_radius, center, color, text, text_org in items:
+            if text:
+                (tw, th), baseline = self.glyphs.text_size(text, font_scale, text_thickness)
+                tx, ty = text_org
+                m = text_thickness + 2
+                boxes.append((tx - m, ty - th - m, tx + tw + m, ty + baseline + m))
+            if self.show_traces:
+                trace = self.state.trace(obj_id)
+                if trace is not None and len(trace) > 1:
+                    points = trace[:self.trace_lifetime]
+                    x0, y0 = points.min(axis=0).tolist()
+                    x1, y1 = points.max(axis=0).tolist()
+                    boxes.append((x0 - trace_pad, y0 - trace_pad, x1 + trace_pad + 1, y1 + trace_pad + 1))
+        compositor.mark_boxes(boxes)
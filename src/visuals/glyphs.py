@@ -0,0 +1,102 @@
+import cv2
+import numpy as np
+from .cache import RenderCache, clip_box
+
+DEFAULT_MAX_BYTES = 8 * 2**20
+
+
+class Glyph:
+    """A pre-rendered label, placed relative to the putText origin.
+
+    color: the label premultiplied by its coverage, keep: 255 - coverage. Stamping is
+    then roi = roi * keep / 255 + color, two OpenCV calls.
+    """
+    __slots__ = ("color", "keep", "dx", "dy", "size", "baseline", "nbytes")
+
+    def __init__(self, color, keep, dx, dy, size, baseline):
+        self.color = color
+        self.keep = keep
+        self.dx = dx
+        self.dy = dy
+        self.size = size
+        self.baseline = baseline
+        self.nbytes = color.nbytes + keep.nbytes
+
+
+class GlyphCache(RenderCache):
+    """LRU cache of pre-rendered text labels, stamped onto frames instead of cv2.putText.
+
+    A label is rendered once per (text, font_scale, color, thickness) in white on
+    black, which gives its coverage, and then alpha-blended wherever it is drawn.
+    Aliased text (LINE_8 on OpenCV 4) comes out identical to putText; anti-aliased
+    text (OpenCV 5) can differ by one level, mostly where strokes overlap since
+    putText blends each stroke in turn.
+
+    Counters: glyph_hits, glyph_misses, glyph_bytes (see RenderCache).
+    """
+
+    counter = "glyph"
+
+    # Hairline labels (text size < 24) rasterize faster than they blend; they keep
+    # going through putText and only their sizes are cached
+    MIN_STAMP_THICKNESS = 2
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, font=cv2.FONT_HERSHEY_SIMPLEX, stats=None):
+        super().__init__(max_bytes, stats)
+        self.font = font
+        self.sizes = {} # (text, font_scale, thickness) -> cv2.getTextSize() result
+        self._scratch = np.empty((0, 0, 3), np.uint8)
+
+    def get(self, text, font_scale, color, thickness):
+        return self.fetch((text, font_scale, color, thickness), self._render, text, font_scale, color, thickness)
+
+    def _render(self, text, font_scale, color, thickness):
+        (tw, th), baseline = size = self.text_size(text, font_scale, thickness)
+        # Strokes can overshoot the reported box by about the line width
+        margin = thickness + int(font_scale * 4) + 2
+        canvas = np.zeros((th + baseline + 2 * margin, tw + 2 * margin), np.uint8)
+        cv2.putText(canvas, text, (margin, margin + th), self.font, font_scale, 255, thickness)
+
+        rows = np.flatnonzero(canvas.any(axis=1))
+        cols = np.flatnonzero(canvas.any(axis=0))
+        if not len(rows):
+            empty = np.zeros((0, 0, 3), np.uint8)
+            return Glyph(empty, empty, 0, 0, (tw, th), baseline)
+        y0, y1, x0, x1 = rows[0], rows[-1] + 1, cols[0], cols[-1] + 1
+        coverage = canvas[y0:y1, x0:x1, None]
+        premultiplied = (coverage * np.array(color, np.float64) / 255.0 + 0.5).astype(np.uint8)
+        keep = np.repeat(255 - coverage, 3, axis=2)
+        return Glyph(premultiplied, keep, int(x0) - margin, int(y0) - margin - th, size[0], size[1])
+
+    def text_size(self, text, font_scale, thickness):
+        """cv2.getTextSize() of a label, memoized."""
+        key = (text, font_scale, thickness)
+        size = self.sizes.get(key)
+        if size is None:
+            if len(self.sizes) > 4096:
+                self.sizes.clear()
+            size = self.sizes[key] = cv2.getTextSize(text, self.font, font_scale, thickness)
+        return size
+
+    def draw(self, frame, text, org, font_scale, color, thickness):
+        """Draws like cv2.putText(frame, text, org, font, font_scale, color, thickness)."""
+        if thickness < self.MIN_STAMP_THICKNESS:
+            cv2.putText(frame, text, org, self.font, font_scale, color, thickness)
+            return
+        glyph = self.get(text, font_scale, color, thickness)
+        h, w = glyph.keep.shape[:2]
+        clipped = clip_box(frame, org[0] + glyph.dx, org[1] + glyph.dy, w, h)
+        if clipped is None:
+            return
+        roi, sx, sy, rw, rh = clipped
+
+        scratch = self._scratch
+        if scratch.shape[0] < rh or scratch.shape[1] < rw:
+            scratch = self._scratch = np.empty((max(scratch.shape[0], rh), max(scratch.shape[1], rw), 3), np.uint8)
+        scratch = scratch[:rh, :rw]
+        cv2.multiply(roi, glyph.keep[sy:sy + rh, sx:sx + rw], dst=scratch, scale=1 / 255)
+        cv2.add(scratch, glyph.color[sy:sy + rh, sx:sx + rw], dst=roi)
+
+    def clear(self):
+        super().clear()
+        self.sizes.clear()
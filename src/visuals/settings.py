@@ -0,0 +1,123 @@
+from .strategies import (
+    WhiteColorStrategy, RainbowColorStrategy, CycleColorStrategy,
+    SolidColorStrategy, BreatheColorStrategy, RippleColorStrategy, FireworkColorStrategy,
+    TrackedShapeStrategy, FixedShapeStrategy,
+    NoTextStrategy, IndexTextStrategy, RandomWordStrategy
+)
+from src.core.enums import ColorMode, ColorEffectType, TextMode, TextPosition
+
+# Plain Visualizer attributes: (attribute, settings key, default)
+VISUALIZER_ATTRIBUTES = (
+    # Text styling
+    ("text_size", "text_size", 14),
+    ("text_color", "text_color", (255, 255, 255)),
+    ("text_position", "text_position", TextPosition.RIGHT.value),
+    # Shape
+    ("fixed_size", "fixed_size", 50),
+    ("show_center_dot", "show_dot", False),
+    ("fill_shape", "fill_shape", False),
+    ("fill_opacity", "fill_opacity", 0.5),
+    # Overlays
+    ("show_traces", "show_traces", True),
+    ("border_thickness", "border_thickness", 2),
+    # Tracer Settings
+    ("trace_thickness", "trace_thickness", 3),
+    ("trace_lifetime", "trace_lifetime", 20),
+    # Limits
+    ("max_blobs", "max_blobs", 50),
+)
+
+
+class VisualSettingsApplier:
+    """Applies successive settings dicts to one Visualizer, touching only what changed.
+
+    A strategy is only rebuilt when its type changes; new effect speed/intensity/colors
+    are applied to the existing one (ColorStrategy.configure), so Firework sparks,
+    RandomWord assignments and the Rainbow lookup table survive a slider drag.
+    """
+
+    def __init__(self, visualizer):
+        self.visualizer = visualizer
+        self.applied = {} # name -> resolved value last applied
+
+    def apply(self, settings):
+        """Returns the names of what changed (attributes, or color/text/shape strategy)."""
+        visualizer = self.visualizer
+        resolved = {
+            "color": color_strategy_spec(settings),
+            "text": text_strategy_class(settings),
+            "shape": shape_strategy_class(settings),
+        }
+        for attr, key, default in VISUALIZER_ATTRIBUTES:
+            resolved[attr] = settings.get(key, default)
+        trace_rgb = settings.get("trace_color", None)
+        resolved["trace_color"] = (trace_rgb[2], trace_rgb[1], trace_rgb[0]) if trace_rgb else None # RGB to BGR
+
+        changed = [name for name, value in resolved.items()
+                   if name not in self.applied or self.applied[name] != value]
+        for name in changed:
+            value = resolved[name]
+            if name == "color":
+                cls, options = value
+                if name in self.applied and type(visualizer.color_strategy) is cls:
+                    visualizer.color_strategy.configure(**options)
+                else:
+                    visualizer.set_color_strategy(cls(**options))
+            elif name == "text":
+                visualizer.set_text_strategy(value())
+            elif name == "shape":
+                visualizer.set_shape_strategy(value())
+            else:
+                setattr(visualizer, name, value)
+            self.applied[name] = value
+        return changed
+
+
+def color_strategy_spec(settings):
+    """(ColorStrategy class, constructor arguments) for a settings dict."""
+    cm = settings.get("color_mode", ColorMode.SOLID.value)
+
+    if cm == ColorMode.SOLID.value:
+        return SolidColorStrategy, {"color": settings.get("solid_color", (255, 255, 255))}
+    elif cm == ColorMode.EFFECT.value:
+        effect_name = settings.get("effect_name", ColorEffectType.RAINBOW.value)
+        speed = settings.get("effect_speed", 50)
+        return effect_strategy_spec(effect_name, speed, 75)
+    elif cm == ColorMode.CUSTOM.value:
+        effect_name = settings.get("effect_name", ColorEffectType.NONE.value)
+        speed = settings.get("effect_speed", 50)
+        intensity = settings.get("effect_intensity", 75)
+        primary_color = settings.get("primary_color", (67, 160, 71))
+        return effect_strategy_spec(effect_name, speed, intensity, primary_color)
+    # Fallback
+    return WhiteColorStrategy, {}
+
+
+def effect_strategy_spec(effect_name, speed, intensity, primary_color=None):
+    if effect_name == ColorEffectType.RAINBOW.value:
+        return RainbowColorStrategy, {}
+    elif effect_name == ColorEffectType.CYCLE.value:
+        return CycleColorStrategy, {"speed": speed}
+    elif effect_name == ColorEffectType.BREATHE.value:
+        base = primary_color if primary_color else (67, 160, 71)
+        return BreatheColorStrategy, {"base_color": base, "speed": speed, "intensity": intensity}
+    elif effect_name == ColorEffectType.RIPPLE.value:
+        return RippleColorStrategy, {"speed": speed, "intensity": intensity}
+    elif effect_name == ColorEffectType.FIREWORK.value:
+        return FireworkColorStrategy, {"speed": speed, "intensity": intensity}
+    return WhiteColorStrategy, {}
+
+
+def text_strategy_class(settings):
+    tm = settings.get("text_mode", TextMode.NONE.value)
+    if tm == TextMode.NONE.value:
+        return NoTextStrategy
+    elif tm == TextMode.RANDOM_WORD.value:
+        return RandomWordStrategy
+    return IndexTextStrategy # Index or Custom
+
+
+def shape_strategy_class(settings):
+    if settings.get("fixed_size_enabled", False):
+        return FixedShapeStrategy
+    return TrackedShapeStrategy
@@ -0,0 +1,78 @@
+import cv2
+import numpy as np
+from .cache import RenderCache, clip_box
+
+DEFAULT_MAX_BYTES = 16 * 2**20
+
+
+class Sprite:
+    """Mask of a pre-rendered shape and its offset from the shape's anchor (center)."""
+    __slots__ = ("mask", "dx", "dy", "nbytes")
+
+    def __init__(self, mask, dx, dy):
+        self.mask = mask
+        self.dx = dx
+        self.dy = dy
+        self.nbytes = mask.nbytes
+
+
+class Swatch:
+    """Solid color image, sliced to the size of whatever sprite is stamped with it."""
+    __slots__ = ("image", "nbytes")
+
+    def __init__(self, image):
+        self.image = image
+        self.nbytes = image.nbytes
+
+
+class SpriteCache(RenderCache):
+    """Circle outlines rendered once per (radius, thickness) and stamped with cv2.copyTo
+    through a same-color swatch, instead of being rasterized again.
+
+    Meant for fixed-size markers, where every object draws the same rings (border,
+    glow). Outlines use LINE_8, whose rasterization only shifts with an integer
+    center, so a stamp gives exactly the pixels cv2.circle would. At the frame border
+    the stamp is the full ring cut off, where OpenCV's clipped circles can move a
+    pixel or two. Filled and small circles are cheaper to draw than to stamp and go
+    straight to cv2.circle.
+
+    Masks and swatches share one LRU. Counters: sprite_hits, sprite_misses,
+    sprite_bytes (see RenderCache).
+    """
+
+    counter = "sprite"
+    MIN_RADIUS = 8 # Below this cv2.circle is as fast as a stamp
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, stats=None):
+        super().__init__(max_bytes, stats)
+        self.swatch_shape = (0, 0) # Large enough for every sprite so far
+
+    def circle(self, img, center, radius, color, thickness=1):
+        """Same arguments and result as cv2.circle."""
+        if thickness < 0 or radius < self.MIN_RADIUS:
+            cv2.circle(img, center, radius, color, thickness)
+            return
+        sprite = self.fetch(("circle", radius, thickness), self._render_circle, radius, thickness)
+        h, w = sprite.mask.shape
+        clipped = clip_box(img, center[0] + sprite.dx, center[1] + sprite.dy, w, h)
+        if clipped is None:
+            return
+        roi, sx, sy, rw, rh = clipped
+        swatch = self.fetch(("swatch", color) + self.swatch_shape, self._render_swatch, color)
+        cv2.copyTo(swatch.image[:rh, :rw], sprite.mask[sy:sy + rh, sx:sx + rw], roi)
+
+    def _render_circle(self, radius, thickness):
+        pad = radius + thickness + 2
+        canvas = np.zeros((2 * pad + 1, 2 * pad + 1), np.uint8)
+        cv2.circle(canvas, (pad, pad), radius, 255, thickness)
+        rows = np.flatnonzero(canvas.any(axis=1))
+        cols = np.flatnonzero(canvas.any(axis=0))
+        y0, y1, x0, x1 = rows[0], rows[-1] + 1, cols[0], cols[-1] + 1
+        mask = canvas[y0:y1, x0:x1].copy()
+        self.swatch_shape = (max(self.swatch_shape[0], mask.shape[0]), max(self.swatch_shape[1], mask.shape[1]))
+        return Sprite(mask, int(x0) - pad, int(y0) - pad)
+
+    def _render_swatch(self, color):
+        image = np.empty(self.swatch_shape + (3,), np.uint8)
+        image[:] = color
+        return Swatch(image)
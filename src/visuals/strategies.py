@@ -1,25 +1,93 @@
 from abc import ABC, abstractmethod
+import math
 import random
 import colorsys
+import numpy as np
+
+GOLDEN_RATIO_CONJUGATE = 0.618033988749895
+RIPPLE_SNAP = 1e-9 # Far above any sin rounding difference, still rarely hit
+
+# Which of (v, p, q, t) colorsys returns as (r, g, b) for each hue sector
+_HSV_SECTORS = np.array([[0, 3, 1], [2, 0, 1], [1, 0, 3], [1, 2, 0], [3, 1, 0], [0, 1, 2]])
+
+def hsv_to_rgb_array(h, s, v):
+    """colorsys.hsv_to_rgb over an array of hues (s, v scalars), as an (N, 3) float array.
+
+    Same operations in the same order as colorsys, so the results are bit-identical.
+    """
+    h = np.asarray(h, dtype=np.float64)
+    if s == 0.0:
+        return np.full((len(h), 3), v, dtype=np.float64)
+    i = (h * 6.0).astype(np.int64) # int() truncation, hues are >= 0
+    f = (h * 6.0) - i
+    values = np.empty((4, len(h)), dtype=np.float64) # v, p, q, t
+    values[0] = v
+    values[1] = v * (1.0 - s)
+    values[2] = v * (1.0 - s * f)
+    values[3] = v * (1.0 - s * (1.0 - f))
+    return values[_HSV_SECTORS[i % 6], np.arange(len(h))[:, None]]
+
+def _repeat(color, count):
+    return np.tile(np.array(color, dtype=np.uint8), (count, 1))
 
 class ColorStrategy(ABC):
+    vectorized = False # get_colors is array code, not a get_color loop
+
     @abstractmethod
     def get_color(self, object_id, frame_idx):
         pass
 
+    def configure(self, **options):
+        """Applies new constructor options in place, keeping runtime state (sparks, tables...)."""
+        for name, value in options.items():
+            setattr(self, name, value)
+
+    def get_colors(self, object_ids, frame_idx):
+        """Colors of many objects as an (N, 3) uint8 array, same values as get_color.
+
+        Fallback loops over get_color; strategies override it with array code
+        and set vectorized.
+        """
+        colors = [self.get_color(int(object_id), frame_idx) for object_id in object_ids]
+        return np.array(colors, dtype=np.uint8).reshape(-1, 3)
+
 class WhiteColorStrategy(ColorStrategy):
+    vectorized = True
+
     def get_color(self, object_id, frame_idx):
         return (255, 255, 255)
 
+    def get_colors(self, object_ids, frame_idx):
+        return _repeat((255, 255, 255), len(object_ids))
+
 class RainbowColorStrategy(ColorStrategy):
+    vectorized = True
+
+    def __init__(self):
+        self.lut = np.empty((0, 3), dtype=np.uint8) # object id -> color
+
     def get_color(self, object_id, frame_idx):
         # Use object_id to determine hue (stable color per object)
         # Golden ratio conjugate to spread colors
-        hue = (object_id * 0.618033988749895) % 1
+        hue = (object_id * GOLDEN_RATIO_CONJUGATE) % 1
         rgb = colorsys.hsv_to_rgb(hue, 0.8, 1.0)
         return tuple(int(c * 255) for c in rgb)
 
+    def get_colors(self, object_ids, frame_idx):
+        object_ids = np.asarray(object_ids, dtype=np.int64)
+        if not len(object_ids):
+            return np.empty((0, 3), dtype=np.uint8)
+        needed = int(object_ids.max()) + 1
+        if needed > len(self.lut):
+            # Colors only depend on the ID: extend the table (doubling) and gather
+            ids = np.arange(max(needed, 2 * len(self.lut), 256), dtype=np.int64)
+            hue = (ids * GOLDEN_RATIO_CONJUGATE) % 1
+            self.lut = (hsv_to_rgb_array(hue, 0.8, 1.0) * 255).astype(np.uint8)
+        return self.lut[object_ids]
+
 class CycleColorStrategy(ColorStrategy):
+    vectorized = True
+
     def __init__(self, speed=50):
         self.speed = speed
     
@@ -29,36 +97,59 @@ class CycleColorStrategy(ColorStrategy):
         rgb = colorsys.hsv_to_rgb(hue, 1.0, 1.0)
         return tuple(int(c * 255) for c in rgb)
 
+    def get_colors(self, object_ids, frame_idx):
+        # Same color for everyone, it only depends on the frame
+        return _repeat(self.get_color(0, frame_idx), len(object_ids))
+
 class SolidColorStrategy(ColorStrategy):
+    vectorized = True
+
     def __init__(self, color=(255, 255, 255)):
         # Convert RGB to BGR for OpenCV
         self.color = (color[2], color[1], color[0])
     
+    def configure(self, color=None):
+        if color is not None:
+            self.color = (color[2], color[1], color[0])
+    
     def get_color(self, object_id, frame_idx):
         return self.color
 
+    def get_colors(self, object_ids, frame_idx):
+        return _repeat(self.color, len(object_ids))
+
 class BreatheColorStrategy(ColorStrategy):
+    vectorized = True
+
     def __init__(self, base_color=(67, 160, 71), speed=50, intensity=75):
         # Convert RGB to BGR for OpenCV
         self.base_color = (base_color[2], base_color[1], base_color[0])
         self.speed = speed
         self.intensity = intensity
     
+    def configure(self, base_color=None, **options):
+        if base_color is not None:
+            self.base_color = (base_color[2], base_color[1], base_color[0])
+        super().configure(**options)
+    
     def get_color(self, object_id, frame_idx):
-        import math
         # Pulsing brightness
         factor = (math.sin(frame_idx * (self.speed / 500)) + 1) / 2  # 0 to 1
         min_brightness = 1 - (self.intensity / 100)
         brightness = min_brightness + factor * (1 - min_brightness)
         return tuple(int(c * brightness) for c in self.base_color)
 
+    def get_colors(self, object_ids, frame_idx):
+        return _repeat(self.get_color(0, frame_idx), len(object_ids))
+
 class RippleColorStrategy(ColorStrategy):
+    vectorized = True
+
     def __init__(self, speed=50, intensity=75):
         self.speed = speed
         self.intensity = intensity
     
     def get_color(self, object_id, frame_idx):
-        import math
         # Each object gets a phase offset based on ID
         phase = (frame_idx * (self.speed / 500)) + (object_id * 0.5)
         hue = (math.sin(phase) + 1) / 2
@@ -66,6 +157,24 @@ class RippleColorStrategy(ColorStrategy):
         rgb = colorsys.hsv_to_rgb(hue, saturation, 1.0)
         return tuple(int(c * 255) for c in rgb)
 
+    def get_colors(self, object_ids, frame_idx):
+        phase = (frame_idx * (self.speed / 500)) + (np.asarray(object_ids, dtype=np.int64) * 0.5)
+        saturation = self.intensity / 100
+        hue = (np.sin(phase) + 1) / 2
+        colors = hsv_to_rgb_array(hue, saturation, 1.0) * 255
+        if saturation:
+            # NumPy's SIMD sin may differ from math.sin in the last bit, which only
+            # matters where it can move a hue sector or an int() truncation: redo those
+            sector = hue * 6.0
+            f = sector - np.floor(sector)
+            edges = np.stack([sector, (1.0 - saturation * f) * 255, (1.0 - saturation * (1.0 - f)) * 255])
+            unsure = (np.abs(edges - np.rint(edges)) < RIPPLE_SNAP).any(axis=0)
+            if unsure.any():
+                redo = np.flatnonzero(unsure)
+                exact = np.array([math.sin(p) for p in phase[redo].tolist()], dtype=np.float64)
+                colors[redo] = hsv_to_rgb_array((exact + 1) / 2, saturation, 1.0) * 255
+        return colors.astype(np.uint8)
+
 class FireworkColorStrategy(ColorStrategy):
     def __init__(self, speed=50, intensity=75):
         self.speed = speed
@@ -87,6 +196,8 @@ class FireworkColorStrategy(ColorStrategy):
 
 # --- SHAPE STRATEGIES ---
 class ShapeStrategy(ABC):
+    fixed_geometry = False # every object gets the same size (shapes can be stamped)
+
     @abstractmethod
     def get_geometry(self, rect, fixed_size=None):
         pass
@@ -97,6 +208,8 @@ class TrackedShapeStrategy(ShapeStrategy):
         return rect
 
 class FixedShapeStrategy(ShapeStrategy):
+    fixed_geometry = True
+
     def get_geometry(self, rect, fixed_size=None):
         x, y, w, h = rect
         cx = x + w // 2
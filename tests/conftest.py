@@ -0,0 +1,18 @@
+import os
+import sys
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT) # src/ and benchmarks/ are imported from the repo root, like main.py does
+
+from benchmarks.synthetic import SyntheticScene, write_video
+
+VIDEO_FRAMES = 40
+
+
+@pytest.fixture(scope="session")
+def video_path(tmp_path_factory):
+    """Small synthetic mp4 (VIDEO_FRAMES frames, 160x120, moving discs)."""
+    path = str(tmp_path_factory.mktemp("video") / "scene.mp4")
+    return write_video(path, SyntheticScene(160, 120, blobs=6, radius=8, seed=1), VIDEO_FRAMES)
@@ -0,0 +1,46 @@
+import numpy as np
+
+
+class FakeSource:
+    """In-memory frames whose pixels hold their index; records how it was driven."""
+
+    def __init__(self, count=100, width=64, height=48):
+        self.width, self.height, self.fps, self.frame_count = width, height, 30.0, count
+        self.path = None # No file: nothing to scan for keyframes
+        self.position = 0
+        self.seeks = []
+        self.grabs = []
+        self.reads = []
+        self.fail = set() # Frames whose next grab/read fails, once
+        self.released = False
+
+    def is_opened(self):
+        return True
+
+    def seek(self, frame_idx):
+        self.seeks.append(frame_idx)
+        self.position = frame_idx
+
+    def _fails(self):
+        if self.position in self.fail:
+            self.fail.discard(self.position)
+            return True
+        return self.position >= self.frame_count
+
+    def grab(self):
+        if self._fails():
+            return False
+        self.grabs.append(self.position)
+        self.position += 1
+        return True
+
+    def read(self, image=None):
+        if self._fails():
+            return False, None
+        self.reads.append(self.position)
+        frame = np.full((self.height, self.width, 3), self.position % 256, np.uint8)
+        self.position += 1
+        return True, frame
+
+    def release(self):
+        self.released = True
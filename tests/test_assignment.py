@@ -0,0 +1,137 @@
+import itertools
+import numpy as np
+import pytest
+from src.core.assignment import (greedy_assign, linear_sum_assign, grid_candidates,
+                                 sparse_greedy_assign, sparse_linear_sum_assign)
+from src.core.enums import AssignmentMode
+from src.core.tracking import CentroidTracker
+
+
+def brute_force_min_cost(D):
+    # Cheapest matching of min(n, m) pairs, by enumeration
+    n, m = D.shape
+    if n > m:
+        return brute_force_min_cost(D.T)
+    return min(sum(D[i, c] for i, c in enumerate(cols)) for cols in itertools.permutations(range(m), n))
+
+
+def original_greedy(D):
+    # CentroidTracker's original loop (rows: objects, cols: detections)
+    best_row = D.argmin(axis=0)
+    order = D.min(axis=0).argsort()
+    used_rows, used_cols, pairs = set(), set(), []
+    for col, row in zip(order, best_row[order]):
+        if row in used_rows or col in used_cols:
+            continue
+        pairs.append((int(row), int(col)))
+        used_rows.add(row)
+        used_cols.add(col)
+    return sorted(pairs)
+
+
+def random_costs(rng, n, m):
+    points_a = rng.integers(0, 50, (n, 2))
+    points_b = rng.integers(0, 50, (m, 2))
+    return np.linalg.norm(points_a[:, None] - points_b[None], axis=2)
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_linear_sum_assign_is_optimal(seed):
+    rng = np.random.default_rng(seed)
+    D = random_costs(rng, rng.integers(1, 6), rng.integers(1, 6))
+    rows, cols = linear_sum_assign(D)
+    assert len(rows) == min(D.shape)
+    assert len(set(rows)) == len(rows) and len(set(cols)) == len(cols)
+    assert D[rows, cols].sum() == pytest.approx(brute_force_min_cost(D))
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_greedy_assign_matches_original_loop(seed):
+    rng = np.random.default_rng(seed)
+    D = random_costs(rng, rng.integers(1, 12), rng.integers(1, 12))
+    rows, cols = greedy_assign(D)
+    assert sorted(zip(rows.tolist(), cols.tolist())) == original_greedy(D)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_sparse_solvers_match_dense(seed):
+    rng = np.random.default_rng(seed)
+    a = rng.uniform(0, 200, (rng.integers(1, 30), 2))
+    b = rng.uniform(0, 200, (rng.integers(1, 30), 2))
+    radius = 30.0
+    D = np.linalg.norm(a[:, None] - b[None], axis=2)
+
+    rows, cols, sq_dist = grid_candidates(a, b, radius)
+    dense_rows, dense_cols = linear_sum_assign(D, radius)
+    sparse_rows, sparse_cols = sparse_linear_sum_assign(rows, cols, np.sqrt(sq_dist))
+    assert len(sparse_rows) == len(dense_rows)
+    assert D[sparse_rows, sparse_cols].sum() == pytest.approx(D[dense_rows, dense_cols].sum())
+
+    # Random float distances have no ties, so both greedy versions agree exactly
+    dense = sorted(zip(*[x.tolist() for x in greedy_assign(D, radius)]))
+    sparse = sorted(zip(*[x.tolist() for x in sparse_greedy_assign(rows, cols, sq_dist)]))
+    assert sparse == dense
+
+
+def test_grid_candidates_finds_every_pair_in_range():
+    rng = np.random.default_rng(5)
+    a = rng.uniform(-100, 100, (60, 2))
+    b = rng.uniform(-100, 100, (70, 2))
+    radius = 17.5
+    rows, cols, sq_dist = grid_candidates(a, b, radius)
+    D = np.linalg.norm(a[:, None] - b[None], axis=2)
+    expected = set(zip(*np.nonzero(D <= radius)))
+    assert set(zip(rows.tolist(), cols.tolist())) == expected
+    assert np.allclose(sq_dist, D[rows, cols] ** 2)
+
+
+def test_gate_rejects_far_matches():
+    D = np.array([[1.0, 100.0], [100.0, 200.0]])
+    for solve in (greedy_assign, linear_sum_assign):
+        rows, cols = solve(D, max_distance=50)
+        assert list(zip(rows.tolist(), cols.tolist())) == [(0, 0)]
+
+
+def rects_at(points, size=10):
+    points = np.asarray(points)
+    return np.concatenate([points - size // 2, points + size // 2], axis=1)
+
+
+@pytest.mark.parametrize("assignment", [e.value for e in AssignmentMode])
+@pytest.mark.parametrize("max_distance", [0, 30])
+def test_tracker_keeps_ids_of_moving_objects(assignment, max_distance):
+    tracker = CentroidTracker(assignment=assignment, max_distance=max_distance)
+    start = np.array([[20, 20], [100, 40], [60, 120]])
+    for step in range(10):
+        objects = tracker.update(rects_at(start + step * 3))
+    assert list(objects) == [0, 1, 2]
+    assert objects[1][:2] == tuple((start[1] + 27).tolist())
+
+
+def test_tracker_leftovers_without_gate_follow_original_rule():
+    tracker = CentroidTracker(max_disappeared=5)
+    tracker.update(rects_at([[10, 10], [200, 200]]))
+    # Fewer detections than objects: the unmatched object ages, nothing registers
+    tracker.update(rects_at([[12, 12]]))
+    assert tracker.disappeared.tolist() == [0, 1]
+    # As many detections as objects: a far detection that lost its nearest object
+    # registers, and the unmatched object does not age
+    objects = tracker.update(rects_at([[14, 14], [16, 16]]))
+    assert list(objects) == [0, 1, 2]
+    assert tracker.disappeared.tolist() == [0, 1, 0]
+
+
+def test_tracker_with_gate_ages_and_registers_leftovers():
+    tracker = CentroidTracker(max_disappeared=5, max_distance=20)
+    tracker.update(rects_at([[10, 10], [200, 200]]))
+    objects = tracker.update(rects_at([[12, 12], [400, 400]]))
+    assert list(objects) == [0, 1, 2]
+    assert tracker.disappeared.tolist() == [0, 1, 0]
+
+
+def test_tracker_deregisters_after_max_disappeared():
+    tracker = CentroidTracker(max_disappeared=2)
+    tracker.update(rects_at([[10, 10]]))
+    for _ in range(3):
+        objects = tracker.update(np.empty((0, 4)))
+    assert not objects
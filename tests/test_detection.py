@@ -0,0 +1,131 @@
+import cv2
+import numpy as np
+import pytest
+from src.core.buffers import BufferPool
+from src.core.enums import DetectionBackend
+from src.core.tracking import BlobDetector
+
+CENTERS = [(40, 40), (121, 62), (203, 151), (281, 199), (75, 183), (250, 48)]
+RADIUS = 11
+
+
+def scene(noise=0, seed=0):
+    frame = np.full((240, 320, 3), 230, np.uint8)
+    for center in CENTERS:
+        cv2.circle(frame, center, RADIUS, (30, 30, 30), -1)
+    cv2.rectangle(frame, (150, 100), (175, 112), (30, 30, 30), -1) # Not round: centroid != center
+    if noise:
+        frame = np.clip(frame + np.random.default_rng(seed).normal(0, noise, frame.shape), 0, 255).astype(np.uint8)
+    return frame
+
+
+def detector(backend=DetectionBackend.CONTOURS, **params):
+    detector = BlobDetector()
+    detector.update_params(dict(params, backend=backend.value))
+    return detector
+
+
+def blobs(frame, backend=DetectionBackend.CONTOURS, **params):
+    found, _, _ = detector(backend, **params).detect_blobs(frame)
+    return np.sort(found, order=("x", "y"))
+
+
+def test_finds_every_blob_at_its_center():
+    found = blobs(scene())
+    assert len(found) == len(CENTERS) + 1
+    discs = found[found["w"] == found["h"]] # The rectangle is wider than tall
+    assert len(discs) == len(CENTERS)
+    for (cx, cy), blob in zip(sorted(CENTERS), discs):
+        assert abs(blob["cx"] - cx) <= 1 and abs(blob["cy"] - cy) <= 1
+
+
+@pytest.mark.parametrize("noise", [0, 6])
+def test_components_match_contours(noise):
+    frame = scene(noise)
+    contours = blobs(frame, DetectionBackend.CONTOURS, blur=1)
+    components = blobs(frame, DetectionBackend.COMPONENTS, blur=1)
+    assert len(contours) == len(components)
+    for key in ("x", "y", "w", "h"):
+        np.testing.assert_array_equal(contours[key], components[key])
+    np.testing.assert_allclose(contours["cx"], components["cx"], atol=1.0)
+    np.testing.assert_allclose(contours["cy"], components["cy"], atol=1.0)
+    # Polygon area vs pixel count: close, not equal
+    np.testing.assert_allclose(contours["area"], components["area"], rtol=0.15)
+
+
+@pytest.mark.parametrize("backend", list(DetectionBackend))
+def test_keypoints_are_optional(backend):
+    d = detector(backend)
+    rects, keypoints, _ = d.detect(scene())
+    fast_rects, no_keypoints, _ = d.detect(scene(), keypoints=False)
+    np.testing.assert_array_equal(rects, fast_rects)
+    assert len(keypoints) == len(rects) and no_keypoints == []
+    assert rects.dtype == np.int32 and rects.shape == (len(CENTERS) + 1, 4)
+
+
+@pytest.mark.parametrize("backend", list(DetectionBackend))
+def test_pool_is_reused_across_frames(backend):
+    d = detector(backend, blur=2, dilation=3, detect_scale=0.5)
+    pool = BufferPool()
+    frame = scene()
+    expected, _, _ = d.detect(frame, keypoints=False)
+    first, _, (thresh, _) = d.detect(frame, keypoints=False, pool=pool)
+    allocations = pool.allocations
+    second, _, (thresh_again, _) = d.detect(scene(6), keypoints=False, pool=pool)
+    third, _, _ = d.detect(frame, keypoints=False, pool=pool)
+    assert pool.allocations == allocations
+    assert thresh_again is thresh # Same scratch buffer, every frame
+    np.testing.assert_array_equal(first, expected)
+    np.testing.assert_array_equal(third, expected)
+
+
+@pytest.mark.parametrize("backend", list(DetectionBackend))
+@pytest.mark.parametrize("scale", [0.5, 0.3])
+def test_detect_scale_maps_back_to_source_pixels(backend, scale):
+    full = blobs(scene(), backend)
+    scaled = blobs(scene(), backend, detect_scale=scale)
+    assert len(scaled) == len(full)
+    slack = int(np.ceil(1 / scale)) + 1 # About one downscaled pixel, in source pixels
+    for key in ("x", "y", "w", "h"):
+        np.testing.assert_allclose(scaled[key], full[key], atol=slack)
+    np.testing.assert_allclose(scaled["cx"], full["cx"], atol=slack)
+    np.testing.assert_allclose(scaled["cy"], full["cy"], atol=slack)
+    np.testing.assert_allclose(scaled["area"], full["area"], rtol=0.25)
+
+
+def inside(found, x0, y0, x1, y1):
+    keep = (found["x"] >= x0) & (found["y"] >= y0) & (found["x"] + found["w"] <= x1) & (found["y"] + found["h"] <= y1)
+    return found[keep]
+
+
+@pytest.mark.parametrize("backend", list(DetectionBackend))
+def test_roi_keeps_source_coordinates(backend):
+    full = blobs(scene(), backend)
+    roi = (100, 30, 200, 150) # x, y, w, h
+    cropped = blobs(scene(), backend, roi=roi)
+    expected = inside(full, 100, 30, 300, 180)
+    assert 0 < len(cropped) < len(full)
+    np.testing.assert_array_equal(cropped, expected)
+
+
+@pytest.mark.parametrize("backend", list(DetectionBackend))
+def test_polygon_roi_masks_outside_blobs(backend):
+    full = blobs(scene(), backend)
+    # An L along the top and left edges: its bounding box holds blobs it does not
+    polygon = [[0, 0], [300, 0], [300, 90], [100, 90], [100, 239], [0, 239]]
+    found = blobs(scene(), backend, roi=polygon)
+    expected = full[(full["y"] + full["h"] <= 90) | (full["x"] + full["w"] <= 100)]
+    assert 0 < len(expected) < len(full)
+    np.testing.assert_array_equal(found, expected)
+
+
+@pytest.mark.parametrize("backend", list(DetectionBackend))
+def test_roi_and_scale_together(backend):
+    roi = (100, 30, 200, 150)
+    expected = inside(blobs(scene(), backend), 100, 30, 300, 180)
+    found = blobs(scene(), backend, roi=roi, detect_scale=0.5)
+    assert len(found) == len(expected)
+    np.testing.assert_allclose(found["cx"], expected["cx"], atol=3)
+    np.testing.assert_allclose(found["cy"], expected["cy"], atol=3)
+    for key in ("x", "y", "w", "h"):
+        np.testing.assert_allclose(found[key], expected[key], atol=3)
@@ -0,0 +1,53 @@
+import numpy as np
+from benchmarks.synthetic import SyntheticScene
+from src.core.detection_cache import DetectionCache
+from src.core.pipeline import PipelineEngine
+
+
+def test_entries_are_keyed_by_frame_and_detector_settings():
+    cache = DetectionCache()
+    rects = np.array([[1, 2, 3, 4]], dtype=np.int32)
+    cache.put(3, ("a",), rects)
+    assert cache.get(3, ("a",)) is rects
+    assert cache.get(3, ("b",)) is None
+    assert cache.get(4, ("a",)) is None
+
+
+def counting_engine():
+    engine = PipelineEngine()
+    engine.detection_cache = DetectionCache()
+    calls = []
+    detect = engine.detect
+
+    def counted(frame):
+        calls.append(1)
+        return detect(frame)
+
+    engine.detect = counted
+    return engine, calls
+
+
+def test_engine_detects_a_frame_once_per_detector_settings():
+    engine, calls = counting_engine()
+    frame = SyntheticScene(160, 120, blobs=4, seed=2).frame(0)
+    first = engine.process(frame.copy(), 0, render=False)
+    second = engine.process(frame.copy(), 0, render=False)
+    assert len(calls) == 1
+    assert np.array_equal(np.asarray(first.rects), np.asarray(second.rects))
+
+    # Tracking settings do not touch detection results
+    engine.update_params({"max_disappeared": 3})
+    engine.process(frame.copy(), 0, render=False)
+    assert len(calls) == 1
+
+    engine.update_params({"threshold": 90})
+    engine.process(frame.copy(), 0, render=False)
+    assert len(calls) == 2
+
+
+def test_engine_skips_the_cache_when_asked():
+    engine, calls = counting_engine()
+    frame = SyntheticScene(160, 120, blobs=4, seed=2).frame(0)
+    engine.process(frame.copy(), 0, render=False)
+    engine.process(frame.copy(), 0, render=False, use_cache=False)
+    assert len(calls) == 2
@@ -0,0 +1,140 @@
+import threading
+import numpy as np
+import pytest
+from src.core.frame_cache import CachedFrameSource, FrameCache, ProxyCache, make_proxy
+from src.core.pipeline import VideoFileSource
+from fake_source import FakeSource
+
+
+class Entry:
+    def __init__(self, nbytes):
+        self.nbytes = nbytes
+
+
+def test_frame_cache_never_evicts_the_keep_window():
+    cache = FrameCache(max_bytes=30)
+    for key in range(3):
+        cache.store(key, Entry(10))
+    cache.store(3, Entry(10), keep=range(0, 2))
+    assert sorted(cache.entries) == [0, 1, 3]
+
+
+def test_reads_sequentially_and_after_seeks():
+    source = FakeSource()
+    frames = CachedFrameSource(source, FrameCache(max_bytes=20 * 64 * 48 * 3), read_ahead=4)
+    try:
+        for expected in range(10):
+            ret, frame = frames.read()
+            assert ret and frame[0, 0, 0] == expected and frames.current == expected
+        for target in (70, 5, 6, 99, 30):
+            frames.seek(target)
+            ret, frame = frames.read()
+            assert ret and frame[0, 0, 0] == target and frames.current == target
+        ret, _ = frames.read()
+        assert ret and frames.current == 31
+        frames.seek(100) # Past the last frame
+        assert frames.read() == (False, None)
+    finally:
+        frames.release()
+    assert source.released
+
+
+def test_a_failed_read_after_a_seek_is_not_the_end():
+    source = FakeSource()
+    source.fail.add(70)
+    frames = CachedFrameSource(source, read_ahead=4)
+    try:
+        frames.seek(70)
+        ret, frame = frames.read()
+        assert ret and frame[0, 0, 0] == 70 # Decoded through from further back
+        assert source.seeks[-1] < 70 and frames.end is None
+        for expected in range(71, 100):
+            ret, frame = frames.read()
+            assert ret and frame[0, 0, 0] == expected
+        assert frames.read() == (False, None)
+        assert frames.end == 100
+    finally:
+        frames.release()
+
+
+def test_an_end_found_mid_video_is_only_a_hint():
+    source = FakeSource()
+    source.fail.add(8)
+    frames = CachedFrameSource(source, read_ahead=4)
+    try:
+        for expected in range(8):
+            assert frames.read()[0]
+        assert frames.read() == (False, None) # A sequential failure reads as the end...
+        frames.seek(40)
+        ret, frame = frames.read() # ...until a seek past it finds more frames
+        assert ret and frame[0, 0, 0] == 40 and frames.end is None
+        frames.seek(8)
+        ret, frame = frames.read()
+        assert ret and frame[0, 0, 0] == 8
+    finally:
+        frames.release()
+
+
+def test_read_copies_into_the_callers_image():
+    frames = CachedFrameSource(FakeSource(), read_ahead=2)
+    try:
+        image = np.zeros((48, 64, 3), np.uint8)
+        ret, out = frames.read(image)
+        assert out is image
+        image[:] = 200 # Drawing on it must not reach the cache
+        frames.seek(0)
+        assert frames.read()[1][0, 0, 0] == 0
+    finally:
+        frames.release()
+
+
+def test_revisited_frames_come_from_the_cache():
+    source = FakeSource()
+    frames = CachedFrameSource(source, read_ahead=4)
+    try:
+        for _ in range(8):
+            frames.read()
+        frames.seek(2)
+        for _ in range(3):
+            frames.read()
+        assert [source.reads.count(i) for i in (2, 3, 4)] == [1, 1, 1]
+    finally:
+        frames.release()
+
+
+def test_proxies_are_small_copies():
+    frame = np.zeros((720, 1280, 3), np.uint8)
+    assert make_proxy(frame).shape == (180, 320, 3)
+    proxies = ProxyCache()
+    frames = CachedFrameSource(FakeSource(width=1280, height=720), proxies=proxies, read_ahead=2)
+    try:
+        frames.read()
+        assert frames.proxy(0).shape == (180, 320, 3)
+    finally:
+        frames.release()
+
+
+def test_release_stops_the_decoder(video_path):
+    before = threading.active_count()
+    frames = CachedFrameSource(VideoFileSource(video_path))
+    frames.read()
+    frames.release()
+    assert threading.active_count() == before
+
+
+def test_matches_a_plain_decode(video_path):
+    source = VideoFileSource(video_path)
+    expected = []
+    while True:
+        ret, frame = source.read()
+        if not ret:
+            break
+        expected.append(frame)
+    frames = CachedFrameSource(VideoFileSource(video_path), FrameCache(max_bytes=8 * expected[0].nbytes))
+    try:
+        for target in (0, 1, 25, 3, len(expected) - 1, 12):
+            frames.seek(target)
+            ret, frame = frames.read()
+            assert ret and np.array_equal(frame, expected[target]), target
+    finally:
+        frames.release()
@@ -0,0 +1,100 @@
+import shutil
+import time
+import numpy as np
+import pytest
+from src.core import keyframes
+from src.core.frame_cache import CachedFrameSource, ProxyCache
+from src.core.keyframes import KeyframeIndex, cached_keyframe_index, keyframe_index, scan_keyframes
+from fake_source import FakeSource
+
+
+class Entry:
+    nbytes = 10
+
+
+def test_index_lookups():
+    index = KeyframeIndex([0, 12, 24])
+    assert [index.before(i) for i in (0, 11, 12, 30)] == [0, 0, 12, 24]
+    assert 12 in index and 13 not in index
+    assert len(index) == 3
+    assert 0 not in KeyframeIndex([])
+
+
+def test_scan_finds_the_keyframes(video_path):
+    index = scan_keyframes(video_path)
+    if index is None:
+        pytest.skip("OpenCV build cannot read raw packets")
+    assert index.keyframes[0] == 0
+    assert index.keyframes == sorted(set(index.keyframes))
+
+
+def test_index_is_built_once_per_file(video_path, tmp_path):
+    path = str(tmp_path / "copy.mp4")
+    shutil.copy(video_path, path)
+    assert cached_keyframe_index(path) is None
+    assert keyframe_index(path, should_stop=lambda: True) is None # Stopped: not remembered
+    assert cached_keyframe_index(path) is None
+    index = keyframe_index(path)
+    assert keyframe_index(path) is index
+    if index is not None:
+        assert cached_keyframe_index(path) is index
+
+
+def wait_decoded(frames, frame_idx, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not frames.is_decoded(frame_idx):
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+def jump(keyframe_list, target=30):
+    """Reads frame 0, lets the read-ahead settle, then reads target. Returns the source."""
+    source = FakeSource()
+    frames = CachedFrameSource(source, read_ahead=4, keyframes=KeyframeIndex(keyframe_list))
+    try:
+        frames.read()
+        wait_decoded(frames, 4)
+        frames.seek(target)
+        ret, frame = frames.read()
+        assert ret and frame[0, 0, 0] == target
+    finally:
+        frames.release()
+    return source
+
+
+def test_decodes_through_when_no_keyframe_is_closer():
+    # A seek to 30 restarts at the keyframe before 30 - SEEK_BACKOFF, i.e. 0: the
+    # decoder is past it already, so it keeps going, grabbing what it skips
+    source = jump([0, 40])
+    assert source.seeks == []
+    assert source.grabs[:25] == list(range(5, 30))
+    assert 30 in source.reads and not set(range(5, 30)) & set(source.reads)
+
+
+def test_seeks_when_a_keyframe_is_closer():
+    source = jump([0, 10, 20, 30])
+    assert source.seeks == [30]
+    assert source.grabs == []
+
+
+def test_preview_shows_the_nearest_decoded_frame_back_to_the_keyframe():
+    frames = CachedFrameSource(FakeSource(), read_ahead=4, keyframes=KeyframeIndex([0, 10]))
+    try:
+        frames.read()
+        wait_decoded(frames, 4)
+        assert frames.preview(8)[0] == 4
+        assert frames.preview(3)[0] == 3
+        assert frames.preview(15) is None # Nothing decoded since keyframe 10
+    finally:
+        frames.release()
+
+
+def test_proxy_cache_evicts_keyframes_last():
+    proxies = ProxyCache(max_bytes=30)
+    proxies.keyframes = KeyframeIndex([0, 2])
+    for key in range(5):
+        proxies.store(key, Entry())
+    assert sorted(proxies.entries) == [0, 2, 4]
+    for key in range(5, 7):
+        proxies.store(key, Entry())
+    assert sorted(proxies.entries) == [0, 2, 6]
@@ -0,0 +1,85 @@
+import cv2
+import numpy as np
+import pytest
+from src.core import parallel
+from src.core.parallel import detect_frame_range, iter_parallel_detections, split_frame_ranges
+from src.core.tracking import BlobDetector
+from src.core.pipeline import PipelineEngine, VideoFileSource
+
+PARAMS = {}
+
+
+def serial_detections(video_path):
+    detector = BlobDetector()
+    detector.update_params(PARAMS)
+    cap = cv2.VideoCapture(video_path)
+    results = []
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        rects, _, _ = detector.detect(frame, keypoints=False)
+        results.append((len(results), rects.copy()))
+    cap.release()
+    return results
+
+
+def assert_same(got, expected):
+    assert [idx for idx, _ in got] == [idx for idx, _ in expected]
+    for (_, a), (_, b) in zip(got, expected):
+        np.testing.assert_array_equal(a, b)
+
+
+def test_split_covers_every_frame():
+    assert split_frame_ranges(10, 4) == [(0, 4), (4, 8), (8, None)]
+    assert split_frame_ranges(0, 4) == [(0, None)]
+
+
+@pytest.mark.parametrize("chunk_size", [7, 10, 40, 64])
+def test_parallel_matches_serial(video_path, chunk_size):
+    expected = serial_detections(video_path)
+    got = list(iter_parallel_detections(video_path, PARAMS, len(expected), workers=2,
+                                        chunk_size=chunk_size))
+    assert_same(got, expected)
+
+
+def test_chunk_starts_at_its_frame(video_path):
+    start, rects, stats = detect_frame_range(video_path, PARAMS, 13, 20)
+    assert start == 13 and len(rects) == 7
+    assert_same(list(enumerate(rects, start)), serial_detections(video_path)[13:20])
+    assert "chunk_seek_miss" not in stats.counters
+
+
+class LostCapture:
+    """A capture whose seeks land one frame early."""
+    def __init__(self, path):
+        self.pos = 0
+
+    def set(self, prop, value):
+        self.pos = value - 1
+
+    def get(self, prop):
+        return float(self.pos)
+
+    def read(self):
+        self.pos += 1
+        return True, np.zeros((8, 8, 3), np.uint8)
+
+    def release(self):
+        pass
+
+
+def test_missed_seek_returns_no_rects(monkeypatch):
+    monkeypatch.setattr(parallel.cv2, "VideoCapture", LostCapture)
+    start, rects, stats = detect_frame_range("missing.mp4", PARAMS, 10, 20)
+    assert (start, rects) == (10, [])
+    assert stats.counters["chunk_seek_miss"] == 1
+
+
+def test_engine_detects_frames_a_chunk_left_out(video_path):
+    expected = serial_detections(video_path)
+    detections = iter([item for item in expected if not 10 <= item[0] < 20])
+    got = []
+    PipelineEngine().run(VideoFileSource(video_path), detections=detections,
+                         on_frame=lambda result: got.append((len(got), result.rects.copy())))
+    assert_same(got, expected)
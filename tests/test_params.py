@@ -0,0 +1,56 @@
+import threading
+from src.core.params import ParamChannel
+from src.core.pipeline import PipelineEngine
+
+
+def test_take_returns_nothing_until_published():
+    channel = ParamChannel()
+    assert channel.take(0) is None
+    channel.publish({"threshold": 10})
+    assert channel.take(0) == (1, {"threshold": 10})
+    assert channel.take(1) is None
+
+
+def test_publishes_merge_and_latest_value_wins():
+    channel = ParamChannel()
+    channel.publish({"threshold": 10, "blur": 1})
+    channel.publish({"threshold": 20})
+    version, params = channel.take(0)
+    assert version == 2
+    assert params == {"threshold": 20, "blur": 1}
+
+
+def test_publish_copies_the_callers_dict():
+    channel = ParamChannel()
+    params = {"threshold": 10}
+    channel.publish(params)
+    params["threshold"] = 99
+    assert channel.take(0)[1] == {"threshold": 10}
+
+
+def test_concurrent_publishes_are_all_counted():
+    channel = ParamChannel()
+
+    def publisher(key):
+        for i in range(500):
+            channel.publish({key: i})
+
+    threads = [threading.Thread(target=publisher, args=(f"k{n}",)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    version, params = channel.take(0)
+    assert version == 2000
+    assert params == {f"k{n}": 499 for n in range(4)}
+
+
+def test_engine_applies_pending_params_once_per_burst():
+    engine = PipelineEngine()
+    engine.param_channel.publish({"threshold": 10})
+    engine.param_channel.publish({"threshold": 42, "min_area": 5})
+    assert engine.apply_pending_params()
+    assert not engine.apply_pending_params()
+    assert engine.detector.threshold == 42
+    assert engine.detector.min_area == 5
+    assert engine.stats.counters["param_updates"] == 1
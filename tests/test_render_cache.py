@@ -0,0 +1,61 @@
+from src.core.profiler import StageStats
+from src.visuals.cache import RenderCache
+
+
+class Entry:
+    def __init__(self, nbytes):
+        self.nbytes = nbytes
+
+
+def test_evicts_least_recently_used_over_budget():
+    cache = RenderCache(max_bytes=30)
+    for key in "abc":
+        cache.store(key, Entry(10))
+    assert cache.lookup("a") is not None # a is now the most recent
+    cache.store("d", Entry(10))
+    assert list(cache.entries) == ["c", "a", "d"]
+    assert cache.nbytes == 30
+    assert cache.evictions == 1
+
+
+def test_replacing_a_key_updates_the_byte_count():
+    cache = RenderCache(max_bytes=100)
+    cache.store("a", Entry(10))
+    cache.store("a", Entry(25))
+    assert len(cache.entries) == 1
+    assert cache.nbytes == 25
+
+
+def test_keeps_a_single_entry_larger_than_the_budget():
+    cache = RenderCache(max_bytes=10)
+    cache.store("a", Entry(5))
+    cache.store("big", Entry(50))
+    assert list(cache.entries) == ["big"]
+
+
+def test_fetch_renders_only_on_a_miss():
+    calls = []
+
+    def render(size):
+        calls.append(size)
+        return Entry(size)
+
+    cache = RenderCache(max_bytes=100)
+    first = cache.fetch("k", render, 8)
+    assert cache.fetch("k", render, 8) is first
+    assert calls == [8]
+    assert cache.report()["hit_rate"] == 0.5
+
+
+def test_counters_go_to_stats():
+    stats = StageStats()
+    cache = RenderCache(max_bytes=15, stats=stats)
+    cache.lookup("a")
+    cache.store("a", Entry(10))
+    cache.store("b", Entry(10))
+    cache.lookup("b")
+    assert stats.counters["render_misses"] == 1
+    assert stats.counters["render_hits"] == 1
+    assert stats.counters["render_bytes"] == 10
+    cache.clear()
+    assert stats.counters["render_bytes"] == 0
@@ -0,0 +1,89 @@
+import hashlib
+import pytest
+from src.cli import render_file
+from src.core.pipeline import PipelineEngine, VideoFileSource
+from src.core.trackfile import TrackFile, TrackFileWriter, sidecar_path, source_keys
+
+VISUALS = {"color_mode": "Effect", "effect_name": "Rainbow", "text_mode": "Index"}
+
+
+class FrameHashes:
+    def __init__(self):
+        self.hashes = []
+
+    def write(self, frame):
+        self.hashes.append(hashlib.md5(frame.tobytes()).hexdigest())
+
+
+def render(video_path, frames=None, **kwargs):
+    """Frame hashes of an export, stopped after `frames` frames if given."""
+    engine = PipelineEngine(None, VISUALS)
+    sink = FrameHashes()
+    stop = (lambda: len(sink.hashes) >= frames) if frames else None
+    engine.run(VideoFileSource(video_path), sink, should_stop=stop, **kwargs)
+    return engine, sink.hashes
+
+
+def save_tracks(video_path, path, frames):
+    writer = TrackFileWriter(path, dict(PipelineEngine().settings_keys(), **source_keys(video_path)))
+    render(video_path, frames, on_frame=lambda result: writer.add(result.rects, result.objects))
+    return writer.save()
+
+
+def raw_hashes(video_path):
+    source = VideoFileSource(video_path)
+    hashes = []
+    while True:
+        ret, frame = source.read()
+        if not ret:
+            return hashes
+        hashes.append(hashlib.md5(frame.tobytes()).hexdigest())
+
+
+def no_detection(frame):
+    raise AssertionError("render-only export ran detection")
+
+
+def test_render_from_tracks_matches_the_full_render(video_path, tmp_path):
+    path = save_tracks(video_path, str(tmp_path / "full.blobs"), None)
+    _, expected = render(video_path)
+    engine = PipelineEngine(None, VISUALS)
+    engine.detect = no_detection
+    sink = FrameHashes()
+    engine.run(VideoFileSource(video_path), sink, tracks=TrackFile(path))
+    assert sink.hashes == expected
+    assert "tracks_short" not in engine.stats.counters
+
+
+def test_frames_past_the_end_of_the_tracks_are_not_detected(video_path, tmp_path):
+    covered = 15
+    path = save_tracks(video_path, str(tmp_path / "short.blobs"), covered)
+    _, full = render(video_path)
+    raw = raw_hashes(video_path)
+
+    engine = PipelineEngine(None, VISUALS)
+    engine.detect = no_detection
+    sink = FrameHashes()
+    processed = engine.run(VideoFileSource(video_path), sink, tracks=TrackFile(path))
+    assert processed == len(raw)
+    assert sink.hashes[:covered] == full[:covered]
+    assert sink.hashes[covered:] == raw[covered:] # Written without overlay
+    assert engine.stats.counters["tracks_short"] == len(raw) - covered
+
+
+@pytest.mark.parametrize("io_depth", [0, 4])
+def test_cli_reports_frames_past_the_end_of_the_tracks(video_path, tmp_path, io_depth):
+    path = save_tracks(video_path, str(tmp_path / "short.blobs"), 10)
+    result = render_file(video_path, str(tmp_path / f"out{io_depth}.mp4"), {}, {},
+                         io_depth=io_depth, tracks=path)
+    frames = len(raw_hashes(video_path))
+    assert result["frames"] == frames
+    assert result["tracks_short"] == frames - 10
+
+
+def test_cli_rejects_tracks_of_another_video(video_path, tmp_path):
+    other = tmp_path / "other.mp4"
+    other.write_bytes(b"\0" * 100)
+    save_tracks(video_path, sidecar_path(str(other)), 5) # Next to other.mp4, made from video_path
+    result = render_file(str(other), str(tmp_path / "out.mp4"), {}, {}, tracks="")
+    assert "different video" in result["error"]
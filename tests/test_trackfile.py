@@ -0,0 +1,114 @@
+import os
+from collections import OrderedDict
+import numpy as np
+import pytest
+from src.core.trackfile import (TrackFile, TrackFileWriter, load_sidecar, load_tracks,
+                                sidecar_path, source_fingerprint, source_keys,
+                                FINGERPRINT_SAMPLE, FINGERPRINT_INTERIOR)
+
+KEYS = {"source": "s", "modified": 1, "detection": "d", "tracking": "t"}
+
+FRAMES = [
+    ([[0, 0, 10, 10], [5, 5, 20, 30]], OrderedDict([(0, (5, 5, 5)), (1, (12, 17, 12))])),
+    ([], OrderedDict()),
+    ([[1, 2, 3, 4]], OrderedDict([(1, (2, 3, 1))])),
+]
+
+
+def write(path, frames=FRAMES, keys=KEYS):
+    writer = TrackFileWriter(str(path), keys)
+    for rects, objects in frames:
+        writer.add(rects, objects)
+    return writer.save()
+
+
+def test_round_trip(tmp_path):
+    tracks = TrackFile(write(tmp_path / "a.blobs"))
+    assert tracks.frames == len(FRAMES)
+    assert tracks.keys == KEYS
+    for frame_idx, (rects, objects) in enumerate(FRAMES):
+        assert tracks.rects(frame_idx).tolist() == rects
+        assert tracks.rects(frame_idx).dtype == np.int32
+        assert tracks.objects(frame_idx) == objects
+    assert [i for i, _ in tracks.iter_rects()] == [0, 1, 2]
+
+
+def test_empty_file_round_trips(tmp_path):
+    assert TrackFile(write(tmp_path / "e.blobs", frames=[])).frames == 0
+
+
+def test_save_replaces_atomically(tmp_path):
+    path = write(tmp_path / "a.blobs")
+    write(tmp_path / "a.blobs", frames=FRAMES[:1])
+    assert TrackFile(path).frames == 1
+    assert os.listdir(tmp_path) == ["a.blobs"]
+
+
+def test_unreadable_files_raise_value_error(tmp_path):
+    junk = tmp_path / "junk.blobs"
+    junk.write_bytes(b"not a track file")
+    with pytest.raises(ValueError):
+        TrackFile(str(junk))
+
+    data = open(write(tmp_path / "a.blobs"), "rb").read()
+    truncated = tmp_path / "t.blobs"
+    truncated.write_bytes(data[:len(data) - 8])
+    with pytest.raises(ValueError):
+        TrackFile(str(truncated))
+    assert load_sidecar(str(truncated), KEYS) is None
+
+
+def test_load_sidecar_matches_source_and_detection_keys(tmp_path):
+    path = write(tmp_path / "a.blobs")
+    assert load_sidecar(path, KEYS) is not None
+    assert load_sidecar(path, dict(KEYS, tracking="other")) is not None # Re-tracked by the caller
+    assert load_sidecar(path, dict(KEYS, detection="other")) is None
+    assert load_sidecar(path, dict(KEYS, source="other")) is None
+    assert load_sidecar(path, dict(KEYS, modified=2)) is None
+    assert load_sidecar(str(tmp_path / "missing.blobs"), KEYS) is None
+
+
+def big_file(path, size):
+    path.write_bytes(np.random.default_rng(0).integers(0, 256, size, dtype=np.uint8).tobytes())
+    return str(path)
+
+
+def test_fingerprint_covers_the_ends_and_the_interior(tmp_path):
+    size = 2 * FINGERPRINT_SAMPLE + 17 * 2**16
+    path = big_file(tmp_path / "v.bin", size)
+    original = source_fingerprint(path)
+    step = (size - 2 * FINGERPRINT_SAMPLE) // (FINGERPRINT_INTERIOR + 1)
+    for offset in (0, FINGERPRINT_SAMPLE + step, size - 1):
+        with open(path, "r+b") as f:
+            f.seek(offset)
+            byte = f.read(1)
+            f.seek(offset)
+            f.write(bytes([byte[0] ^ 0xFF]))
+        assert source_fingerprint(path) != original
+        with open(path, "r+b") as f:
+            f.seek(offset)
+            f.write(byte)
+    assert source_fingerprint(path) == original
+
+
+def test_source_keys_change_when_the_file_is_touched(tmp_path):
+    path = big_file(tmp_path / "v.bin", 1000)
+    keys = source_keys(path)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    touched = source_keys(path)
+    assert touched["source"] == keys["source"]
+    assert touched["modified"] != keys["modified"]
+
+
+def test_load_tracks_checks_the_content_only(tmp_path):
+    video = big_file(tmp_path / "v.mp4", 1000)
+    path = write(sidecar_path(video), keys=dict(KEYS, **source_keys(video)))
+    os.utime(video, ns=(0, 0)) # e.g. a copy: same content, new modification time
+    assert load_tracks(path, video).frames == len(FRAMES)
+
+    other = big_file(tmp_path / "other.mp4", 999)
+    with pytest.raises(ValueError):
+        load_tracks(path, other)
+    with pytest.raises(ValueError):
+        load_tracks(str(tmp_path / "missing.blobs"), video)
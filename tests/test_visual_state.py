@@ -0,0 +1,76 @@
+from collections import deque
+import numpy as np
+from src.visuals import VisualStateManager, Visualizer
+
+
+def trail(state, obj_id):
+    return state.trace(obj_id).tolist()
+
+
+def test_trails_come_back_newest_first_after_wrapping():
+    state = VisualStateManager(max_trace_length=4)
+    for i in range(11):
+        state.update({1: (i, -i)})
+        expected = [[j, -j] for j in range(i, max(-1, i - 4), -1)]
+        assert trail(state, 1) == expected
+    assert not state.trace(1).flags.owndata # A view into the ring, not a copy
+
+
+def test_freed_slots_are_reused_clean():
+    state = VisualStateManager(max_trace_length=5)
+    for i in range(7):
+        state.update({1: (i, i), 2: (100 + i, 100)})
+    slot = state.slots[1]
+    state.update({2: (107, 100)}) # 1 vanished
+    assert state.trace(1) is None
+    state.update({2: (108, 100), 3: (50, 60)})
+    assert state.slots[3] == slot
+    assert trail(state, 3) == [[50, 60]]
+    assert trail(state, 2)[:3] == [[108, 100], [107, 100], [106, 100]]
+
+
+def test_resizing_keeps_the_newest_points():
+    state = VisualStateManager(max_trace_length=6)
+    for i in range(9):
+        state.update({1: (i, 0), 2: (0, i)} if i >= 5 else {1: (i, 0)})
+    state.set_max_length(3)
+    assert trail(state, 1) == [[8, 0], [7, 0], [6, 0]]
+    assert trail(state, 2) == [[0, 8], [0, 7], [0, 6]]
+    state.update({1: (9, 0), 2: (0, 9)})
+    assert trail(state, 1) == [[9, 0], [8, 0], [7, 0]]
+
+    state.set_max_length(5) # Growing keeps what is there and fills up again
+    assert trail(state, 1) == [[9, 0], [8, 0], [7, 0]]
+    for i in range(10, 13):
+        state.update({1: (i, 0)})
+    assert trail(state, 1) == [[i, 0] for i in range(12, 7, -1)]
+    assert state.trace(2) is None
+
+
+def test_matches_a_deque_per_object():
+    rng = np.random.default_rng(5)
+    state = VisualStateManager(max_trace_length=7)
+    reference = {}
+    maxlen = 7
+    for step in range(400):
+        if step % 50 == 49:
+            maxlen = int(rng.integers(1, 12))
+            state.set_max_length(maxlen)
+            reference = {i: deque(list(d)[:maxlen], maxlen=maxlen) for i, d in reference.items()}
+        ids = rng.choice(150, size=int(rng.integers(0, 100)), replace=False).tolist()
+        objects = {i: tuple(rng.integers(-500, 500, 2).tolist()) for i in ids}
+        state.update(objects)
+        reference = {i: reference.get(i, deque(maxlen=maxlen)) for i in ids}
+        for i, point in objects.items():
+            reference[i].appendleft(list(point))
+        for i in ids:
+            assert trail(state, i) == list(reference[i])
+    assert len(state.head) >= 100 # Grew past INITIAL_CAPACITY on the way
+
+
+def test_trace_lifetime_resizes_the_state():
+    visualizer = Visualizer(VisualStateManager())
+    for i in range(30):
+        visualizer.state.update({1: (i, i)})
+    visualizer.trace_lifetime = 4
+    assert trail(visualizer.state, 1) == [[i, i] for i in range(29, 25, -1)]